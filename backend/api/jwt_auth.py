@@ -1,22 +1,74 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.exceptions import InvalidToken
 from django.contrib.auth.models import AnonymousUser
-from .models import Usuario
+from .services import token_service
+from .utils import usuario_cache
+
+
+class UsuarioToken:
+    """
+    Usuário autenticado montado a partir das claims do token.
+
+    idusuario, email e nome vêm do token, sem consulta. admin e os demais
+    campos de Usuario são lidos na primeira vez que a view os acessa, pelo
+    cache de usuários (api/utils/usuario_cache.py), para que uma alteração
+    de permissão valha antes de o token expirar.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, validated_token, user_id):
+        self.idusuario = int(user_id)
+        self.email = validated_token.get('email')
+        self.nome = validated_token.get('nome')
+        self._usuario = None
+        self._carregado = False
+
+    @property
+    def pk(self):
+        return self.idusuario
+
+    @property
+    def usuario(self):
+        """Linha de Usuario (None se a conta não existe mais)"""
+        if not self._carregado:
+            self._usuario = usuario_cache.obter(self.idusuario)
+            self._carregado = True
+        return self._usuario
+
+    @property
+    def admin(self):
+        usuario = self.usuario
+        return bool(usuario and usuario.admin)
+
+    def __getattr__(self, nome):
+        # Só é chamado para atributos que não são claims
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        usuario = self.usuario
+        if usuario is None:
+            raise AttributeError(nome)
+        return getattr(usuario, nome)
+
+    def __str__(self):
+        return f'{self.nome} <{self.email}>'
 
 
 class CustomJWTAuthentication(JWTAuthentication):
     """Autenticação JWT customizada para usar o modelo Usuario"""
-    
-    def get_user(self, validated_token):
-        """Retorna o usuário baseado no token validado"""
+
+    def get_validated_token(self, raw_token):
+        """Valida pelo token_service (chaves com kid e cache de tokens verificados)"""
         try:
-            user_id = validated_token.get('id') or validated_token.get('user_id')
-            if user_id:
-                user = Usuario.objects.get(idusuario=user_id)
-                # Adicionar atributos necessários para compatibilidade
-                user.is_authenticated = True
-                return user
-        except (Usuario.DoesNotExist, KeyError):
-            pass
-        return AnonymousUser()
+            return token_service.verificar(raw_token)
+        except token_service.TokenInvalido as e:
+            raise InvalidToken(str(e))
 
+    def get_user(self, validated_token):
+        """Retorna o usuário a partir das claims do token validado (sem consultar o banco)"""
+        user_id = validated_token.get('id') or validated_token.get('user_id')
+        try:
+            return UsuarioToken(validated_token, user_id)
+        except (TypeError, ValueError):
+            return AnonymousUser()
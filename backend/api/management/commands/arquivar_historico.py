@@ -0,0 +1,51 @@
+"""
+Arquiva as partições antigas de produto_historico
+
+Cada mês anterior ao período retido é desanexado da tabela, exportado para
+<destino>/produto_historico_AAAA_MM.ndjson.gz e removido do banco.
+
+Uso:
+    python manage.py arquivar_historico --destino arquivos/historico [--reter-meses 12]
+                                        [--manter-tabela] [--simular]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import historico_particoes_service
+
+
+class Command(BaseCommand):
+    help = 'Exporta para NDJSON compactado e remove os meses antigos do histórico de produtos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destino', required=True, help='Pasta dos arquivos .ndjson.gz')
+        parser.add_argument('--reter-meses', type=int, default=historico_particoes_service.RETER_MESES_PADRAO,
+                            help='Meses mantidos no banco, contando o atual')
+        parser.add_argument('--manter-tabela', action='store_true',
+                            help='Apenas desanexa e exporta, sem remover a tabela')
+        parser.add_argument('--simular', action='store_true', help='Só lista as partições que seriam arquivadas')
+
+    def handle(self, *args, **options):
+        if options['reter_meses'] < 1:
+            raise CommandError('--reter-meses deve ser pelo menos 1')
+
+        particoes = historico_particoes_service.particoes_para_arquivar(options['reter_meses'])
+        if options['simular']:
+            for nome, _, anexada in particoes:
+                self.stdout.write(f'{nome}{"" if anexada else " (já desanexada)"}')
+            self.stdout.write(f'{len(particoes)} partição(ões) seriam arquivada(s)')
+            return
+
+        total = 0
+        for nome, _, anexada in particoes:
+            try:
+                caminho, linhas = historico_particoes_service.arquivar_particao(
+                    nome, anexada, options['destino'], remover=not options['manter_tabela'],
+                )
+            except (OSError, RuntimeError) as e:
+                raise CommandError(f'Erro ao arquivar {nome}: {e}')
+            total += linhas
+            self.stdout.write(f'🔄 {nome}: {linhas} registro(s) em {caminho}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(particoes)} partição(ões) arquivada(s), {total} registro(s)'
+        ))
@@ -0,0 +1,38 @@
+"""
+Recalcula o modelo de leitura do catálogo (catalogo_produto)
+
+As escritas da aplicação já mantêm a tabela atualizada; este comando serve
+para a carga inicial ou depois de alterações feitas direto no banco.
+
+Uso:
+    python manage.py atualizar_catalogo [--produtos 1 2 3] [--lote 1000]
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.services import catalogo_service
+from api.utils import catalogo_cache
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as linhas de catalogo_produto (todas ou dos produtos informados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--produtos', nargs='+', type=int, help='IDs dos produtos (padrão: todos)')
+        parser.add_argument('--lote', type=int, default=1000, help='Produtos por transação')
+
+    def handle(self, *args, **options):
+        produto_ids = options['produtos']
+        if not produto_ids:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT idproduto FROM produto ORDER BY idproduto')
+                produto_ids = [row[0] for row in cursor.fetchall()]
+
+        self.stdout.write(f'🔄 Atualizando {len(produto_ids)} produto(s)...')
+        lote = options['lote']
+        for inicio in range(0, len(produto_ids), lote):
+            with transaction.atomic():
+                catalogo_service.atualizar_modelo_leitura(produto_ids[inicio:inicio + lote])
+
+        catalogo_cache.invalidar()
+        self.stdout.write(self.style.SUCCESS('✅ Modelo de leitura do catálogo atualizado'))
@@ -0,0 +1,102 @@
+"""
+Benchmark da busca/filtros de produtos em um catálogo sintético
+
+Insere N produtos sintéticos dentro de uma transação, mede as consultas de
+listagem mais comuns e desfaz tudo ao final (nenhum dado é mantido).
+
+Uso:
+    python manage.py benchmark_busca [--produtos 100000] [--repeticoes 5]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+
+from api.services import catalogo_service
+
+
+CENARIOS = [
+    ('sem filtros', ''),
+    ('busca full-text', 'busca=camiseta algodao'),
+    ('busca com erro de digitação', 'busca=camizeta'),
+    ('categoria + em estoque', 'categoria={categoria}&em_estoque=1'),
+    ('faixa de preço por preço', 'preco_min=50&preco_max=80&ordenar=preco_asc'),
+    ('melhor avaliados', 'ordenar=avaliacao'),
+    ('busca + categoria + preço', 'busca=tenis&categoria={categoria}&preco_max=300'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Mede a listagem de produtos com busca e filtros em um catálogo sintético'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--produtos', type=int, default=100000, help='Quantidade de produtos sintéticos')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Execuções por cenário')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            categoria_id = self._gerar_catalogo(options['produtos'])
+
+            for nome, query in CENARIOS:
+                filtros = catalogo_service.filtros_da_requisicao(
+                    QueryDict(query.format(categoria=categoria_id))
+                )
+                tempos = []
+                for _ in range(options['repeticoes']):
+                    inicio = time.perf_counter()
+                    resultado, _ = catalogo_service.listar_produtos(filtros)
+                    tempos.append((time.perf_counter() - inicio) * 1000)
+                tempos.sort()
+                self.stdout.write(
+                    f'{nome:<32} {len(resultado):>7} linhas  '
+                    f'mediana {tempos[len(tempos) // 2]:8.1f} ms  mín {tempos[0]:8.1f} ms'
+                )
+
+            # Nada do catálogo sintético é gravado
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark concluído (dados sintéticos descartados)'))
+
+    def _gerar_catalogo(self, quantidade):
+        """Insere produtos/categorias sintéticos e atualiza as estatísticas"""
+        self.stdout.write(f'🔄 Gerando {quantidade} produtos sintéticos...')
+        inicio = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO categoria (nome, descricao)
+                VALUES ('benchmark-' || md5(random()::text), 'Categoria sintética')
+                RETURNING idcategoria
+            """)
+            categoria_id = cursor.fetchone()[0]
+
+            cursor.execute("""
+                INSERT INTO produto (nome, descricao, valor, estoque, media_avaliacao)
+                SELECT
+                    (ARRAY['Camiseta', 'Tênis', 'Calça', 'Boné', 'Mochila', 'Jaqueta'])[1 + (i %% 6)]
+                        || ' ' || (ARRAY['algodão', 'couro', 'jeans', 'esportivo', 'casual'])[1 + (i %% 5)]
+                        || ' ' || i,
+                    'Produto sintético número ' || i || ' feito em '
+                        || (ARRAY['algodao', 'couro', 'poliester', 'lona'])[1 + (i %% 4)]
+                        || ' para testes de desempenho da busca',
+                    round((10 + random() * 490)::numeric, 2),
+                    (random() * 50)::int,
+                    round((random() * 5)::numeric, 1)
+                FROM generate_series(1, %s) AS i
+            """, [quantidade])
+
+            cursor.execute("""
+                INSERT INTO produto_has_categoria (produto_idproduto, categoria_idcategoria)
+                SELECT idproduto, %s FROM produto WHERE idproduto %% 10 = 0
+                ON CONFLICT DO NOTHING
+            """, [categoria_id])
+
+            # As listagens leem o modelo de leitura
+            cursor.execute('SELECT atualizar_catalogo_produto(ARRAY(SELECT idproduto FROM produto))')
+
+            cursor.execute('ANALYZE produto')
+            cursor.execute('ANALYZE produto_has_categoria')
+            cursor.execute('ANALYZE catalogo_produto')
+
+        self.stdout.write(f'   pronto em {time.perf_counter() - inicio:.1f} s\n')
+        return categoria_id
@@ -0,0 +1,90 @@
+"""
+Benchmark da serialização das respostas do catálogo
+
+Compara ProdutoSerializer/CategoriaSerializer (DRF) com a serialização
+rápida de api/utils/serializacao.py em linhas sintéticas, em memória (não
+acessa o banco). Antes de medir, confere que os dois geram o mesmo JSON.
+
+Uso:
+    python manage.py benchmark_serializacao [--linhas 1000,10000,100000] [--repeticoes 3]
+"""
+import datetime
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import Categoria, Produto
+from api.serializers import CategoriaSerializer, ProdutoSerializer
+from api.utils import serializacao
+
+
+def _gerar_produtos(quantidade):
+    linhas = [
+        (i, f'Produto {i}', f'Descrição do produto sintético {i} ' * 5,
+         Decimal(10 + i % 490) + Decimal(i % 100) / 100, i % 50, Decimal(i % 50) / 10)
+        for i in range(1, quantidade + 1)
+    ]
+    instancias = [Produto(**dict(zip(serializacao.COLUNAS_PRODUTO, linha))) for linha in linhas]
+    return linhas, instancias
+
+
+def _gerar_categorias(quantidade):
+    inicio = timezone.now()
+    linhas = [
+        (i, f'Categoria {i}', None if i % 3 == 0 else f'Descrição {i}', '📦',
+         inicio - datetime.timedelta(minutes=i))
+        for i in range(1, quantidade + 1)
+    ]
+    instancias = [Categoria(**dict(zip(serializacao.COLUNAS_CATEGORIA, linha))) for linha in linhas]
+    return linhas, instancias
+
+
+CENARIOS = [
+    ('produtos', _gerar_produtos, ProdutoSerializer, serializacao.serializar_produto),
+    ('categorias', _gerar_categorias, CategoriaSerializer, serializacao.serializar_categoria),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compara os serializers do DRF com a serialização rápida do catálogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', default='1000,10000,100000', help='Quantidades de linhas, separadas por vírgula')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Execuções por cenário')
+
+    def handle(self, *args, **options):
+        try:
+            quantidades = [int(valor) for valor in options['linhas'].split(',') if valor]
+        except ValueError:
+            raise CommandError('--linhas deve ser uma lista de números')
+
+        for nome, gerar, serializer_class, serializar in CENARIOS:
+            self.stdout.write(f'🔄 {nome}')
+            for quantidade in quantidades:
+                linhas, instancias = gerar(quantidade)
+
+                drf = list(serializer_class(instancias[:100], many=True).data)
+                rapido = [serializar(linha) for linha in linhas[:100]]
+                if [dict(item) for item in drf] != rapido:
+                    raise CommandError(f'A serialização rápida de {nome} difere do DRF')
+
+                tempo_drf = self._medir(lambda: serializer_class(instancias, many=True).data, options['repeticoes'])
+                tempo_rapido = self._medir(lambda: [serializar(linha) for linha in linhas], options['repeticoes'])
+                self.stdout.write(
+                    f'   {quantidade:>7} linhas  DRF {tempo_drf:9.1f} ms  '
+                    f'rápido {tempo_rapido:8.1f} ms  ({tempo_drf / tempo_rapido:5.1f}x)'
+                )
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark concluído'))
+
+    def _medir(self, funcao, repeticoes):
+        """Mediana do tempo de execução, em ms"""
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+        return tempos[len(tempos) // 2]
@@ -0,0 +1,61 @@
+"""
+Benchmark da verificação de tokens
+
+Emite tokens sintéticos e mede verificações por segundo com e sem o cache
+de tokens verificados do token_service (não acessa o banco). Os clientes
+repetem seus tokens, como um front-end que envia o mesmo token a cada
+requisição.
+
+Uso:
+    python manage.py benchmark_token [--tokens 1,100,10000] [--verificacoes 100000]
+"""
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import token_service
+
+
+class Command(BaseCommand):
+    help = 'Mede a vazão da verificação de tokens com e sem o cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', default='1,100,10000', help='Quantidades de clientes (tokens distintos)')
+        parser.add_argument('--verificacoes', type=int, default=100000, help='Verificações por cenário')
+
+    def handle(self, *args, **options):
+        try:
+            quantidades = [int(valor) for valor in options['tokens'].split(',') if valor]
+        except ValueError:
+            raise CommandError('--tokens deve ser uma lista de números')
+        verificacoes = options['verificacoes']
+
+        for quantidade in quantidades:
+            tokens = [
+                token_service.emitir_para_usuario(SimpleNamespace(
+                    idusuario=i, email=f'cliente{i}@exemplo.com', nome=f'Cliente {i}', admin=False,
+                ))
+                for i in range(1, quantidade + 1)
+            ]
+            sequencia = [tokens[i % quantidade] for i in range(verificacoes)]
+            if token_service.verificar(tokens[0]) != token_service.verificar(tokens[0], usar_cache=False):
+                raise CommandError('O cache retornou claims diferentes da verificação completa')
+
+            sem_cache = self._medir(lambda token: token_service.verificar(token, usar_cache=False), sequencia)
+            token_service.limpar_cache()
+            com_cache = self._medir(token_service.verificar, sequencia)
+            self.stdout.write(
+                f'   {quantidade:>6} token(s)  sem cache {sem_cache:10,.0f}/s  '
+                f'com cache {com_cache:10,.0f}/s  ({com_cache / sem_cache:5.1f}x)'
+            )
+
+        self.stdout.write(str(token_service.estatisticas()))
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark concluído'))
+
+    def _medir(self, verificar, sequencia):
+        """Verificações por segundo"""
+        inicio = time.perf_counter()
+        for token in sequencia:
+            verificar(token)
+        return len(sequencia) / (time.perf_counter() - inicio)
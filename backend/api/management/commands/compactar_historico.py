@@ -0,0 +1,57 @@
+"""
+Compacta as edições antigas de produto_historico
+
+Registros de edição gravados antes do histórico compacto guardam o
+produto inteiro em dados_anteriores/dados_novos. Este comando reduz cada
+par aos campos que mudaram (o mesmo formato das edições novas), em lotes
+de IDs, cada um em sua transação.
+
+Uso:
+    python manage.py compactar_historico [--lote 5000]
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+
+class Command(BaseCommand):
+    help = 'Reduz as edições do histórico de produtos aos campos alterados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help='IDs do histórico por transação')
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(idproduto_historico), 0) FROM produto_historico")
+            ultimo_id = cursor.fetchone()[0]
+
+        compactados = 0
+        for inicio in range(0, ultimo_id, options['lote']):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE produto_historico h
+                    SET dados_anteriores = (
+                            SELECT jsonb_object_agg(a.key, a.value)
+                            FROM jsonb_each(h.dados_anteriores::jsonb) a
+                            WHERE h.dados_novos::jsonb ? a.key
+                              AND h.dados_novos::jsonb -> a.key IS DISTINCT FROM a.value
+                        ),
+                        dados_novos = (
+                            SELECT jsonb_object_agg(n.key, n.value)
+                            FROM jsonb_each(h.dados_novos::jsonb) n
+                            WHERE h.dados_anteriores::jsonb -> n.key IS DISTINCT FROM n.value
+                        )
+                    WHERE h.acao = 'editado'
+                      AND h.idproduto_historico > %s AND h.idproduto_historico <= %s
+                      AND jsonb_typeof(h.dados_anteriores::jsonb) = 'object'
+                      AND jsonb_typeof(h.dados_novos::jsonb) = 'object'
+                      -- Já compactado: toda chave de dados_anteriores também mudou
+                      AND EXISTS (
+                          SELECT 1 FROM jsonb_each(h.dados_anteriores::jsonb) a
+                          WHERE h.dados_novos::jsonb -> a.key IS NOT DISTINCT FROM a.value
+                             OR NOT h.dados_novos::jsonb ? a.key
+                      )
+                """, [inicio, inicio + options['lote']])
+                compactados += cursor.rowcount
+            self.stdout.write(f'🔄 {compactados} registro(s) compactado(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {compactados} registro(s) de edição compactado(s)'))
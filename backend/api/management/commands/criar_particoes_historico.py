@@ -0,0 +1,30 @@
+"""
+Cria antecipadamente as partições mensais de produto_historico
+
+Deve rodar periodicamente (ex.: cron mensal). Linhas de um mês sem
+partição caem em produto_historico_padrao e são movidas quando a
+partição do mês é criada.
+
+Uso:
+    python manage.py criar_particoes_historico [--meses 3]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import historico_particoes_service
+
+
+class Command(BaseCommand):
+    help = 'Cria as partições de produto_historico do mês atual e dos próximos meses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=historico_particoes_service.MESES_ADIANTE_PADRAO,
+                            help='Meses à frente do atual')
+
+    def handle(self, *args, **options):
+        if options['meses'] < 0:
+            raise CommandError('--meses não pode ser negativo')
+
+        criadas = historico_particoes_service.criar_particoes(options['meses'])
+        for nome in criadas:
+            self.stdout.write(f'🔄 {nome} criada')
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(criadas)} partição(ões) criada(s)'))
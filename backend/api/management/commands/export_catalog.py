@@ -0,0 +1,60 @@
+"""
+Exporta o catálogo de produtos em NDJSON ou CSV
+
+A leitura usa um cursor do lado do servidor, então a memória fica constante
+independentemente da quantidade de produtos.
+
+Uso:
+    python manage.py export_catalog [--formato ndjson|csv] [--saida catalogo.ndjson]
+                                    [--incluir categorias,destaque] [--itersize 2000]
+                                    [--base-url http://localhost:8000]
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from api.services import exportacao_service
+
+
+class Command(BaseCommand):
+    help = 'Exporta o catálogo de produtos em NDJSON ou CSV (streaming)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--saida', help='Arquivo de saída (padrão: stdout)')
+        parser.add_argument('--incluir', default='', help='Dados extras: categorias,destaque')
+        parser.add_argument('--itersize', type=int, default=exportacao_service.ITERSIZE_PADRAO,
+                            help='Linhas lidas do banco por lote')
+        parser.add_argument('--base-url', default='http://localhost:8000',
+                            help='URL base usada nos links das imagens')
+
+    def handle(self, *args, **options):
+        try:
+            inclusoes = exportacao_service.inclusoes_da_requisicao(options['incluir'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        base_url = options['base_url'].rstrip('/')
+        produtos = exportacao_service.iterar_produtos(
+            lambda imagem_id: base_url + reverse('api:obter_imagem', args=[imagem_id]),
+            inclusoes,
+            options['itersize'],
+        )
+        if options['formato'] == 'csv':
+            linhas = exportacao_service.linhas_csv(produtos)
+        else:
+            linhas = exportacao_service.linhas_ndjson(produtos)
+
+        saida = open(options['saida'], 'w', encoding='utf-8', newline='') if options['saida'] else sys.stdout
+        total = -1 if options['formato'] == 'csv' else 0
+        try:
+            for linha in linhas:
+                saida.write(linha)
+                total += 1
+        finally:
+            if saida is not sys.stdout:
+                saida.close()
+
+        if options['saida']:
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} produto(s) exportado(s) para {options["saida"]}'))
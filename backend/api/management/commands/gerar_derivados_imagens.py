@@ -0,0 +1,53 @@
+"""
+Gera os derivados (thumb/card/full em WebP e JPEG) das imagens já cadastradas
+
+Uso:
+    python manage.py gerar_derivados_imagens [--todas] [--lote 100]
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.services import imagem_service
+
+
+class Command(BaseCommand):
+    help = 'Gera os derivados das imagens de produtos que ainda não foram processadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todas', action='store_true', help='Reprocessa todas as imagens')
+        parser.add_argument('--lote', type=int, default=100, help='Quantidade de IDs lidos por vez')
+
+    def handle(self, *args, **options):
+        ultimo_id = 0
+        processadas = 0
+        erros = 0
+
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT pi.idproduto_imagem
+                    FROM produto_imagem pi
+                    WHERE pi.idproduto_imagem > %s
+                      AND (%s OR NOT EXISTS (
+                          SELECT 1 FROM produto_imagem_derivado d
+                          WHERE d.produto_imagem_idproduto_imagem = pi.idproduto_imagem
+                      ))
+                    ORDER BY pi.idproduto_imagem
+                    LIMIT %s
+                """, [ultimo_id, options['todas'], options['lote']])
+                imagem_ids = [row[0] for row in cursor.fetchall()]
+
+            if not imagem_ids:
+                break
+
+            for imagem_id in imagem_ids:
+                try:
+                    imagem_service.processar_imagem(imagem_id)
+                    processadas += 1
+                except Exception as e:
+                    erros += 1
+                    self.stderr.write(f'❌ Imagem {imagem_id}: {e}')
+            ultimo_id = imagem_ids[-1]
+            self.stdout.write(f'🔄 {processadas} imagem(ns) processada(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Concluído: {processadas} processada(s), {erros} erro(s)'))
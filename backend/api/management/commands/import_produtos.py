@@ -0,0 +1,62 @@
+"""
+Importa produtos em massa a partir de um arquivo CSV ou JSONL
+
+As linhas são carregadas com COPY em uma tabela temporária e incorporadas
+ao catálogo em SQL; as imagens são processadas em um pool de processos.
+Linhas com erro são listadas no final e não interrompem a importação.
+
+Uso:
+    python manage.py import_produtos catalogo.csv --usuario admin@loja.com --imagens fotos/ [--formato csv|jsonl]
+                                     [--lote 1000] [--workers 4]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Usuario
+from api.services import importacao_service
+
+
+class Command(BaseCommand):
+    help = 'Importa produtos de um arquivo CSV/JSONL com as imagens de uma pasta ou arquivo .zip'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Arquivo CSV ou JSONL com os produtos')
+        parser.add_argument('--usuario', required=True, help='Email do administrador registrado no histórico')
+        parser.add_argument('--imagens', help='Pasta ou arquivo .zip com as imagens referenciadas')
+        parser.add_argument('--formato', choices=importacao_service.FORMATOS, help='Padrão: deduzido da extensão')
+        parser.add_argument('--lote', type=int, default=importacao_service.LOTE_PADRAO, help='Linhas por transação')
+        parser.add_argument('--workers', type=int, help='Processos para as imagens (padrão: número de CPUs)')
+
+    def handle(self, *args, **options):
+        usuario = Usuario.objects.filter(email=options['usuario']).first()
+        if usuario is None:
+            raise CommandError(f'Usuário {options["usuario"]} não encontrado')
+
+        try:
+            formato = importacao_service.formato_do_arquivo(options['arquivo'], options['formato'])
+            with open(options['arquivo'], 'rb') as arquivo, \
+                    importacao_service.abrir_imagens(options['imagens']) as raiz_imagens:
+                resultado = importacao_service.importar(
+                    importacao_service.ler_linhas(arquivo, formato),
+                    raiz_imagens,
+                    usuario_id=usuario.idusuario,
+                    observacao=f'Produto importado por {usuario.nome} (linha de comando)',
+                    lote=options['lote'],
+                    workers=options['workers'],
+                    ao_concluir_lote=self._progresso,
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for erro in resultado['erros']:
+            self.stderr.write(f'❌ Linha {erro["linha"]}: {erro["erro"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado["importados"]} de {resultado["linhas"]} linha(s) importada(s) '
+            f'em {resultado["duracao_s"]:.1f}s ({resultado["linhas_por_segundo"] or 0:.0f} linhas/s), '
+            f'{len(resultado["erros"])} erro(s)'
+        ))
+
+    def _progresso(self, resultado):
+        self.stdout.write(
+            f'🔄 {resultado["linhas"]} linha(s), {resultado["importados"]} importada(s), '
+            f'{resultado["linhas_por_segundo"] or 0:.0f} linhas/s'
+        )
@@ -0,0 +1,142 @@
+"""
+Move o conteúdo das imagens (originais e derivados) do BYTEA para o
+armazenamento de imagens, em lotes
+
+Cada conteúdo é lido do banco um por vez (memória limitada a uma imagem),
+gravado no armazenamento e, no fim do lote, a coluna imagem é zerada em
+uma transação. Pode ser interrompido e executado de novo.
+
+Depois de migrar, rode VACUUM FULL produto_imagem, produto_imagem_derivado
+para devolver o espaço ao sistema.
+
+Uso:
+    python manage.py migrar_imagens_armazenamento [--lote 50] [--limpar-orfaos]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.utils.armazenamento import obter_armazenamento
+from api.utils.imagem_utils import detectar_mime, para_bytes
+
+
+# Arquivos mais novos que isso podem pertencer a um upload ainda não confirmado
+IDADE_MINIMA_ORFAO = 3600
+
+
+class Command(BaseCommand):
+    help = 'Move as imagens gravadas no banco (BYTEA) para o armazenamento de imagens'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50, help='Imagens por transação')
+        parser.add_argument('--limpar-orfaos', action='store_true',
+                            help='Remove do armazenamento os arquivos que nenhuma linha referencia')
+
+    def handle(self, *args, **options):
+        armazenamento = obter_armazenamento()
+        lote = options['lote']
+
+        originais = self._migrar_originais(armazenamento, lote)
+        self.stdout.write(self.style.SUCCESS(f'✅ {originais} imagem(ns) original(is) migrada(s)'))
+        derivados = self._migrar_derivados(armazenamento, lote)
+        self.stdout.write(self.style.SUCCESS(f'✅ {derivados} derivado(s) migrado(s)'))
+
+        if options['limpar_orfaos']:
+            removidos = self._limpar_orfaos(armazenamento)
+            self.stdout.write(self.style.SUCCESS(f'✅ {removidos} arquivo(s) órfão(s) removido(s)'))
+
+    def _migrar_originais(self, armazenamento, lote):
+        ultimo_id = 0
+        total = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT idproduto_imagem FROM produto_imagem
+                    WHERE imagem IS NOT NULL AND idproduto_imagem > %s
+                    ORDER BY idproduto_imagem
+                    LIMIT %s
+                """, [ultimo_id, lote])
+                imagem_ids = [row[0] for row in cursor.fetchall()]
+            if not imagem_ids:
+                return total
+
+            atualizacoes = []
+            with connection.cursor() as cursor:
+                for imagem_id in imagem_ids:
+                    cursor.execute("SELECT imagem FROM produto_imagem WHERE idproduto_imagem = %s", [imagem_id])
+                    row = cursor.fetchone()
+                    if not row or row[0] is None:
+                        continue
+                    conteudo = para_bytes(row[0])
+                    hash_hex = armazenamento.salvar_bytes(conteudo)
+                    atualizacoes.append([detectar_mime(conteudo[:16]), hash_hex, len(conteudo), imagem_id])
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany("""
+                    UPDATE produto_imagem
+                    SET imagem = NULL, mime_type = COALESCE(mime_type, %s), hash_sha256 = %s, tamanho = %s
+                    WHERE idproduto_imagem = %s
+                """, atualizacoes)
+
+            total += len(atualizacoes)
+            ultimo_id = imagem_ids[-1]
+            self.stdout.write(f'🔄 {total} imagem(ns) original(is)...')
+
+    def _migrar_derivados(self, armazenamento, lote):
+        ultimo_id = 0
+        total = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT DISTINCT produto_imagem_idproduto_imagem FROM produto_imagem_derivado
+                    WHERE imagem IS NOT NULL AND produto_imagem_idproduto_imagem > %s
+                    ORDER BY produto_imagem_idproduto_imagem
+                    LIMIT %s
+                """, [ultimo_id, lote])
+                imagem_ids = [row[0] for row in cursor.fetchall()]
+            if not imagem_ids:
+                return total
+
+            atualizacoes = []
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT produto_imagem_idproduto_imagem, variante, formato FROM produto_imagem_derivado
+                    WHERE imagem IS NOT NULL AND produto_imagem_idproduto_imagem = ANY(%s)
+                """, [imagem_ids])
+                for chave in cursor.fetchall():
+                    cursor.execute("""
+                        SELECT imagem FROM produto_imagem_derivado
+                        WHERE produto_imagem_idproduto_imagem = %s AND variante = %s AND formato = %s
+                    """, list(chave))
+                    conteudo = para_bytes(cursor.fetchone()[0])
+                    hash_hex = armazenamento.salvar_bytes(conteudo)
+                    atualizacoes.append([hash_hex, len(conteudo), *chave])
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany("""
+                    UPDATE produto_imagem_derivado
+                    SET imagem = NULL, hash_sha256 = %s, tamanho = %s
+                    WHERE produto_imagem_idproduto_imagem = %s AND variante = %s AND formato = %s
+                """, atualizacoes)
+
+            total += len(atualizacoes)
+            ultimo_id = imagem_ids[-1]
+            self.stdout.write(f'🔄 {total} derivado(s)...')
+
+    def _limpar_orfaos(self, armazenamento):
+        """Imagens removidas deixam o arquivo para trás (ele pode ser compartilhado)"""
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT hash_sha256 FROM produto_imagem WHERE hash_sha256 IS NOT NULL
+                UNION
+                SELECT hash_sha256 FROM produto_imagem_derivado
+            """)
+            referenciados = {row[0].strip() for row in cursor.fetchall()}
+
+        removidos = 0
+        for hash_hex in armazenamento.listar(anteriores_a=time.time() - IDADE_MINIMA_ORFAO):
+            if hash_hex not in referenciados:
+                armazenamento.remover(hash_hex)
+                removidos += 1
+        return removidos
@@ -1,6 +1,6 @@
 from rest_framework.exceptions import AuthenticationFailed
 
-from api.utils import jwt_utils
+from api.services import token_service
 
 
 def get_user_from_authorization_header(authorization: str | None):
@@ -13,8 +13,8 @@ def get_user_from_authorization_header(authorization: str | None):
 
     token = parts[1]
     try:
-        decoded = jwt_utils.verify_token(token)
-    except Exception as exc:  # jwt errors
+        decoded = token_service.verificar(token)
+    except token_service.TokenInvalido as exc:
         raise AuthenticationFailed(str(exc))
 
     return decoded
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import hashlib
 import re
 
@@ -42,6 +43,18 @@ class Usuario(models.Model):
             self.data_admin = timezone.now()
         
         super().save(*args, **kwargs)
+        self._invalidar_cache()
+
+    def delete(self, *args, **kwargs):
+        usuario_id = self.idusuario
+        resultado = super().delete(*args, **kwargs)
+        self._invalidar_cache(usuario_id)
+        return resultado
+
+    def _invalidar_cache(self, usuario_id=None):
+        """Descarta o usuário do cache da autenticação (api/utils/usuario_cache.py)"""
+        from .utils import usuario_cache
+        usuario_cache.invalidar(usuario_id or self.idusuario)
 
     @staticmethod
     def hash_value(value):
@@ -109,7 +122,8 @@ class ProdutoHistorico(models.Model):
     produto_idproduto = models.IntegerField()
     usuario_idusuario = models.IntegerField()
     acao = models.CharField(max_length=20)  # 'criado', 'editado', 'deletado'
-    data_acao = models.DateTimeField(auto_now_add=True)
+    # Momento da ação (não o da gravação, que é assíncrona em lotes)
+    data_acao = models.DateTimeField(default=timezone.now)
     dados_anteriores = models.JSONField(null=True, blank=True)
     dados_novos = models.JSONField(null=True, blank=True)
     observacao = models.TextField(null=True, blank=True)
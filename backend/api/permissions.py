@@ -0,0 +1,38 @@
+"""
+Permissões da API
+
+O token é decodificado uma vez por requisição, pela autenticação do DRF
+(api/jwt_auth.py), e request.user guarda o usuário resultante. A linha de
+Usuario é lida no máximo uma vez por requisição (e em geral vem do cache
+de usuários), na primeira vez que uma permissão ou a view precisa dela.
+"""
+from rest_framework.permissions import BasePermission
+
+
+def principal_da_requisicao(request):
+    """Usuário autenticado da requisição (UsuarioToken) ou None"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+class IsAdminUsuario(BasePermission):
+    """
+    Apenas usuários autenticados com admin.
+
+    Use IsAdminUsuario.para('editar produtos') para a mensagem de acesso
+    negado citar a ação.
+    """
+
+    message = 'Acesso negado. Apenas administradores podem realizar esta ação.'
+
+    @classmethod
+    def para(cls, acao):
+        return type(cls.__name__, (cls,), {
+            'message': f'Acesso negado. Apenas administradores podem {acao}.',
+        })
+
+    def has_permission(self, request, view):
+        user = principal_da_requisicao(request)
+        return bool(user is not None and user.admin)
@@ -1,5 +1,5 @@
-from rest_framework_simplejwt.tokens import RefreshToken
 from .models import Usuario
+from .services import token_service
 
 
 class AuthService:
@@ -7,16 +7,8 @@ class AuthService:
 
     @staticmethod
     def generate_token(user):
-        """Gera token JWT para o usuário"""
-        refresh = RefreshToken()
-        # Usar 'id' como chave (compatível com o backend Node.js)
-        refresh['id'] = user.idusuario
-        refresh['email'] = user.email
-        refresh['nome'] = user.nome
-        refresh['admin'] = user.admin
-        
-        # Retornar apenas o access token (compatível com frontend)
-        return str(refresh.access_token)
+        """Gera token JWT para o usuário (claims 'id', 'email', 'nome', 'admin')"""
+        return token_service.emitir_para_usuario(user)
 
     @staticmethod
     def register(user_data):
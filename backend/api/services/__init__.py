@@ -1,9 +1,9 @@
 # Services module
+from . import token_service
 from . import auth_service
 
 # Importar AuthService do arquivo services.py antigo para compatibilidade
 # Copiar a classe AuthService diretamente aqui para evitar problemas de import
-from rest_framework_simplejwt.tokens import RefreshToken
 from api.models import Usuario
 
 
@@ -12,16 +12,8 @@ class AuthService:
 
     @staticmethod
     def generate_token(user):
-        """Gera token JWT para o usuário"""
-        refresh = RefreshToken()
-        # Usar 'id' como chave (compatível com o backend Node.js)
-        refresh['id'] = user.idusuario
-        refresh['email'] = user.email
-        refresh['nome'] = user.nome
-        refresh['admin'] = user.admin
-        
-        # Retornar apenas o access token (compatível com frontend)
-        return str(refresh.access_token)
+        """Gera token JWT para o usuário (claims 'id', 'email', 'nome', 'admin')"""
+        return token_service.emitir_para_usuario(user)
 
     @staticmethod
     def register(user_data):
@@ -93,5 +85,5 @@ class AuthService:
         }
 
 
-__all__ = ['auth_service', 'AuthService']
+__all__ = ['auth_service', 'token_service', 'AuthService']
 
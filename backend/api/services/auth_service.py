@@ -1,6 +1,6 @@
 from api.models import Usuario
 from api.utils.hash_utils import md5_hash, md5_hash_numeric_only
-from api.utils.jwt_utils import generate_token
+from api.services import token_service
 
 
 def register_user(user_data):
@@ -66,13 +66,7 @@ def register_user(user_data):
     user_dict = user.to_dict(exclude_sensitive=True)
     
     # Gerar token JWT (compatível com o Node)
-    token_payload = {
-        "id": user.idusuario,
-        "email": user.email,
-        "nome": user.nome,
-        "admin": user.admin,
-    }
-    token = generate_token(token_payload)
+    token = token_service.emitir_para_usuario(user)
 
     return {
         "user": user_dict,
@@ -103,13 +97,7 @@ def login_user(email, senha):
     user_dict = user.to_dict(exclude_sensitive=True)
     
     # Gerar token JWT (compatível com o Node)
-    token_payload = {
-        "id": user.idusuario,
-        "email": user.email,
-        "nome": user.nome,
-        "admin": user.admin,
-    }
-    token = generate_token(token_payload)
+    token = token_service.emitir_para_usuario(user)
 
     return {
         "user": user_dict,
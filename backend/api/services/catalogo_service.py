@@ -0,0 +1,494 @@
+"""
+Serviço de leitura do catálogo de produtos
+
+Concentra as consultas usadas pelas listagens públicas para que o número de
+round-trips ao PostgreSQL não cresça com a quantidade de produtos. As
+listagens leem o modelo de leitura catalogo_produto
+(postgres_docker/init/11-catalogo-produto.sql), mantido por atualizar_modelo_leitura.
+"""
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from api.utils import catalogo_cache, paginacao as paginacao_utils, serializacao
+from api.utils.serializacao import decimal_para_str
+
+
+# Expressão do índice GIN de full-text (postgres_docker/init/11-catalogo-produto.sql)
+_TSVECTOR = "to_tsvector('portuguese', p.nome || ' ' || p.descricao)"
+_TSQUERY = "websearch_to_tsquery('portuguese', %s)"
+
+# Colunas INTEGER (estoque, IDs): valores acima disso não chegam ao banco
+INTEIRO_MAXIMO = 2 ** 31 - 1
+
+# Destaque dentro do período (o modelo de leitura guarda o período, não o estado)
+_DESTAQUE_VIGENTE = (
+    "(p.destaque_ativo AND p.destaque_inicio <= NOW()"
+    " AND (p.destaque_fim IS NULL OR p.destaque_fim >= NOW()))"
+)
+
+# Campos da listagem e suas colunas em catalogo_produto. Só os campos
+# pedidos entram no SELECT.
+CAMPOS_PRODUTO = {
+    'idproduto': 'p.idproduto',
+    'nome': 'p.nome',
+    'descricao': 'p.descricao',
+    'valor': 'p.valor',
+    'valor_efetivo': f'CASE WHEN {_DESTAQUE_VIGENTE} THEN p.destaque_valor ELSE p.valor END',
+    'em_destaque': _DESTAQUE_VIGENTE,
+    'estoque': 'p.estoque',
+    'media_avaliacao': 'p.media_avaliacao',
+    'imagem_principal_id': 'p.imagem_principal_id',
+    'imagem_placeholder': 'p.imagem_placeholder',
+    'categorias_ids': 'p.categorias_ids',
+}
+
+# Conjuntos prontos aceitos em ?fields= (card é o padrão da listagem)
+PROJECOES = {
+    'card': ('idproduto', 'nome', 'valor', 'imagem_principal', 'imagem_placeholder'),
+    'completo': tuple(CAMPOS_PRODUTO) + ('imagem_principal',),
+}
+
+_CONVERSORES = {
+    'valor': decimal_para_str,
+    'valor_efetivo': decimal_para_str,
+    'media_avaliacao': decimal_para_str,
+    'categorias_ids': list,
+}
+
+# Ordenações aceitas em ?ordenar=: (expressão, direção, campo da linha).
+# idproduto desempata, mantém a ordem estável e fecha a chave do cursor.
+ORDENACOES = {
+    'padrao': (('p.idproduto', 'ASC', 'idproduto'),),
+    'preco_asc': (('p.valor', 'ASC', 'valor'), ('p.idproduto', 'ASC', 'idproduto')),
+    'preco_desc': (('p.valor', 'DESC', 'valor'), ('p.idproduto', 'DESC', 'idproduto')),
+    'avaliacao': (('p.media_avaliacao', 'DESC', 'media_avaliacao'), ('p.idproduto', 'DESC', 'idproduto')),
+    'recentes': (('p.idproduto', 'DESC', 'idproduto'),),
+    'relevancia': (('r.relevancia', 'DESC', 'relevancia'), ('p.idproduto', 'ASC', 'idproduto')),
+}
+
+
+def atualizar_modelo_leitura(produto_ids):
+    """
+    Recalcula as linhas de catalogo_produto dos produtos informados.
+
+    Deve ser chamada por toda escrita que altera produto, imagens, categorias
+    ou destaque de um produto (na mesma transação da escrita).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT atualizar_catalogo_produto(%s::integer[])', [list(produto_ids)])
+
+
+def _para_decimal(valor, campo):
+    try:
+        numero = Decimal(valor)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f'O parâmetro {campo} deve ser um número válido')
+    if not numero.is_finite():
+        raise ValueError(f'O parâmetro {campo} deve ser um número válido')
+    if numero < 0:
+        raise ValueError(f'O parâmetro {campo} não pode ser negativo')
+    return numero
+
+
+def filtros_da_requisicao(query_params):
+    """
+    Converte os parâmetros de consulta da listagem em filtros.
+
+    Parâmetros aceitos: busca, categoria (um ou mais IDs), preco_min,
+    preco_max, em_estoque e ordenar. Levanta ValueError se algum for inválido.
+    """
+    filtros = {}
+
+    busca = (query_params.get('busca') or '').strip()
+    if busca:
+        filtros['busca'] = busca
+
+    categorias = [valor for item in query_params.getlist('categoria') for valor in item.split(',') if valor]
+    if categorias:
+        try:
+            filtros['categorias'] = [int(categoria) for categoria in categorias]
+        except ValueError:
+            raise ValueError('Os IDs das categorias devem ser números válidos')
+        if any(not 0 < categoria <= INTEIRO_MAXIMO for categoria in filtros['categorias']):
+            raise ValueError('Os IDs das categorias devem ser números válidos')
+
+    if query_params.get('preco_min'):
+        filtros['preco_min'] = _para_decimal(query_params.get('preco_min'), 'preco_min')
+    if query_params.get('preco_max'):
+        filtros['preco_max'] = _para_decimal(query_params.get('preco_max'), 'preco_max')
+    if 'preco_min' in filtros and 'preco_max' in filtros and filtros['preco_min'] > filtros['preco_max']:
+        raise ValueError('O preco_min não pode ser maior que o preco_max')
+
+    if (query_params.get('em_estoque') or '').lower() in ('1', 'true'):
+        filtros['em_estoque'] = True
+
+    ordenar = query_params.get('ordenar') or ('relevancia' if busca else None)
+    if ordenar:
+        if ordenar not in ORDENACOES or ordenar == 'padrao':
+            opcoes = ', '.join(chave for chave in ORDENACOES if chave != 'padrao')
+            raise ValueError(f'Ordenação inválida. Use: {opcoes}')
+        if ordenar == 'relevancia' and not busca:
+            raise ValueError('A ordenação por relevância exige o parâmetro busca')
+        filtros['ordenar'] = ordenar
+
+    return filtros
+
+
+def campos_da_requisicao(valor, padrao='card'):
+    """
+    Converte ?fields= em uma tupla de campos (ValueError se inválido).
+
+    Aceita nomes de campos e de projeções (card, completo) separados por
+    vírgula, ex.: fields=card,descricao. imagem_principal (URL) traz junto
+    imagem_principal_id, do qual é derivada.
+    """
+    itens = [item.strip() for item in (valor or padrao).split(',') if item.strip()]
+    campos = set()
+    for item in itens:
+        if item in PROJECOES:
+            campos.update(PROJECOES[item])
+        elif item in CAMPOS_PRODUTO or item == 'imagem_principal':
+            campos.add(item)
+        else:
+            opcoes = ', '.join(list(PROJECOES) + list(PROJECOES['completo']))
+            raise ValueError(f'Campo inválido em fields: {item}. Use: {opcoes}')
+    if 'imagem_principal' in campos:
+        campos.add('imagem_principal_id')
+    return tuple(campo for campo in PROJECOES['completo'] if campo in campos)
+
+
+def _montar_filtros(filtros):
+    """Monta a cláusula WHERE (e a expressão de relevância) a partir dos filtros"""
+    condicoes = []
+    parametros = []
+    relevancia = '0::double precision'
+    relevancia_parametros = []
+
+    if filtros.get('busca'):
+        # Full-text pelo índice GIN; trigramas no nome cobrem erros de digitação
+        condicoes.append(f'({_TSVECTOR} @@ {_TSQUERY} OR p.nome %% %s)')
+        parametros += [filtros['busca'], filtros['busca']]
+        # ts_rank/similarity são real: em double precision o valor ordenado é
+        # o mesmo que volta do cursor (float do Python), e os empates batem
+        relevancia = f'(ts_rank({_TSVECTOR}, {_TSQUERY}) + similarity(p.nome, %s))::double precision'
+        relevancia_parametros = [filtros['busca'], filtros['busca']]
+
+    if filtros.get('categorias'):
+        # Índice GIN em catalogo_produto.categorias_ids
+        condicoes.append('p.categorias_ids && %s::integer[]')
+        parametros.append(filtros['categorias'])
+
+    if 'preco_min' in filtros:
+        condicoes.append('p.valor >= %s')
+        parametros.append(filtros['preco_min'])
+    if 'preco_max' in filtros:
+        condicoes.append('p.valor <= %s')
+        parametros.append(filtros['preco_max'])
+
+    if filtros.get('em_estoque'):
+        condicoes.append('p.estoque > 0')
+
+    where = ('WHERE ' + ' AND '.join(condicoes)) if condicoes else ''
+    return where, parametros, relevancia, relevancia_parametros
+
+
+def listar_produtos(filtros=None, limite=None, cursor=None, campos=PROJECOES['completo']):
+    """
+    Lista os produtos com o ID da imagem principal (ordem = 1) e os IDs das categorias.
+
+    Tudo é resolvido em uma única varredura de catalogo_produto, que já traz
+    a imagem principal, as categorias e o destaque de cada produto.
+    Busca, filtros e ordenação (ver filtros_da_requisicao) são aplicados no banco.
+
+    `campos` (ver campos_da_requisicao) limita as colunas lidas: descricao só
+    entra na consulta quando pedida.
+
+    Com `limite`, pagina por keyset a partir de `cursor`. Retorna
+    (produtos, proximo_cursor); proximo_cursor é None na última página.
+    """
+    filtros = filtros or {}
+    where, parametros, relevancia, relevancia_parametros = _montar_filtros(filtros)
+
+    chave_ordenacao = filtros.get('ordenar', 'padrao')
+    colunas = ORDENACOES[chave_ordenacao]
+    order_by = ', '.join(f'{expressao} {direcao}' for expressao, direcao, _ in colunas)
+
+    paginacao = ''
+    paginacao_parametros = []
+    if limite:
+        if cursor:
+            valores = paginacao_utils.decodificar_cursor(cursor, chave_ordenacao)
+            if len(valores) != len(colunas):
+                raise ValueError('Cursor inválido')
+            condicao, condicao_parametros = paginacao_utils.condicao_keyset(
+                [(expressao, direcao) for expressao, direcao, _ in colunas], valores,
+            )
+            where = f'{where} AND {condicao}' if where else f'WHERE {condicao}'
+            parametros = parametros + condicao_parametros
+        paginacao = 'LIMIT %s'
+        paginacao_parametros = [limite + 1]
+
+    # Colunas pedidas + as da chave de ordenação (necessárias para o cursor)
+    selecionados = [campo for campo in CAMPOS_PRODUTO if campo in campos]
+    chaves = [campo for _, _, campo in colunas if campo not in selecionados]
+    expressoes = [CAMPOS_PRODUTO[campo] for campo in selecionados]
+    expressoes += ['r.relevancia' if campo == 'relevancia' else CAMPOS_PRODUTO[campo] for campo in chaves]
+
+    with connection.cursor() as cursor_db:
+        # A relevância é calculada em um LATERAL para poder ser usada
+        # como coluna comum no ORDER BY e na condição do cursor
+        cursor_db.execute(f"""
+            SELECT {', '.join(expressoes)}
+            FROM catalogo_produto p
+            CROSS JOIN LATERAL (SELECT {relevancia} AS relevancia) r
+            {where}
+            ORDER BY {order_by}
+            {paginacao}
+        """, relevancia_parametros + parametros + paginacao_parametros)
+        linhas = [dict(zip(selecionados + chaves, row)) for row in cursor_db.fetchall()]
+
+    proximo_cursor = None
+    if limite and len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo_cursor = paginacao_utils.codificar_cursor(
+            chave_ordenacao, [linhas[-1][campo] for _, _, campo in colunas],
+        )
+
+    conversores = [(campo, _CONVERSORES.get(campo)) for campo in selecionados]
+    return [
+        {campo: conversor(linha[campo]) if conversor else linha[campo] for campo, conversor in conversores}
+        for linha in linhas
+    ], proximo_cursor
+
+
+# Limite de tempo em cache dos destaques quando nenhuma promoção começa/termina
+DESTAQUES_CACHE_MAXIMO = 24 * 60 * 60
+
+
+def _como_utc(valor):
+    # destaque.data_inicio/data_fim são TIMESTAMP sem fuso, gravados em UTC
+    if valor is not None and timezone.is_naive(valor):
+        return valor.replace(tzinfo=datetime.timezone.utc)
+    return valor
+
+
+def _consultar_destaques(agora):
+    """Destaques vigentes em `agora` e o próximo início/fim de promoção"""
+    with connection.cursor() as cursor:
+        # Vigentes e futuros em uma consulta: os futuros só definem a fronteira
+        cursor.execute("""
+            SELECT p.destaque_id, p.destaque_desconto, p.destaque_ordem,
+                   p.destaque_inicio, p.destaque_fim,
+                   p.idproduto, p.nome, p.descricao, p.valor, p.estoque, p.media_avaliacao,
+                   p.imagem_principal_id, p.imagem_placeholder
+            FROM catalogo_produto p
+            WHERE p.destaque_ativo
+              AND (p.destaque_fim IS NULL OR p.destaque_fim >= %s)
+            ORDER BY p.destaque_ordem, p.destaque_id
+        """, [agora])
+        rows = cursor.fetchall()
+
+    destaques = []
+    fronteiras = []
+    for (iddestaque, desconto, ordem, inicio, fim, idproduto, nome, descricao,
+         valor, estoque, media, imagem_id, placeholder) in rows:
+        inicio, fim = _como_utc(inicio), _como_utc(fim)
+        if inicio is None or inicio > agora:
+            if inicio is not None:
+                fronteiras.append(inicio)
+            continue
+        if fim is not None:
+            # Sai da lista logo depois de data_fim
+            fronteiras.append(fim + datetime.timedelta(microseconds=1))
+
+        valor_original = float(valor)
+        desconto_float = float(desconto)
+        destaques.append({
+            'idproduto': idproduto,
+            'nome': nome,
+            'descricao': descricao,
+            'valor': valor_original,
+            'estoque': estoque,
+            'media_avaliacao': float(media),
+            'imagem_principal_id': imagem_id,
+            'imagem_principal': None,  # URL, depende do host da requisição
+            'imagem_placeholder': placeholder,
+            'destaque': {
+                'iddestaque': iddestaque,
+                'desconto_percentual': desconto_float,
+                'valor_original': valor_original,
+                'valor_com_desconto': valor_original * (1 - desconto_float / 100),
+                'ordem': ordem,
+            },
+        })
+    return destaques, min(fronteiras) if fronteiras else None
+
+
+def listar_destaques():
+    """
+    Lista os destaques vigentes, na ordem de exibição.
+
+    O conjunto só muda quando uma promoção começa/termina ou numa escrita do
+    catálogo, então o resultado fica em cache até a próxima fronteira (chave
+    ligada à versão do catálogo). Retorna (destaques, proxima_fronteira);
+    proxima_fronteira é um datetime ou None.
+    """
+    chave = f'catalogo:{catalogo_cache.obter_versao()}:destaques:dados'
+    entrada = cache.get(chave)
+    agora = timezone.now()
+    if entrada is None or (entrada[1] is not None and entrada[1] <= agora):
+        entrada = _consultar_destaques(agora)
+        ttl = DESTAQUES_CACHE_MAXIMO
+        if entrada[1] is not None:
+            ttl = max(1, min(ttl, int((entrada[1] - agora).total_seconds()) + 1))
+        cache.set(chave, entrada, ttl)
+    return entrada
+
+
+# Máximo de IDs aceitos em uma consulta em lote (/api/produtos/batch)
+LOTE_MAXIMO = 500
+
+
+def ids_da_requisicao(valores):
+    """
+    Converte os IDs pedidos (lista de strings/números, aceitando vírgulas)
+    em uma lista sem repetições, na ordem pedida. ValueError se inválidos.
+    """
+    ids = []
+    vistos = set()
+    for valor in valores:
+        for item in str(valor).split(','):
+            item = item.strip()
+            if not item:
+                continue
+            try:
+                produto_id = int(item)
+            except ValueError:
+                raise ValueError('Os IDs dos produtos devem ser números válidos')
+            if produto_id not in vistos:
+                vistos.add(produto_id)
+                ids.append(produto_id)
+    if not ids:
+        raise ValueError('Informe ao menos um ID de produto')
+    if len(ids) > LOTE_MAXIMO:
+        raise ValueError(f'Informe no máximo {LOTE_MAXIMO} IDs por requisição')
+    return ids
+
+
+def _consultar_produtos(produto_ids):
+    """
+    Documentos de detalhe dos produtos, em uma consulta.
+
+    Retorna ({id: (produto, data_atualizacao)}, {id: proxima_fronteira}); a
+    fronteira é o próximo início/fim de promoção do produto, quando houver.
+    """
+    with connection.cursor() as cursor:
+        # Imagens (só referências), categorias e destaque montados no próprio banco
+        cursor.execute("""
+            SELECT p.idproduto, p.nome, p.descricao, p.valor, p.estoque, p.media_avaliacao,
+                   p.data_atualizacao,
+                   COALESCE((
+                       SELECT json_agg(json_build_object(
+                                  'idproduto_imagem', pi.idproduto_imagem,
+                                  'ordem', pi.ordem,
+                                  'placeholder', pi.placeholder
+                              ) ORDER BY pi.ordem)
+                       FROM produto_imagem pi
+                       WHERE pi.produto_idproduto = p.idproduto
+                   ), '[]'::json),
+                   COALESCE((
+                       SELECT json_agg(json_build_object(
+                                  'idcategoria', c.idcategoria,
+                                  'nome', c.nome,
+                                  'descricao', c.descricao
+                              ) ORDER BY c.idcategoria)
+                       FROM produto_has_categoria phc
+                       INNER JOIN categoria c ON c.idcategoria = phc.categoria_idcategoria
+                       WHERE phc.produto_idproduto = p.idproduto
+                   ), '[]'::json),
+                   (
+                       SELECT json_build_object(
+                                  'desconto_percentual', d.desconto_percentual,
+                                  'valor_com_desconto', d.valor_com_desconto,
+                                  'ativo', d.ativo
+                              )
+                       FROM destaque d
+                       WHERE d.produto_idproduto = p.idproduto AND d.ativo = TRUE
+                         AND d.data_inicio <= NOW()
+                         AND (d.data_fim IS NULL OR d.data_fim >= NOW())
+                   ),
+                   (
+                       -- Próximo início ou o instante logo depois de data_fim
+                       SELECT CASE WHEN d.data_inicio > NOW() THEN d.data_inicio
+                                   ELSE d.data_fim + INTERVAL '1 microsecond' END
+                       FROM destaque d
+                       WHERE d.produto_idproduto = p.idproduto AND d.ativo = TRUE
+                         AND (d.data_inicio > NOW() OR d.data_fim >= NOW())
+                   )
+            FROM produto p
+            WHERE p.idproduto = ANY(%s)
+        """, [list(produto_ids)])
+        rows = cursor.fetchall()
+
+    resultado = {}
+    fronteiras = {}
+    for row in rows:
+        produto = serializacao.serializar_produto(row[:6])
+        produto['imagens'] = row[7]
+        produto['categorias'] = row[8]
+        if row[9]:
+            destaque = row[9]
+            destaque['valor_com_desconto'] = destaque['valor_com_desconto'] or None
+            produto['destaque'] = destaque
+        resultado[row[0]] = (produto, row[6])
+        if row[10] is not None:
+            fronteiras[row[0]] = _como_utc(row[10])
+    return resultado, fronteiras
+
+
+def obter_produtos(produto_ids):
+    """
+    Documentos de detalhe de vários produtos: {id: (produto, data_atualizacao)}.
+
+    Os que estão no cache por produto não vão ao banco; os demais são
+    buscados em uma única consulta e guardados no cache. IDs inexistentes
+    ficam fora do resultado. A entrada de um produto com promoção agendada
+    ou vigente não passa do próximo início/fim dela.
+    """
+    chaves = {catalogo_cache.chave_produto(produto_id): produto_id for produto_id in produto_ids}
+    resultado = {chaves[chave]: entrada for chave, entrada in cache.get_many(list(chaves)).items()}
+
+    faltantes = [produto_id for produto_id in produto_ids if produto_id not in resultado]
+    if faltantes:
+        consultados, fronteiras = _consultar_produtos(faltantes)
+        cache.set_many(
+            {
+                catalogo_cache.chave_produto(produto_id): entrada
+                for produto_id, entrada in consultados.items() if produto_id not in fronteiras
+            },
+            settings.CATALOGO_CACHE_TTL,
+        )
+        agora = timezone.now()
+        for produto_id, fronteira in fronteiras.items():
+            ttl = int((fronteira - agora).total_seconds()) + 1
+            ttl = max(1, min(settings.CATALOGO_CACHE_TTL, ttl))
+            cache.set(catalogo_cache.chave_produto(produto_id), consultados[produto_id], ttl)
+        resultado.update(consultados)
+    return resultado
+
+
+def obter_produto(produto_id):
+    """
+    Documento de detalhe de um produto, em uma única consulta.
+
+    As imagens vêm como referências (idproduto_imagem, ordem, placeholder);
+    a URL depende da requisição e é montada na view. O resultado fica em
+    cache por produto, invalidado nas escritas (catalogo_cache.invalidar_produtos).
+    Retorna (produto, data_atualizacao) ou None se o produto não existe.
+    """
+    return obter_produtos([produto_id]).get(produto_id)
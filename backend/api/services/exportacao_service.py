@@ -0,0 +1,145 @@
+"""
+Serviço de exportação do catálogo
+
+Percorre os produtos com um cursor do lado do servidor (lotes de `itersize`
+linhas), de modo que a memória usada não depende do tamanho do catálogo.
+Usado pelo endpoint /api/produtos/exportar e pelo comando export_catalog.
+"""
+import csv
+import io
+import json
+
+from django.db import connection
+
+from api.services.catalogo_service import decimal_para_str
+
+
+ITERSIZE_PADRAO = 2000
+
+INCLUSOES = ('categorias', 'destaque')
+
+COLUNAS_CSV = [
+    'idproduto', 'nome', 'descricao', 'valor', 'estoque', 'media_avaliacao',
+    'imagem_principal', 'categorias', 'destaque_desconto_percentual',
+    'destaque_valor_com_desconto', 'destaque_data_inicio', 'destaque_data_fim',
+]
+
+
+def inclusoes_da_requisicao(valor):
+    """Converte ?incluir=categorias,destaque em um conjunto (ValueError se inválido)"""
+    inclusoes = {item.strip() for item in (valor or '').split(',') if item.strip()}
+    invalidas = inclusoes - set(INCLUSOES)
+    if invalidas:
+        raise ValueError(f'Valor inválido em incluir: {", ".join(sorted(invalidas))}. Use: {", ".join(INCLUSOES)}')
+    return inclusoes
+
+
+def iterar_produtos(url_imagem, inclusoes=(), itersize=ITERSIZE_PADRAO):
+    """
+    Gera um dicionário por produto, lendo o banco em lotes de `itersize`.
+
+    `url_imagem` recebe o ID da imagem principal e retorna sua URL.
+    """
+    incluir_categorias = 'categorias' in inclusoes
+    incluir_destaque = 'destaque' in inclusoes
+
+    colunas_extras = []
+    joins = []
+    if incluir_categorias:
+        colunas_extras.append("COALESCE(cat.categorias, '[]'::json)")
+        joins.append("""
+            LEFT JOIN LATERAL (
+                SELECT json_agg(json_build_object('idcategoria', c.idcategoria, 'nome', c.nome)
+                                ORDER BY c.idcategoria) AS categorias
+                FROM produto_has_categoria phc
+                INNER JOIN categoria c ON c.idcategoria = phc.categoria_idcategoria
+                WHERE phc.produto_idproduto = p.idproduto
+            ) cat ON TRUE""")
+    if incluir_destaque:
+        colunas_extras += ['d.desconto_percentual', 'd.valor_com_desconto', 'd.data_inicio', 'd.data_fim']
+        joins.append("""
+            LEFT JOIN destaque d
+                ON d.produto_idproduto = p.idproduto AND d.ativo = TRUE
+               AND d.data_inicio <= NOW() AND (d.data_fim IS NULL OR d.data_fim >= NOW())""")
+
+    extras_sql = ''.join(f', {coluna}' for coluna in colunas_extras)
+    joins_sql = ''.join(joins)
+
+    # chunked_cursor() abre um cursor nomeado (server-side) no PostgreSQL
+    cursor = connection.chunked_cursor()
+    try:
+        cursor.cursor.itersize = itersize
+        cursor.execute(f"""
+            SELECT p.idproduto, p.nome, p.descricao, p.valor, p.estoque, p.media_avaliacao,
+                   img.idproduto_imagem{extras_sql}
+            FROM produto p
+            LEFT JOIN LATERAL (
+                SELECT pi.idproduto_imagem
+                FROM produto_imagem pi
+                WHERE pi.produto_idproduto = p.idproduto AND pi.ordem = 1
+                LIMIT 1
+            ) img ON TRUE{joins_sql}
+            ORDER BY p.idproduto
+        """)
+
+        while True:
+            rows = cursor.fetchmany(itersize)
+            if not rows:
+                break
+            for row in rows:
+                idproduto, nome, descricao, valor, estoque, media, imagem_id = row[:7]
+                produto = {
+                    'idproduto': idproduto,
+                    'nome': nome,
+                    'descricao': descricao,
+                    'valor': decimal_para_str(valor),
+                    'estoque': estoque,
+                    'media_avaliacao': decimal_para_str(media),
+                    'imagem_principal': url_imagem(imagem_id) if imagem_id else None,
+                }
+                extras = list(row[7:])
+                if incluir_categorias:
+                    categorias = extras.pop(0)
+                    # Dependendo do driver, json pode vir como texto
+                    produto['categorias'] = json.loads(categorias) if isinstance(categorias, str) else categorias
+                if incluir_destaque:
+                    desconto, valor_com_desconto, data_inicio, data_fim = extras[:4]
+                    produto['destaque'] = None if desconto is None else {
+                        'desconto_percentual': float(desconto),
+                        'valor_com_desconto': float(valor_com_desconto) if valor_com_desconto else None,
+                        'data_inicio': data_inicio.isoformat() if data_inicio else None,
+                        'data_fim': data_fim.isoformat() if data_fim else None,
+                    }
+                yield produto
+    finally:
+        cursor.close()
+
+
+def linhas_ndjson(produtos):
+    """Serializa cada produto como uma linha JSON (NDJSON)"""
+    for produto in produtos:
+        yield json.dumps(produto, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def linhas_csv(produtos):
+    """Serializa os produtos em CSV, uma linha por vez (cabeçalho primeiro)"""
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=COLUNAS_CSV, extrasaction='ignore')
+
+    def _esvaziar():
+        conteudo = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return conteudo
+
+    escritor.writeheader()
+    yield _esvaziar()
+    for produto in produtos:
+        linha = dict(produto)
+        if 'categorias' in produto:
+            linha['categorias'] = '|'.join(str(categoria['idcategoria']) for categoria in produto['categorias'])
+        destaque = produto.get('destaque') or {}
+        for campo in ('desconto_percentual', 'valor_com_desconto', 'data_inicio', 'data_fim'):
+            linha[f'destaque_{campo}'] = destaque.get(campo)
+        escritor.writerow(linha)
+        yield _esvaziar()
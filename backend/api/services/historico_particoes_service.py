@@ -0,0 +1,130 @@
+"""
+Serviço de partições do histórico de produtos
+
+produto_historico é particionada por mês em data_acao
+(postgres_docker/init/04-create-produto-historico.sql). Aqui ficam a
+criação antecipada das partições e o arquivamento das antigas: a partição
+é desanexada, exportada para NDJSON compactado (gzip) e removida.
+"""
+import datetime
+import gzip
+import os
+import re
+
+from django.db import connection, transaction
+
+
+MESES_ADIANTE_PADRAO = 3
+RETER_MESES_PADRAO = 12
+ITERSIZE_PADRAO = 5000
+PADRAO_NOME = re.compile(r'^produto_historico_(\d{4})_(\d{2})$')
+
+
+def somar_meses(data, meses):
+    """Primeiro dia do mês `meses` depois (ou antes) de `data`"""
+    indice = data.year * 12 + data.month - 1 + meses
+    return datetime.date(indice // 12, indice % 12 + 1, 1)
+
+
+def criar_particoes(meses=MESES_ADIANTE_PADRAO, hoje=None):
+    """Garante as partições do mês atual e dos `meses` seguintes; retorna as criadas"""
+    hoje = hoje or datetime.date.today()
+    criadas = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for deslocamento in range(meses + 1):
+            mes = somar_meses(hoje, deslocamento)
+            nome = f'produto_historico_{mes:%Y_%m}'
+            cursor.execute("SELECT to_regclass(%s) IS NULL", [nome])
+            if cursor.fetchone()[0]:
+                cursor.execute("SELECT criar_particao_historico(%s)", [mes])
+                criadas.append(nome)
+    return criadas
+
+
+def listar_particoes():
+    """
+    Partições mensais existentes, em ordem: lista de (nome, mes, anexada).
+
+    Inclui as já desanexadas que não chegaram a ser removidas (arquivamento
+    interrompido), para que a próxima execução as conclua.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname, EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)
+            FROM pg_class c
+            WHERE c.relkind = 'r' AND c.relname ~ '^produto_historico_[0-9]{4}_[0-9]{2}$'
+            ORDER BY c.relname
+        """)
+        particoes = []
+        for nome, anexada in cursor.fetchall():
+            ano, mes = PADRAO_NOME.match(nome).groups()
+            particoes.append((nome, datetime.date(int(ano), int(mes), 1), anexada))
+        return particoes
+
+
+def particoes_para_arquivar(reter_meses=RETER_MESES_PADRAO, hoje=None):
+    """Partições anteriores aos `reter_meses` meses mais recentes (contando o atual)"""
+    corte = somar_meses(hoje or datetime.date.today(), 1 - reter_meses)
+    return [particao for particao in listar_particoes() if particao[1] < corte]
+
+
+def exportar_particao(nome, caminho, itersize=ITERSIZE_PADRAO):
+    """
+    Grava as linhas da partição em `caminho` (NDJSON + gzip) e retorna a quantidade.
+
+    Escreve em um arquivo temporário e só o renomeia no final, então um
+    arquivo com o nome final está sempre completo.
+    """
+    temporario = caminho + '.tmp'
+    total = 0
+    # Cursor do lado do servidor: memória constante mesmo em meses grandes
+    cursor = connection.chunked_cursor()
+    try:
+        cursor.cursor.itersize = itersize
+        cursor.execute(
+            f'SELECT row_to_json(h)::text FROM {connection.ops.quote_name(nome)} h '
+            'ORDER BY h.data_acao, h.idproduto_historico'
+        )
+        with gzip.open(temporario, 'wt', encoding='utf-8') as arquivo:
+            for (linha,) in cursor:
+                arquivo.write(linha)
+                arquivo.write('\n')
+                total += 1
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    finally:
+        cursor.close()
+    os.replace(temporario, caminho)
+    return total
+
+
+def arquivar_particao(nome, anexada, destino, remover=True, itersize=ITERSIZE_PADRAO):
+    """
+    Desanexa a partição, exporta para `destino`/<nome>.ndjson.gz e a remove.
+
+    A remoção só acontece se o arquivo tiver todas as linhas da tabela.
+    Retorna (caminho do arquivo, linhas exportadas).
+    """
+    tabela = connection.ops.quote_name(nome)
+    if anexada:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE produto_historico DETACH PARTITION {tabela}')
+
+    os.makedirs(destino, exist_ok=True)
+    caminho = os.path.join(destino, f'{nome}.ndjson.gz')
+    exportadas = exportar_particao(nome, caminho, itersize)
+
+    if remover:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Bloqueia a tabela para a contagem valer até o DROP
+            cursor.execute(f'LOCK TABLE {tabela} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(f'SELECT COUNT(*) FROM {tabela}')
+            total = cursor.fetchone()[0]
+            if total != exportadas:
+                raise RuntimeError(
+                    f'{nome}: {exportadas} linha(s) exportada(s), mas a tabela tem {total}; tabela mantida'
+                )
+            cursor.execute(f'DROP TABLE {tabela}')
+    return caminho, exportadas
@@ -0,0 +1,259 @@
+"""
+Serviço de imagens de produtos
+
+Grava os arquivos no armazenamento de imagens (api/utils/armazenamento.py)
+e os metadados (MIME, hash, tamanho e dimensões) no banco, agenda a geração
+das variações (thumb/card/full em WebP e JPEG) em um pool de workers e
+fornece a leitura usada pelo endpoint binário /api/imagens/<id>.
+
+Linhas legadas, com o conteúdo ainda em BYTEA, continuam sendo lidas do
+banco até serem migradas (manage.py migrar_imagens_armazenamento).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.extras import execute_values
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.urls import reverse
+
+from api.services import catalogo_service
+from api.utils import catalogo_cache
+from api.utils.armazenamento import obter_armazenamento
+from api.utils.imagem_processamento import VARIANTES, gerar_derivados
+from api.utils.imagem_utils import detectar_mime, hash_sha256, para_bytes
+
+
+logger = logging.getLogger(__name__)
+
+# Pool de workers para o processamento das imagens: o upload não espera a CPU
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGENS_WORKERS', 2),
+    thread_name_prefix='imagens',
+)
+
+
+def variante_valida(tamanho):
+    """Indica se o tamanho pedido corresponde a uma variação conhecida"""
+    return tamanho in VARIANTES
+
+
+def detectar_mime_arquivo(arquivo):
+    """Detecta o MIME type real de um arquivo enviado (sem confiar na extensão)"""
+    cabecalho = arquivo.read(16)
+    arquivo.seek(0)
+    return detectar_mime(cabecalho)
+
+
+def url_imagem(request, imagem_id, tamanho=None):
+    """Monta a URL absoluta do endpoint binário de uma imagem"""
+    if not imagem_id:
+        return None
+    url = reverse('api:obter_imagem', args=[imagem_id])
+    if tamanho:
+        url = f'{url}?tamanho={tamanho}'
+    return request.build_absolute_uri(url)
+
+
+def inserir_imagens(cursor, produto_id, imagens, ordem_inicial=1):
+    """
+    Grava os arquivos enviados e insere seus metadados em produto_imagem.
+
+    Cada arquivo é copiado em blocos para o armazenamento (sem carregar o
+    conteúdo inteiro em memória) e todas as linhas vão em um único INSERT.
+    A geração dos derivados é agendada para depois do commit da transação.
+    """
+    armazenamento = obter_armazenamento()
+    linhas = []
+    for ordem, imagem in enumerate(imagens, start=ordem_inicial):
+        hash_hex, tamanho, cabecalho = armazenamento.salvar(imagem)
+        linhas.append((produto_id, ordem, detectar_mime(cabecalho), hash_hex, tamanho))
+    if not linhas:
+        return []
+
+    inseridas = execute_values(cursor, """
+        INSERT INTO produto_imagem (produto_idproduto, ordem, mime_type, hash_sha256, tamanho)
+        VALUES %s
+        RETURNING ordem, idproduto_imagem
+    """, linhas, page_size=len(linhas), fetch=True)
+    # RETURNING não garante a ordem do VALUES: ordena pela coluna ordem
+    imagem_ids = [imagem_id for _, imagem_id in sorted(inseridas)]
+
+    transaction.on_commit(lambda: agendar_derivados(imagem_ids))
+    return imagem_ids
+
+
+def agendar_derivados(imagem_ids):
+    """Envia as imagens para o pool de processamento"""
+    for imagem_id in imagem_ids:
+        _executor.submit(_processar_imagem, imagem_id)
+
+
+def _processar_imagem(imagem_id):
+    """Gera e grava os derivados de uma imagem (executado no pool de workers)"""
+    try:
+        processar_imagem(imagem_id)
+    except Exception:
+        logger.exception('Erro ao gerar derivados da imagem %s', imagem_id)
+    finally:
+        # Cada thread do pool tem sua própria conexão com o banco
+        connection.close()
+
+
+def processar_imagem(imagem_id):
+    """Gera os derivados de uma imagem e grava no banco"""
+    conteudo = ler_conteudo(imagem_id)
+    if not conteudo:
+        return False
+
+    resultado = gerar_derivados(conteudo)
+    armazenamento = obter_armazenamento()
+    linhas = [
+        (
+            imagem_id,
+            derivado['variante'],
+            derivado['formato'],
+            derivado['mime_type'],
+            derivado['largura'],
+            derivado['altura'],
+            armazenamento.salvar_bytes(derivado['conteudo']),
+            len(derivado['conteudo']),
+        )
+        for derivado in resultado['derivados']
+    ]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        execute_values(cursor, """
+            INSERT INTO produto_imagem_derivado
+                (produto_imagem_idproduto_imagem, variante, formato, mime_type,
+                 largura, altura, hash_sha256, tamanho)
+            VALUES %s
+            ON CONFLICT (produto_imagem_idproduto_imagem, variante, formato) DO UPDATE
+            SET mime_type = EXCLUDED.mime_type, largura = EXCLUDED.largura,
+                altura = EXCLUDED.altura, hash_sha256 = EXCLUDED.hash_sha256,
+                tamanho = EXCLUDED.tamanho, imagem = NULL
+        """, linhas)
+        cursor.execute("""
+            UPDATE produto_imagem
+            SET largura = %s, altura = %s, placeholder = %s
+            WHERE idproduto_imagem = %s
+            RETURNING produto_idproduto
+        """, [resultado['largura'], resultado['altura'], resultado['placeholder'], imagem_id])
+        row = cursor.fetchone()
+        # O placeholder aparece nas listagens
+        if row:
+            catalogo_service.atualizar_modelo_leitura([row[0]])
+            catalogo_cache.invalidar_produtos([row[0]])
+        catalogo_cache.invalidar()
+    return True
+
+
+def obter_metadados(imagem_id, tamanho=None, aceita_webp=False):
+    """
+    Retorna MIME type, hash e tamanho de uma imagem sem ler o conteúdo.
+
+    Com `tamanho`, procura o derivado correspondente (WebP quando o cliente
+    aceita, senão JPEG). Se o derivado ainda não foi gerado, retorna o
+    original com `provisorio=True`.
+
+    Imagens antigas sem metadados têm os campos calculados e gravados
+    na primeira leitura.
+    """
+    with connection.cursor() as cursor:
+        if tamanho:
+            formatos = ['webp', 'jpeg'] if aceita_webp else ['jpeg']
+            cursor.execute("""
+                SELECT formato, mime_type, hash_sha256, tamanho, imagem IS NOT NULL
+                FROM produto_imagem_derivado
+                WHERE produto_imagem_idproduto_imagem = %s AND variante = %s AND formato = ANY(%s)
+            """, [imagem_id, tamanho, formatos])
+            encontrados = {row[0]: row for row in cursor.fetchall()}
+            for formato in formatos:
+                if formato in encontrados:
+                    _, mime_type, hash_hex, tamanho_bytes, no_banco = encontrados[formato]
+                    return {
+                        'mime_type': mime_type,
+                        'hash_sha256': hash_hex.strip(),
+                        'tamanho': tamanho_bytes,
+                        'variante': tamanho,
+                        'formato': formato,
+                        'provisorio': False,
+                        'no_banco': no_banco,
+                    }
+
+        cursor.execute("""
+            SELECT mime_type, hash_sha256, tamanho, imagem IS NOT NULL
+            FROM produto_imagem
+            WHERE idproduto_imagem = %s
+        """, [imagem_id])
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        mime_type, hash_hex, tamanho_bytes, no_banco = row
+        if no_banco and (not hash_hex or tamanho_bytes is None or not mime_type):
+            cursor.execute("SELECT imagem FROM produto_imagem WHERE idproduto_imagem = %s", [imagem_id])
+            imagem_bytes = para_bytes(cursor.fetchone()[0])
+            mime_type = detectar_mime(imagem_bytes[:16])
+            hash_hex = hash_sha256(imagem_bytes)
+            tamanho_bytes = len(imagem_bytes)
+            cursor.execute("""
+                UPDATE produto_imagem
+                SET mime_type = %s, hash_sha256 = %s, tamanho = %s
+                WHERE idproduto_imagem = %s
+            """, [mime_type, hash_hex, tamanho_bytes, imagem_id])
+
+    return {
+        'mime_type': mime_type,
+        'hash_sha256': hash_hex.strip(),
+        'tamanho': tamanho_bytes,
+        'variante': None,
+        'formato': None,
+        'provisorio': bool(tamanho),
+        'no_banco': no_banco,
+    }
+
+
+def ler_conteudo(imagem_id, inicio=0, quantidade=None, variante=None, formato=None):
+    """Lê o conteúdo da imagem (ou de um derivado), opcionalmente apenas um intervalo de bytes"""
+    if variante:
+        tabela = 'produto_imagem_derivado'
+        filtro = 'produto_imagem_idproduto_imagem = %s AND variante = %s AND formato = %s'
+        parametros = [imagem_id, variante, formato]
+    else:
+        tabela = 'produto_imagem'
+        filtro = 'idproduto_imagem = %s'
+        parametros = [imagem_id]
+
+    with connection.cursor() as cursor:
+        if quantidade is None:
+            cursor.execute(f"SELECT hash_sha256, imagem FROM {tabela} WHERE {filtro}", parametros)
+        else:
+            # substring em BYTEA é 1-based; com STORAGE EXTERNAL lê só o trecho pedido
+            cursor.execute(
+                f"SELECT hash_sha256, substring(imagem FROM %s FOR %s) FROM {tabela} WHERE {filtro}",
+                [inicio + 1, quantidade] + parametros,
+            )
+        row = cursor.fetchone()
+    if not row:
+        return None
+    hash_hex, conteudo = row
+    if conteudo is not None:
+        # Linha legada, ainda no banco
+        return para_bytes(conteudo)
+
+    with obter_armazenamento().abrir(hash_hex.strip()) as arquivo:
+        arquivo.seek(inicio)
+        return arquivo.read() if quantidade is None else arquivo.read(quantidade)
+
+
+def abrir_arquivo(metadados):
+    """
+    Abre o arquivo de uma imagem descrita por obter_metadados.
+
+    Retorna None para linhas legadas, cujo conteúdo ainda está no banco.
+    """
+    if metadados['no_banco']:
+        return None
+    return obter_armazenamento().abrir(metadados['hash_sha256'])
@@ -0,0 +1,449 @@
+"""
+Serviço de importação de produtos em massa
+
+Lê um catálogo em CSV ou JSONL e, em lotes:
+  1. valida cada linha (erros ficam registrados por linha, sem abortar o lote);
+  2. processa as imagens referenciadas em um pool de processos (decodificação,
+     derivados e gravação no armazenamento de imagens);
+  3. carrega as linhas válidas com COPY em uma tabela temporária e as incorpora
+     a produto, produto_has_categoria e produto_imagem com SQL em conjunto.
+
+Colunas: nome, descricao, valor, estoque, categorias e imagens. No CSV,
+categorias (IDs) e imagens (caminhos relativos à pasta/arquivo de imagens)
+são separadas por "|"; no JSONL podem ser listas.
+"""
+import contextlib
+import csv
+import io
+import json
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+
+from psycopg2.extras import execute_values
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from api.services import catalogo_service, produto_service
+from api.utils import catalogo_cache
+from api.utils.armazenamento import obter_armazenamento
+from api.utils.imagem_processamento import gerar_derivados
+from api.utils.imagem_utils import detectar_mime
+from api.utils.produto_historico import registrar_historicos_produtos
+
+
+FORMATOS = ('csv', 'jsonl')
+LOTE_PADRAO = 1000
+TAMANHO_MAXIMO_IMAGEM = 5 * 1024 * 1024
+# Só esses arquivos do .zip são extraídos (o conteúdo é validado depois)
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def formato_do_arquivo(nome, formato=None):
+    """Formato pedido ou deduzido da extensão do arquivo"""
+    if not formato:
+        extensao = Path(nome or '').suffix.lower()
+        formato = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(extensao)
+    if formato not in FORMATOS:
+        raise ValueError('Formato inválido. Use: csv ou jsonl')
+    return formato
+
+
+def ler_linhas(arquivo, formato):
+    """Gera (número da linha, dados) de um arquivo binário CSV ou JSONL"""
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        # Linha 1 é o cabeçalho
+        for numero, dados in enumerate(csv.DictReader(texto), start=2):
+            yield numero, dados
+        return
+    for numero, linha in enumerate(texto, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError:
+            yield numero, None
+
+
+@contextlib.contextmanager
+def abrir_imagens(origem):
+    """
+    Disponibiliza as imagens como uma pasta.
+
+    `origem` pode ser o caminho de uma pasta, de um arquivo .zip ou um
+    arquivo .zip aberto (upload); arquivos .zip são extraídos em uma pasta
+    temporária removida ao final. Do .zip só as imagens são extraídas, e o
+    arquivo é recusado (ValueError) se exceder IMPORTACAO_ZIP_ARQUIVOS_MAXIMO
+    arquivos ou IMPORTACAO_ZIP_TAMANHO_MAXIMO bytes descompactados.
+    """
+    if origem is None:
+        yield None
+        return
+    if isinstance(origem, (str, Path)) and Path(origem).is_dir():
+        yield Path(origem).resolve()
+        return
+    try:
+        arquivo_zip = zipfile.ZipFile(origem)
+    except (zipfile.BadZipFile, FileNotFoundError):
+        raise ValueError('As imagens devem ser uma pasta ou um arquivo .zip')
+    with arquivo_zip, tempfile.TemporaryDirectory(prefix='importacao-') as pasta:
+        imagens = _imagens_do_zip(arquivo_zip)
+        # extractall ignora caminhos absolutos e componentes ".."
+        arquivo_zip.extractall(pasta, members=imagens)
+        yield Path(pasta).resolve()
+
+
+def _imagens_do_zip(arquivo_zip):
+    """Entradas de imagem do .zip, dentro dos limites (ValueError se não)"""
+    entradas = arquivo_zip.infolist()
+    if len(entradas) > settings.IMPORTACAO_ZIP_ARQUIVOS_MAXIMO:
+        raise ValueError(
+            f'O arquivo de imagens deve ter no máximo {settings.IMPORTACAO_ZIP_ARQUIVOS_MAXIMO} arquivos'
+        )
+    imagens = [
+        entrada for entrada in entradas
+        if not entrada.is_dir() and Path(entrada.filename).suffix.lower() in EXTENSOES_IMAGEM
+    ]
+    # file_size é o tamanho declarado; a leitura do zipfile não passa dele
+    if sum(entrada.file_size for entrada in imagens) > settings.IMPORTACAO_ZIP_TAMANHO_MAXIMO:
+        tamanho_mb = settings.IMPORTACAO_ZIP_TAMANHO_MAXIMO // (1024 * 1024)
+        raise ValueError(f'As imagens descompactadas excedem o máximo de {tamanho_mb}MB')
+    return imagens
+
+
+def _lista(valor):
+    if valor is None or valor == '':
+        return []
+    if isinstance(valor, list):
+        return valor
+    return [item.strip() for item in str(valor).split('|') if item.strip()]
+
+
+def validar_linha(dados, raiz_imagens):
+    """Normaliza uma linha do arquivo; ValueError com a mensagem do erro"""
+    if not isinstance(dados, dict):
+        raise ValueError('Linha inválida')
+
+    nome = str(dados.get('nome') or '').strip()
+    descricao = str(dados.get('descricao') or '').strip()
+    if not nome:
+        raise ValueError('O nome do produto é obrigatório')
+    if len(nome) > 100:
+        raise ValueError('O nome do produto deve ter no máximo 100 caracteres')
+    if not descricao:
+        raise ValueError('A descrição do produto é obrigatória')
+    if len(descricao) > 5000:
+        raise ValueError('A descrição do produto deve ter no máximo 5000 caracteres')
+
+    # Valores fora das colunas do banco são recusados aqui, linha a linha:
+    # no COPY, uma linha inválida derrubaria o lote inteiro
+    try:
+        valor = Decimal(str(dados.get('valor')).strip())
+        if not valor.is_finite():
+            raise ValueError
+        valor = valor.quantize(Decimal('0.01'))
+    except (ArithmeticError, ValueError):
+        raise ValueError('O valor do produto deve ser um número válido')
+    if valor <= 0:
+        raise ValueError('O valor do produto deve ser maior que zero')
+    if valor >= produto_service.VALOR_MAXIMO:
+        raise ValueError('O valor do produto excede o máximo permitido')
+
+    try:
+        estoque = int(str(dados.get('estoque')).strip())
+    except (TypeError, ValueError):
+        raise ValueError('O estoque deve ser um número válido')
+    if estoque < 0:
+        raise ValueError('O estoque deve ser um número não negativo')
+    if estoque > catalogo_service.INTEIRO_MAXIMO:
+        raise ValueError('O estoque excede o máximo permitido')
+
+    try:
+        categoria_ids = sorted({int(categoria_id) for categoria_id in _lista(dados.get('categorias'))})
+    except (TypeError, ValueError):
+        raise ValueError('Os IDs das categorias devem ser números válidos')
+    if any(not 0 < categoria_id <= catalogo_service.INTEIRO_MAXIMO for categoria_id in categoria_ids):
+        raise ValueError('Uma ou mais categorias não foram encontradas')
+
+    imagens = []
+    for nome_imagem in _lista(dados.get('imagens')):
+        if raiz_imagens is None:
+            raise ValueError('Nenhuma pasta ou arquivo de imagens foi informado')
+        caminho = (raiz_imagens / str(nome_imagem)).resolve()
+        if raiz_imagens not in caminho.parents or not caminho.is_file():
+            raise ValueError(f'Imagem {nome_imagem} não encontrada')
+        imagens.append(caminho)
+    if not imagens:
+        raise ValueError('É necessário adicionar pelo menos uma imagem para o produto')
+
+    return {
+        'nome': nome,
+        'descricao': descricao,
+        'valor': valor,
+        'estoque': estoque,
+        'categorias': categoria_ids,
+        'imagens': imagens,
+    }
+
+
+def _inicializar_worker():
+    """Os processos do pool precisam das settings para acessar o armazenamento"""
+    import django
+    django.setup()
+
+
+def preparar_imagem(caminho):
+    """
+    Processa uma imagem no pool: valida, gera os derivados e grava tudo no
+    armazenamento. Retorna só os metadados, para não trafegar os bytes
+    entre processos.
+    """
+    with open(caminho, 'rb') as arquivo:
+        conteudo = arquivo.read(TAMANHO_MAXIMO_IMAGEM + 1)
+    if len(conteudo) > TAMANHO_MAXIMO_IMAGEM:
+        raise ValueError('excede o tamanho máximo de 5MB')
+    mime_type = detectar_mime(conteudo[:16])
+    if not mime_type.startswith('image/'):
+        raise ValueError('não é uma imagem válida')
+
+    resultado = gerar_derivados(conteudo)
+    armazenamento = obter_armazenamento()
+    return {
+        'mime_type': mime_type,
+        'hash_sha256': armazenamento.salvar_bytes(conteudo),
+        'tamanho': len(conteudo),
+        'largura': resultado['largura'],
+        'altura': resultado['altura'],
+        'placeholder': resultado['placeholder'],
+        'derivados': [
+            (
+                derivado['variante'],
+                derivado['formato'],
+                derivado['mime_type'],
+                derivado['largura'],
+                derivado['altura'],
+                armazenamento.salvar_bytes(derivado['conteudo']),
+                len(derivado['conteudo']),
+            )
+            for derivado in resultado['derivados']
+        ],
+    }
+
+
+def _preparar_imagens(pool, caminhos):
+    """caminho -> metadados, ou a exceção que impediu o processamento"""
+    futuros = {caminho: pool.submit(preparar_imagem, str(caminho)) for caminho in caminhos}
+    resultado = {}
+    for caminho, futuro in futuros.items():
+        try:
+            resultado[caminho] = futuro.result()
+        except Exception as e:
+            resultado[caminho] = e
+    return resultado
+
+
+def _array_pg(valores):
+    return '{' + ','.join(str(valor) for valor in valores) + '}'
+
+
+def _gravar_lote(produtos, imagens, usuario_id, observacao):
+    """
+    Incorpora as linhas válidas de um lote em uma transação.
+
+    Cada produto criado ganha a entrada 'criado' do histórico (gravada
+    depois do commit do lote).
+
+    Retorna (IDs dos produtos criados, erros das linhas recusadas pelo banco).
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for numero, produto in produtos:
+        escritor.writerow([
+            numero, produto['nome'], produto['descricao'], produto['valor'], produto['estoque'],
+            _array_pg(produto['categorias']),
+        ])
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE importacao_produto (
+                linha INTEGER PRIMARY KEY,
+                idproduto INTEGER,
+                nome VARCHAR(100) NOT NULL,
+                descricao VARCHAR(5000) NOT NULL,
+                valor DECIMAL(10,2) NOT NULL,
+                estoque INTEGER NOT NULL,
+                categorias_ids INTEGER[] NOT NULL
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert("""
+            COPY importacao_produto (linha, nome, descricao, valor, estoque, categorias_ids)
+            FROM STDIN WITH (FORMAT csv)
+        """, buffer)
+
+        # Linhas com categorias inexistentes ficam de fora
+        cursor.execute("""
+            DELETE FROM importacao_produto s
+            WHERE EXISTS (
+                SELECT 1 FROM unnest(s.categorias_ids) AS c(idcategoria)
+                WHERE NOT EXISTS (SELECT 1 FROM categoria WHERE categoria.idcategoria = c.idcategoria)
+            )
+            RETURNING linha
+        """)
+        erros = [
+            {'linha': row[0], 'erro': 'Uma ou mais categorias não foram encontradas'}
+            for row in cursor.fetchall()
+        ]
+
+        # IDs reservados antes do INSERT para relacionar cada linha ao seu produto
+        cursor.execute("""
+            UPDATE importacao_produto
+            SET idproduto = nextval(pg_get_serial_sequence('produto', 'idproduto'))
+            RETURNING linha, idproduto
+        """)
+        produto_por_linha = dict(cursor.fetchall())
+        if not produto_por_linha:
+            return [], erros
+
+        cursor.execute("""
+            INSERT INTO produto (idproduto, nome, descricao, valor, estoque, media_avaliacao)
+            SELECT idproduto, nome, descricao, valor, estoque, 0
+            FROM importacao_produto
+        """)
+        cursor.execute("""
+            INSERT INTO produto_has_categoria (produto_idproduto, categoria_idcategoria)
+            SELECT idproduto, unnest(categorias_ids)
+            FROM importacao_produto
+            ON CONFLICT DO NOTHING
+        """)
+
+        caminho_da_imagem = {}
+        linhas_imagem = []
+        for numero, produto in produtos:
+            produto_id = produto_por_linha.get(numero)
+            if produto_id is None:
+                continue
+            for ordem, caminho in enumerate(produto['imagens'], start=1):
+                metadados = imagens[caminho]
+                caminho_da_imagem[(produto_id, ordem)] = caminho
+                linhas_imagem.append((
+                    produto_id, ordem, metadados['mime_type'], metadados['hash_sha256'], metadados['tamanho'],
+                    metadados['largura'], metadados['altura'], metadados['placeholder'],
+                ))
+        inseridas = execute_values(cursor, """
+            INSERT INTO produto_imagem
+                (produto_idproduto, ordem, mime_type, hash_sha256, tamanho, largura, altura, placeholder)
+            VALUES %s
+            RETURNING produto_idproduto, ordem, idproduto_imagem
+        """, linhas_imagem, page_size=1000, fetch=True)
+
+        linhas_derivado = [
+            (imagem_id, *derivado)
+            for produto_id, ordem, imagem_id in inseridas
+            for derivado in imagens[caminho_da_imagem[(produto_id, ordem)]]['derivados']
+        ]
+        execute_values(cursor, """
+            INSERT INTO produto_imagem_derivado
+                (produto_imagem_idproduto_imagem, variante, formato, mime_type, largura, altura, hash_sha256, tamanho)
+            VALUES %s
+        """, linhas_derivado, page_size=1000)
+
+        registrar_historicos_produtos(
+            [
+                (
+                    produto_por_linha[numero],
+                    None,
+                    {
+                        'nome': produto['nome'],
+                        'descricao': produto['descricao'],
+                        'valor': float(produto['valor']),
+                        'estoque': produto['estoque'],
+                        'categorias': produto['categorias'],
+                    },
+                )
+                for numero, produto in produtos
+                if numero in produto_por_linha
+            ],
+            usuario_id=usuario_id,
+            acao='criado',
+            observacao=observacao,
+        )
+
+        produto_ids = sorted(produto_por_linha.values())
+        catalogo_service.atualizar_modelo_leitura(produto_ids)
+        catalogo_cache.invalidar()
+    return produto_ids, erros
+
+
+def importar(linhas, raiz_imagens, usuario_id, observacao=None, lote=LOTE_PADRAO, workers=None, ao_concluir_lote=None):
+    """
+    Importa as linhas (iterável de (número, dados)) em lotes.
+
+    `usuario_id` e `observacao` vão para o histórico de cada produto criado.
+
+    Cada lote é gravado em sua própria transação; uma falha do banco em um
+    lote marca apenas as linhas daquele lote como erro. `ao_concluir_lote`
+    recebe o resultado parcial a cada lote.
+    """
+    inicio = time.perf_counter()
+    resultado = {'linhas': 0, 'importados': 0, 'produto_ids': [], 'erros': []}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+        pendentes = []
+        for item in linhas:
+            pendentes.append(item)
+            if len(pendentes) >= lote:
+                _importar_lote(pool, pendentes, raiz_imagens, usuario_id, observacao, resultado)
+                pendentes = []
+                _atualizar_vazao(resultado, inicio)
+                if ao_concluir_lote:
+                    ao_concluir_lote(resultado)
+        if pendentes:
+            _importar_lote(pool, pendentes, raiz_imagens, usuario_id, observacao, resultado)
+
+    _atualizar_vazao(resultado, inicio)
+    resultado['erros'].sort(key=lambda erro: erro['linha'])
+    return resultado
+
+
+def _importar_lote(pool, linhas, raiz_imagens, usuario_id, observacao, resultado):
+    resultado['linhas'] += len(linhas)
+    erros = resultado['erros']
+
+    validos = []
+    for numero, dados in linhas:
+        try:
+            validos.append((numero, validar_linha(dados, raiz_imagens)))
+        except ValueError as e:
+            erros.append({'linha': numero, 'erro': str(e)})
+
+    imagens = _preparar_imagens(pool, {caminho for _, produto in validos for caminho in produto['imagens']})
+    produtos = []
+    for numero, produto in validos:
+        falha = next((caminho for caminho in produto['imagens'] if isinstance(imagens[caminho], Exception)), None)
+        if falha is not None:
+            erros.append({'linha': numero, 'erro': f'Imagem {falha.relative_to(raiz_imagens)}: {imagens[falha]}'})
+        else:
+            produtos.append((numero, produto))
+    if not produtos:
+        return
+
+    try:
+        produto_ids, erros_banco = _gravar_lote(produtos, imagens, usuario_id, observacao)
+    except Exception as e:
+        erros.extend({'linha': numero, 'erro': f'Erro ao gravar o lote: {e}'} for numero, _ in produtos)
+        return
+    erros.extend(erros_banco)
+    resultado['importados'] += len(produto_ids)
+    resultado['produto_ids'].extend(produto_ids)
+
+
+def _atualizar_vazao(resultado, inicio):
+    duracao = time.perf_counter() - inicio
+    resultado['duracao_s'] = round(duracao, 3)
+    resultado['linhas_por_segundo'] = round(resultado['linhas'] / duracao, 1) if duracao else None
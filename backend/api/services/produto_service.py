@@ -0,0 +1,269 @@
+"""
+Serviço de escrita de produtos
+
+Instruções usadas no cadastro e na edição de produtos. Cada função recebe o
+cursor da transação em andamento e grava um conjunto inteiro de linhas em
+uma única instrução, em vez de uma ida ao banco por linha.
+
+Também concentra a atualização em massa de preço e estoque (ERP).
+"""
+from decimal import Decimal
+
+from psycopg2.extras import execute_values
+
+from django.db import connection, transaction
+
+from api.services import catalogo_service
+from api.utils import catalogo_cache
+from api.utils.produto_historico import registrar_historicos_produtos
+
+
+# Itens por instrução UPDATE na atualização em massa
+LOTE_ATUALIZACAO = 1000
+# produto.valor é DECIMAL(10,2)
+VALOR_MAXIMO = Decimal('100000000')
+
+
+def inserir_categorias(cursor, produto_id, categoria_ids):
+    """Vincula o produto às categorias informadas"""
+    if not categoria_ids:
+        return
+    cursor.execute("""
+        INSERT INTO produto_has_categoria (produto_idproduto, categoria_idcategoria)
+        SELECT %s, unnest(%s::integer[])
+        ON CONFLICT DO NOTHING
+    """, [produto_id, list(categoria_ids)])
+
+
+def categorias_do_produto(cursor, produto_id):
+    """IDs das categorias vinculadas ao produto"""
+    cursor.execute("SELECT categoria_idcategoria FROM produto_has_categoria WHERE produto_idproduto = %s", [produto_id])
+    return {row[0] for row in cursor.fetchall()}
+
+
+def remover_categorias(cursor, produto_id, categoria_ids):
+    """Desvincula o produto das categorias informadas"""
+    if not categoria_ids:
+        return
+    cursor.execute("""
+        DELETE FROM produto_has_categoria
+        WHERE produto_idproduto = %s AND categoria_idcategoria = ANY(%s)
+    """, [produto_id, list(categoria_ids)])
+
+
+def remover_imagens(cursor, produto_id, imagem_ids):
+    """Remove as imagens informadas (apenas as que pertencem ao produto) e retorna os IDs removidos"""
+    if not imagem_ids:
+        return []
+    cursor.execute("""
+        DELETE FROM produto_imagem
+        WHERE produto_idproduto = %s AND idproduto_imagem = ANY(%s)
+        RETURNING idproduto_imagem
+    """, [produto_id, list(imagem_ids)])
+    return sorted(row[0] for row in cursor.fetchall())
+
+
+def campos_alterados(atual, novos):
+    """
+    Compara `novos` (campo -> valor) com o estado atual do produto.
+
+    Retorna (anteriores, alterados) apenas com os campos que mudaram.
+    """
+    anteriores = {}
+    alterados = {}
+    for campo, valor in novos.items():
+        if getattr(atual, campo) != valor:
+            anteriores[campo] = getattr(atual, campo)
+            alterados[campo] = valor
+    return anteriores, alterados
+
+
+def atualizar_campos(cursor, produto_id, campos):
+    """UPDATE apenas das colunas informadas (nomes vindos de campos_alterados)"""
+    if not campos:
+        return
+    atribuicoes = ', '.join(f'{campo} = %s' for campo in campos)
+    cursor.execute(
+        f"UPDATE produto SET {atribuicoes} WHERE idproduto = %s",
+        list(campos.values()) + [produto_id],
+    )
+
+
+def valores_para_historico(dados):
+    """Converte Decimal em float (formato usado em produto_historico)"""
+    if isinstance(dados, dict):
+        return {campo: valores_para_historico(valor) for campo, valor in dados.items()}
+    if isinstance(dados, Decimal):
+        return float(dados)
+    return dados
+
+
+def destaque_do_produto(cursor, produto_id):
+    """Estado atual do destaque: {ativo, desconto_percentual, valor_com_desconto} ou None"""
+    cursor.execute("""
+        SELECT ativo, desconto_percentual, valor_com_desconto
+        FROM destaque WHERE produto_idproduto = %s
+    """, [produto_id])
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return {'ativo': bool(row[0]), 'desconto_percentual': row[1], 'valor_com_desconto': row[2]}
+
+
+def salvar_destaque(cursor, produto_id, desconto_percentual, valor_com_desconto=None):
+    """
+    Cria ou reativa o destaque do produto.
+
+    Sem `valor_com_desconto`, um destaque existente mantém o valor já gravado.
+    """
+    cursor.execute("""
+        INSERT INTO destaque (produto_idproduto, desconto_percentual, valor_com_desconto, ativo, ordem)
+        VALUES (%s, %s, %s, TRUE, 0)
+        ON CONFLICT (produto_idproduto) DO UPDATE SET
+            desconto_percentual = EXCLUDED.desconto_percentual,
+            valor_com_desconto = COALESCE(EXCLUDED.valor_com_desconto, destaque.valor_com_desconto),
+            ativo = TRUE,
+            data_inicio = CURRENT_TIMESTAMP
+    """, [produto_id, desconto_percentual, valor_com_desconto])
+
+
+def desativar_destaque(cursor, produto_id):
+    """Desativa o destaque do produto, se existir"""
+    cursor.execute("UPDATE destaque SET ativo = FALSE WHERE produto_idproduto = %s", [produto_id])
+
+
+def _inteiro_nao_negativo(valor):
+    """
+    Inteiro não negativo vindo do JSON (int ou string com dígitos ASCII).
+
+    None se inválido: bool, float (3.9 viraria 3) e dígitos de outras
+    escritas, que isdigit() aceita ('²') e int() recusa ou converte.
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, str):
+        valor = valor.strip()
+        if not (valor.isascii() and valor.isdigit()):
+            return None
+        return int(valor)
+    if isinstance(valor, int) and valor >= 0:
+        return valor
+    return None
+
+
+def validar_itens_atualizacao(itens):
+    """
+    Valida os itens {idproduto, valor?, estoque?} da atualização em massa.
+
+    Retorna (itens válidos como (id, valor, estoque), resultados dos inválidos).
+    """
+    if not isinstance(itens, list) or not itens:
+        raise ValueError('Informe uma lista de produtos com idproduto, valor e/ou estoque')
+
+    validos = []
+    erros = []
+    vistos = set()
+    for item in itens:
+        produto_id = item.get('idproduto') if isinstance(item, dict) else None
+        convertido = _inteiro_nao_negativo(produto_id)
+        if convertido is None or not 0 < convertido <= catalogo_service.INTEIRO_MAXIMO:
+            erros.append({'idproduto': produto_id, 'status': 'erro', 'erro': 'O ID do produto deve ser um número válido'})
+            continue
+        produto_id = convertido
+        if produto_id in vistos:
+            erros.append({'idproduto': produto_id, 'status': 'erro', 'erro': 'Produto repetido na requisição'})
+            continue
+        vistos.add(produto_id)
+
+        valor = item.get('valor')
+        estoque = item.get('estoque')
+        if valor is None and estoque is None:
+            erros.append({'idproduto': produto_id, 'status': 'erro', 'erro': 'Informe o valor e/ou o estoque'})
+            continue
+        erro = None
+        if valor is not None:
+            try:
+                valor = Decimal(str(valor))
+                if not valor.is_finite():
+                    raise ValueError(valor)
+                valor = valor.quantize(Decimal('0.01'))
+                if valor <= 0:
+                    erro = 'O valor do produto deve ser maior que zero'
+                elif valor >= VALOR_MAXIMO:
+                    erro = 'O valor do produto excede o máximo permitido'
+            except (ArithmeticError, ValueError):
+                erro = 'O valor do produto deve ser um número válido'
+        if estoque is not None and erro is None:
+            estoque = _inteiro_nao_negativo(estoque)
+            if estoque is None:
+                erro = 'O estoque deve ser um número inteiro não negativo'
+            elif estoque > catalogo_service.INTEIRO_MAXIMO:
+                erro = 'O estoque excede o máximo permitido'
+        if erro:
+            erros.append({'idproduto': produto_id, 'status': 'erro', 'erro': erro})
+            continue
+        validos.append((produto_id, valor, estoque))
+    return validos, erros
+
+
+def atualizar_precos_estoques(itens, usuario_id, observacao=None):
+    """
+    Aplica (id, valor, estoque) com um UPDATE ... FROM (VALUES ...) por lote.
+
+    valor/estoque None mantêm o atual. O histórico de cada lote é enfileirado
+    no commit e gravado em INSERTs de várias linhas. Retorna o resultado de cada ID.
+    """
+    resultados = []
+    for inicio in range(0, len(itens), LOTE_ATUALIZACAO):
+        lote = itens[inicio:inicio + LOTE_ATUALIZACAO]
+        with transaction.atomic(), connection.cursor() as cursor:
+            # O CTE lê (e bloqueia) os valores anteriores para o histórico
+            atualizados = execute_values(cursor, """
+                WITH novos (idproduto, valor, estoque) AS (VALUES %s),
+                anteriores AS (
+                    SELECT p.idproduto, p.valor, p.estoque
+                    FROM produto p
+                    JOIN novos n ON n.idproduto = p.idproduto
+                    FOR UPDATE OF p
+                )
+                UPDATE produto p
+                SET valor = COALESCE(n.valor, p.valor),
+                    estoque = COALESCE(n.estoque, p.estoque)
+                FROM novos n
+                JOIN anteriores a ON a.idproduto = n.idproduto
+                WHERE p.idproduto = n.idproduto
+                RETURNING p.idproduto, a.valor, a.estoque, p.valor, p.estoque
+            """, lote, template='(%s::integer, %s::numeric, %s::integer)', page_size=len(lote), fetch=True)
+
+            por_id = {row[0]: row for row in atualizados}
+            if por_id:
+                registrar_historicos_produtos(
+                    [
+                        (
+                            produto_id,
+                            {'valor': float(valor_anterior), 'estoque': estoque_anterior},
+                            {'valor': float(valor_novo), 'estoque': estoque_novo},
+                        )
+                        for produto_id, valor_anterior, estoque_anterior, valor_novo, estoque_novo in atualizados
+                    ],
+                    usuario_id=usuario_id,
+                    acao='editado',
+                    observacao=observacao,
+                )
+                produto_ids = list(por_id)
+                catalogo_service.atualizar_modelo_leitura(produto_ids)
+                catalogo_cache.invalidar_produtos(produto_ids)
+                catalogo_cache.invalidar()
+
+        for produto_id, _, _ in lote:
+            row = por_id.get(produto_id)
+            if row is None:
+                resultados.append({'idproduto': produto_id, 'status': 'nao_encontrado'})
+            else:
+                resultados.append({
+                    'idproduto': produto_id,
+                    'status': 'atualizado',
+                    'valor': str(row[3]),
+                    'estoque': row[4],
+                })
+    return resultados
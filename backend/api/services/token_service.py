@@ -0,0 +1,131 @@
+"""
+Serviço de tokens JWT
+
+Único ponto de emissão e verificação dos tokens da API (HS256). Cada token
+leva no cabeçalho o `kid` da chave que o assinou; as chaves ficam em
+settings.JWT_CHAVES e a atual em settings.JWT_CHAVE_ATUAL. Para trocar a
+chave, adicione a nova, aponte JWT_CHAVE_ATUAL para ela e remova a antiga
+depois que os tokens assinados com ela expirarem. Tokens sem `kid`
+(emitidos antes da rotação) são verificados com a chave atual.
+
+Tokens verificados recentemente ficam em um LRU em memória, indexado pelo
+SHA-256 do token: um cliente que repete o mesmo token não paga de novo o
+HMAC nem a decodificação. A entrada vale só até o `exp` do token.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+
+
+ALGORITMO = 'HS256'
+
+_verificados = OrderedDict()
+_lock = threading.Lock()
+_metricas = {'acertos': 0, 'falhas': 0, 'invalidos': 0}
+
+
+class TokenInvalido(Exception):
+    """Token malformado, com assinatura inválida, chave desconhecida ou expirado"""
+
+
+def _chaves():
+    return settings.JWT_CHAVES
+
+
+def _chave_atual():
+    return settings.JWT_CHAVE_ATUAL
+
+
+def emitir(claims, validade=None):
+    """Assina `claims` com a chave atual; exp/iat são preenchidos aqui"""
+    agora = int(time.time())
+    validade = validade or settings.JWT_VALIDADE
+    payload = {
+        **claims,
+        'iat': agora,
+        'exp': agora + int(validade.total_seconds()),
+    }
+    kid = _chave_atual()
+    return jwt.encode(payload, _chaves()[kid], algorithm=ALGORITMO, headers={'kid': kid})
+
+
+def emitir_para_usuario(usuario):
+    """Token de acesso com as claims usadas pela API (id, email, nome, admin)"""
+    return emitir({
+        'id': usuario.idusuario,
+        'email': usuario.email,
+        'nome': usuario.nome,
+        'admin': usuario.admin,
+    })
+
+
+def _decodificar(token):
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+    except jwt.PyJWTError:
+        raise TokenInvalido('Token inválido')
+    chave = _chaves().get(kid or _chave_atual())
+    if chave is None:
+        raise TokenInvalido('Token assinado com uma chave desconhecida')
+    try:
+        return jwt.decode(token, chave, algorithms=[ALGORITMO], options={'require': ['exp']})
+    except jwt.ExpiredSignatureError:
+        raise TokenInvalido('Token expirado')
+    except jwt.PyJWTError:
+        raise TokenInvalido('Token inválido')
+
+
+def verificar(token, usar_cache=True):
+    """
+    Valida o token e retorna as claims (dict).
+
+    Levanta TokenInvalido. Com `usar_cache=False` sempre refaz a verificação
+    (usado no benchmark).
+    """
+    if isinstance(token, bytes):
+        token = token.decode('ascii', 'replace')
+    if not usar_cache:
+        return _decodificar(token)
+
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    agora = time.time()
+    with _lock:
+        entrada = _verificados.get(digest)
+        if entrada is not None:
+            if entrada[0] > agora:
+                _verificados.move_to_end(digest)
+                _metricas['acertos'] += 1
+                return dict(entrada[1])
+            del _verificados[digest]
+        _metricas['falhas'] += 1
+
+    try:
+        claims = _decodificar(token)
+    except TokenInvalido:
+        with _lock:
+            _metricas['invalidos'] += 1
+        raise
+
+    with _lock:
+        _verificados[digest] = (claims['exp'], claims)
+        while len(_verificados) > settings.JWT_CACHE_MAXIMO:
+            _verificados.popitem(last=False)
+    return dict(claims)
+
+
+def limpar_cache():
+    with _lock:
+        _verificados.clear()
+
+
+def estatisticas():
+    with _lock:
+        metricas = dict(_metricas)
+        metricas['entradas'] = len(_verificados)
+    metricas['maximo'] = settings.JWT_CACHE_MAXIMO
+    metricas['chave_atual'] = _chave_atual()
+    return metricas
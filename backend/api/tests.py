@@ -0,0 +1,177 @@
+"""
+Testes da API
+
+Os modelos não são gerenciados pelo Django (managed = False): o esquema do
+banco de teste é criado com os scripts de postgres_docker/init. Esses testes
+precisam do PostgreSQL (DB_HOST/DB_PORT, ex.: postgres_docker/docker-compose.yml);
+sem ele são pulados e só rodam os que não usam o banco.
+
+Uso:
+    python manage.py test api
+"""
+from decimal import Decimal
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.services import catalogo_service, produto_service
+
+
+SCRIPTS_INIT = Path(settings.BASE_DIR) / 'postgres_docker' / 'init'
+
+
+def postgres_disponivel():
+    """O PostgreSQL configurado aceita conexões?"""
+    try:
+        connection.ensure_connection()
+    except OperationalError:
+        return False
+    finally:
+        connection.close()
+    return True
+
+
+POSTGRES = postgres_disponivel()
+
+
+def criar_esquema():
+    """Executa os scripts numerados de postgres_docker/init, em ordem"""
+    with connection.cursor() as cursor:
+        for script in sorted(SCRIPTS_INIT.glob('[0-9][0-9]-*.sql')):
+            cursor.execute(script.read_text(encoding='utf-8'))
+
+
+def criar_produtos(categoria_id, quantidade, nome=None):
+    """
+    Produtos com imagem principal e categoria, já no modelo de leitura.
+
+    Sem `nome`, cada produto recebe um nome distinto ('Produto 1', ...).
+    Retorna os IDs na ordem de criação.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO produto (nome, descricao, valor, estoque)
+            SELECT COALESCE(%s, 'Produto ' || i), 'Descrição do produto', 10 + i, i
+            FROM generate_series(1, %s) AS i
+            RETURNING idproduto
+        """, [nome, quantidade])
+        produto_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("""
+            INSERT INTO produto_imagem (produto_idproduto, ordem, mime_type, hash_sha256, tamanho)
+            SELECT id, 1, 'image/png', repeat('0', 64), 1
+            FROM unnest(%s::integer[]) AS id
+        """, [produto_ids])
+        cursor.execute("""
+            INSERT INTO produto_has_categoria (produto_idproduto, categoria_idcategoria)
+            SELECT id, %s FROM unnest(%s::integer[]) AS id
+        """, [categoria_id, produto_ids])
+    catalogo_service.atualizar_modelo_leitura(produto_ids)
+    return produto_ids
+
+
+@skipUnless(POSTGRES, 'Requer o PostgreSQL: o esquema vem dos scripts SQL de postgres_docker/init')
+class CatalogoTestCase(TestCase):
+    """Esquema do banco e uma categoria para os produtos"""
+
+    # Sem o PostgreSQL a classe é pulada; sem bancos declarados o runner
+    # também não tenta criar o banco de teste
+    databases = {'default'} if POSTGRES else set()
+
+    @classmethod
+    def setUpTestData(cls):
+        criar_esquema()
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO categoria (nome) VALUES ('Teste') RETURNING idcategoria")
+            cls.categoria_id = cursor.fetchone()[0]
+
+    def listar(self, **parametros):
+        # Sem o snapshot em cache: a listagem sempre vai ao banco
+        cache.clear()
+        resposta = self.client.get(reverse('api:listar_produtos'), parametros)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+
+class ListarProdutosConsultasTest(CatalogoTestCase):
+    """/api/produtos deve usar o mesmo número de consultas para qualquer quantidade de produtos"""
+
+    def test_consultas_nao_crescem_com_os_produtos(self):
+        criar_produtos(self.categoria_id, 5)
+        with CaptureQueriesContext(connection) as consultas:
+            produtos = self.listar()['data']
+        self.assertEqual(len(produtos), 5)
+        self.assertTrue(all(produto['imagem_principal'] for produto in produtos))
+
+        criar_produtos(self.categoria_id, 5)
+        with self.assertNumQueries(len(consultas)):
+            produtos = self.listar()['data']
+        self.assertEqual(len(produtos), 10)
+
+
+class BuscaPaginadaTest(CatalogoTestCase):
+    """A paginação por relevância não pode pular nem repetir produtos empatados"""
+
+    def test_empates_de_relevancia(self):
+        empatados = criar_produtos(self.categoria_id, 4, nome='Caneca azul')
+        criar_produtos(self.categoria_id, 3)
+
+        vistos = []
+        cursor = None
+        for _ in range(len(empatados) + 1):
+            parametros = {'busca': 'caneca', 'limit': 1}
+            if cursor:
+                parametros['cursor'] = cursor
+            resposta = self.listar(**parametros)
+            vistos += [produto['idproduto'] for produto in resposta['data']]
+            cursor = resposta['paginacao']['proximo_cursor']
+            if cursor is None:
+                break
+
+        # Mesma relevância: desempate por idproduto, cada um exatamente uma vez
+        self.assertIsNone(cursor)
+        self.assertEqual(vistos, sorted(empatados))
+
+
+class ValidarItensAtualizacaoTest(SimpleTestCase):
+    """IDs e estoques da atualização em massa: só inteiros de verdade, dentro de INTEGER"""
+
+    def erro_de(self, item):
+        validos, erros = produto_service.validar_itens_atualizacao([item])
+        self.assertEqual(validos, [])
+        return erros[0]['erro']
+
+    def test_id_deve_ser_inteiro(self):
+        for produto_id in (True, False, 3.9, 3.0, '3.9', '٣', '²', None, [1], 0, -1, 2 ** 31):
+            with self.subTest(idproduto=produto_id):
+                self.assertEqual(
+                    self.erro_de({'idproduto': produto_id, 'estoque': 1}),
+                    'O ID do produto deve ser um número válido',
+                )
+
+    def test_estoque_deve_ser_inteiro(self):
+        for estoque in (True, 2.5, '²', '-1', -1):
+            with self.subTest(estoque=estoque):
+                self.assertEqual(
+                    self.erro_de({'idproduto': 1, 'estoque': estoque}),
+                    'O estoque deve ser um número inteiro não negativo',
+                )
+        self.assertEqual(self.erro_de({'idproduto': 1, 'estoque': 2 ** 31}), 'O estoque excede o máximo permitido')
+
+    def test_valor_deve_ser_finito(self):
+        for valor in ('NaN', 'Infinity', 'abc'):
+            with self.subTest(valor=valor):
+                self.assertEqual(self.erro_de({'idproduto': 1, 'valor': valor}), 'O valor do produto deve ser um número válido')
+
+    def test_itens_validos(self):
+        validos, erros = produto_service.validar_itens_atualizacao([
+            {'idproduto': 3, 'estoque': ' 7 '},
+            {'idproduto': '4', 'valor': '9.999'},
+        ])
+        self.assertEqual(erros, [])
+        self.assertEqual(validos, [(3, None, 7), (4, Decimal('10.00'), None)])
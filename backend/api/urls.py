@@ -1,6 +1,7 @@
 from django.urls import path
 from . import views
 from . import views_produto
+from . import views_imagem
 
 urlpatterns = [
     # Autenticação
@@ -11,19 +12,31 @@ urlpatterns = [
     
     # Usuário
     path('user/me', views.get_me, name='get_me'),
+    path('usuarios/<int:usuario_id>/historico', views_produto.historico_usuario, name='historico_usuario'),
     
     # Produtos
     path('produtos', views_produto.listar_produtos, name='listar_produtos'),
+    path('produtos/exportar', views_produto.exportar_produtos, name='exportar_produtos'),
+    path('produtos/batch', views_produto.obter_produtos_lote, name='obter_produtos_lote'),
     path('produtos/<int:produto_id>', views_produto.obter_produto, name='obter_produto'),
     path('produtos/cadastrar', views_produto.cadastrar_produto, name='cadastrar_produto'),
+    path('produtos/importar', views_produto.importar_produtos, name='importar_produtos'),
+    path('produtos/lote', views_produto.atualizar_produtos_lote, name='atualizar_produtos_lote'),
     path('produtos/<int:produto_id>/editar', views_produto.editar_produto, name='editar_produto'),
     path('produtos/<int:produto_id>/deletar', views_produto.deletar_produto, name='deletar_produto'),
+    path('produtos/<int:produto_id>/historico', views_produto.historico_produto, name='historico_produto'),
+    path('produtos/<int:produto_id>/historico/<int:historico_id>', views_produto.versao_produto, name='versao_produto'),
     path('produtos/destaques', views_produto.listar_destaques, name='listar_destaques'),
     path('categorias', views_produto.listar_categorias, name='listar_categorias'),
     path('categorias/cadastrar', views_produto.cadastrar_categoria, name='cadastrar_categoria'),
     path('categorias/<int:categoria_id>/deletar', views_produto.deletar_categoria, name='deletar_categoria'),
-    
+    path('catalogo/cache', views_produto.estatisticas_cache_catalogo, name='estatisticas_cache_catalogo'),
+
+    # Imagens
+    path('imagens/<int:imagem_id>', views_imagem.obter_imagem, name='obter_imagem'),
+
     # Health check
     path('health', views.health_check, name='health'),
+    path('diagnostico', views.diagnostico, name='diagnostico'),
 ]
 
@@ -0,0 +1,132 @@
+"""
+Armazenamento dos arquivos de imagem
+
+As imagens (originais e derivados) ficam fora do banco, endereçadas pelo
+SHA-256 do conteúdo: arquivos iguais são gravados uma única vez e o nome
+nunca muda para o mesmo conteúdo. produto_imagem guarda só os metadados.
+
+O backend é escolhido por IMAGENS_ARMAZENAMENTO (caminho da classe).
+"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+TAMANHO_BLOCO = 64 * 1024
+
+
+class ArmazenamentoImagens:
+    """Interface dos backends de armazenamento de imagens"""
+
+    def salvar(self, arquivo):
+        """
+        Grava um arquivo enviado (UploadedFile ou arquivo aberto) lendo em blocos.
+
+        Retorna (hash_sha256, tamanho, cabecalho), onde cabecalho são os
+        primeiros bytes do conteúdo, para detectar o MIME type.
+        """
+        raise NotImplementedError
+
+    def salvar_bytes(self, conteudo):
+        """Grava um conteúdo já em memória e retorna seu hash"""
+        raise NotImplementedError
+
+    def existe(self, hash_hex):
+        raise NotImplementedError
+
+    def abrir(self, hash_hex):
+        """Abre o arquivo para leitura binária (FileNotFoundError se não existir)"""
+        raise NotImplementedError
+
+    def remover(self, hash_hex):
+        raise NotImplementedError
+
+    def listar(self, anteriores_a=None):
+        """Itera sobre os hashes armazenados (opcionalmente só os gravados antes de `anteriores_a`, timestamp)"""
+        raise NotImplementedError
+
+    def caminho_relativo(self, hash_hex):
+        """Caminho usado pelo servidor web para servir o arquivo (X-Accel-Redirect)"""
+        return f'{hash_hex[:2]}/{hash_hex[2:4]}/{hash_hex}'
+
+
+class ArmazenamentoLocal(ArmazenamentoImagens):
+    """Arquivos em IMAGENS_DIR/ab/cd/<hash>"""
+
+    def __init__(self, raiz=None):
+        self.raiz = Path(raiz or settings.IMAGENS_DIR)
+
+    def caminho(self, hash_hex):
+        return self.raiz / self.caminho_relativo(hash_hex)
+
+    def _gravar(self, blocos):
+        """Grava os blocos em um arquivo temporário e o move para o endereço do hash"""
+        temporarios = self.raiz / 'tmp'
+        temporarios.mkdir(parents=True, exist_ok=True)
+        sha256 = hashlib.sha256()
+        tamanho = 0
+        cabecalho = b''
+        descritor, temporario = tempfile.mkstemp(dir=temporarios)
+        try:
+            with os.fdopen(descritor, 'wb') as destino:
+                for bloco in blocos:
+                    if len(cabecalho) < 16:
+                        cabecalho += bloco[:16 - len(cabecalho)]
+                    sha256.update(bloco)
+                    tamanho += len(bloco)
+                    destino.write(bloco)
+
+            hash_hex = sha256.hexdigest()
+            final = self.caminho(hash_hex)
+            if final.exists():
+                # Conteúdo já armazenado; renovar a data protege o arquivo da limpeza de órfãos
+                os.unlink(temporario)
+                os.utime(final)
+            else:
+                final.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temporario, final)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+            raise
+        return hash_hex, tamanho, cabecalho
+
+    def salvar(self, arquivo):
+        if hasattr(arquivo, 'seek'):
+            arquivo.seek(0)
+        if hasattr(arquivo, 'chunks'):
+            blocos = arquivo.chunks(TAMANHO_BLOCO)
+        else:
+            blocos = iter(lambda: arquivo.read(TAMANHO_BLOCO), b'')
+        return self._gravar(blocos)
+
+    def salvar_bytes(self, conteudo):
+        return self._gravar([conteudo])[0]
+
+    def existe(self, hash_hex):
+        return self.caminho(hash_hex).exists()
+
+    def abrir(self, hash_hex):
+        return open(self.caminho(hash_hex), 'rb')
+
+    def remover(self, hash_hex):
+        try:
+            self.caminho(hash_hex).unlink()
+        except FileNotFoundError:
+            pass
+
+    def listar(self, anteriores_a=None):
+        for caminho in self.raiz.glob('??/??/*'):
+            if anteriores_a is None or caminho.stat().st_mtime < anteriores_a:
+                yield caminho.name
+
+
+@lru_cache(maxsize=None)
+def obter_armazenamento():
+    """Instância do backend configurado em IMAGENS_ARMAZENAMENTO"""
+    return import_string(settings.IMAGENS_ARMAZENAMENTO)()
@@ -0,0 +1,35 @@
+"""
+Utilitários de GET condicional (ETag / Last-Modified / Cache-Control)
+
+Usados pelos endpoints públicos do catálogo: quando o cliente (ou um proxy
+reverso) já tem a versão atual, a resposta é um 304 sem corpo.
+"""
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+# Respostas ficam frescas por pouco tempo; depois disso o proxy pode continuar
+# servindo a cópia antiga enquanto revalida em segundo plano
+CACHE_CONTROL_CATALOGO = 'public, max-age=30, stale-while-revalidate=300'
+
+
+def aplicar_validadores(response, etag, ultima_modificacao=None, cache_control=CACHE_CONTROL_CATALOGO):
+    """Adiciona ETag, Last-Modified (timestamp em segundos) e Cache-Control à resposta"""
+    response['ETag'] = etag
+    if ultima_modificacao is not None:
+        response['Last-Modified'] = http_date(ultima_modificacao)
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def resposta_nao_modificada(request, etag, ultima_modificacao=None, cache_control=CACHE_CONTROL_CATALOGO):
+    """
+    Avalia If-None-Match / If-Modified-Since (e If-Match) da requisição.
+
+    Retorna a resposta 304 (ou 412) já com os validadores, ou None quando o
+    corpo completo precisa ser enviado.
+    """
+    base = aplicar_validadores(HttpResponse(), etag, ultima_modificacao, cache_control)
+    resposta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacao, response=base)
+    return None if resposta is base else resposta
@@ -0,0 +1,160 @@
+"""
+Cache de snapshots das listagens públicas do catálogo
+
+Guarda o JSON já serializado (bytes) de /api/produtos, /api/produtos/destaques
+e /api/categorias. A chave inclui a versão do catálogo: toda escrita no
+catálogo incrementa a versão, e os snapshots antigos simplesmente deixam de
+ser lidos (expiram pelo TTL). Um acerto é respondido sem ORM nem serializer
+e, se o cliente já tem o conteúdo (If-None-Match), com 304 sem corpo.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.utils import cache_http
+
+
+CHAVE_VERSAO = 'catalogo:versao'
+
+# Endpoints com snapshot (usados também nas estatísticas)
+ENDPOINTS = ('produtos', 'destaques', 'categorias')
+
+
+def obter_versao():
+    """Versão atual do catálogo"""
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        # Começa pelo relógio: se a chave for descartada pelo cache, a nova
+        # versão nunca coincide com uma anterior
+        cache.add(CHAVE_VERSAO, time.time_ns(), None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def _incrementar_versao():
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.add(CHAVE_VERSAO, time.time_ns(), None)
+
+
+def invalidar():
+    """Incrementa a versão do catálogo assim que a transação atual confirmar"""
+    transaction.on_commit(_incrementar_versao)
+
+
+def chave_produto(produto_id):
+    """Chave do documento de detalhe de um produto (ver catalogo_service.obter_produto)"""
+    return f'catalogo:produto:{produto_id}'
+
+
+def invalidar_produtos(produto_ids):
+    """Remove o detalhe dos produtos do cache assim que a transação atual confirmar"""
+    chaves = [chave_produto(produto_id) for produto_id in produto_ids]
+    transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+def invalidar_apos_escrita(view):
+    """
+    Decorator para as views que alteram o catálogo.
+
+    Incrementa a versão quando a view responde com sucesso (2xx). Erros de
+    validação, 404 e 401/403 não gravam nada e não descartam os snapshots:
+    do contrário qualquer requisição inválida esvaziaria o cache.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if 200 <= response.status_code < 300:
+            invalidar()
+        return response
+    return wrapper
+
+
+def _contar(nome, tipo):
+    chave = f'catalogo:contador:{nome}:{tipo}'
+    try:
+        cache.incr(chave)
+    except ValueError:
+        if not cache.add(chave, 1, None):
+            cache.incr(chave)
+
+
+def estatisticas():
+    """Acertos e faltas por endpoint desde que o cache foi iniciado"""
+    chaves = [f'catalogo:contador:{nome}:{tipo}' for nome in ENDPOINTS for tipo in ('hits', 'misses')]
+    valores = cache.get_many(chaves)
+    resultado = {'versao': obter_versao(), 'endpoints': {}}
+    for nome in ENDPOINTS:
+        hits = valores.get(f'catalogo:contador:{nome}:hits', 0)
+        misses = valores.get(f'catalogo:contador:{nome}:misses', 0)
+        total = hits + misses
+        resultado['endpoints'][nome] = {
+            'hits': hits,
+            'misses': misses,
+            'taxa_acerto': round(hits / total, 4) if total else None,
+        }
+    return resultado
+
+
+def _chave_snapshot(nome, request, versao):
+    # As URLs das imagens são absolutas, então o host faz parte da chave
+    parametros = sorted(request.GET.lists())
+    identificador = f'{request.build_absolute_uri("/")}|{parametros}'
+    resumo = hashlib.sha1(identificador.encode('utf-8')).hexdigest()
+    return f'catalogo:{versao}:{nome}:{resumo}'
+
+
+def _resposta(request, entrada, situacao):
+    conteudo, etag, gerado_em = entrada
+    response = cache_http.resposta_nao_modificada(request, etag, gerado_em)
+    if response is None:
+        response = cache_http.aplicar_validadores(
+            HttpResponse(conteudo, content_type='application/json'), etag, gerado_em,
+        )
+    response['X-Cache'] = situacao
+    return response
+
+
+def snapshot(nome):
+    """
+    Decorator para as views públicas do catálogo.
+
+    Deve ficar abaixo de @api_view/@permission_classes. Só respostas 200 são
+    guardadas; erros (ex.: parâmetros inválidos) passam direto.
+
+    Cada snapshot guarda também o ETag (hash do conteúdo) e o horário em que
+    foi gerado, usados no GET condicional: um cliente atualizado recebe 304.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            chave = _chave_snapshot(nome, request, obter_versao())
+            entrada = cache.get(chave)
+            if entrada is not None:
+                _contar(nome, 'hits')
+                return _resposta(request, entrada, 'HIT')
+
+            _contar(nome, 'misses')
+            response = view(request, *args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response
+            conteudo = JSONRenderer().render(response.data)
+            entrada = (conteudo, f'"{hashlib.sha1(conteudo).hexdigest()}"', int(time.time()))
+            ttl = settings.CATALOGO_CACHE_TTL
+            # A view pode limitar a validade (ex.: destaques até a próxima promoção)
+            cache_ate = getattr(response, 'cache_ate', None)
+            if cache_ate is not None:
+                ttl = max(1, min(ttl, math.ceil(cache_ate - time.time())))
+            cache.set(chave, entrada, ttl)
+            return _resposta(request, entrada, 'MISS')
+        return wrapper
+    return decorador
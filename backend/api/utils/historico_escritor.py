@@ -0,0 +1,154 @@
+"""
+Gravação assíncrona do histórico de produtos
+
+As entradas entram em uma fila limitada em memória e uma thread em segundo
+plano as grava com INSERTs de várias linhas, quando o lote enche ou a cada
+intervalo. Com a fila cheia, a entrada é gravada na hora (fallback
+síncrono). O que estiver na fila é gravado ao encerrar o processo.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import ProdutoHistorico
+
+
+logger = logging.getLogger(__name__)
+
+
+class EscritorHistorico:
+    """Fila + thread que grava ProdutoHistorico em lotes"""
+
+    def __init__(self, capacidade, tamanho_lote, intervalo):
+        self.fila = queue.Queue(maxsize=capacidade)
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._thread = None
+        self._iniciar_lock = threading.Lock()
+        self._parar = threading.Event()
+        self._metricas_lock = threading.Lock()
+        self._metricas = {
+            'enfileiradas': 0,
+            'gravadas': 0,
+            'lotes': 0,
+            'sincronas': 0,
+            'falhas': 0,
+            'descartadas': 0,
+        }
+
+    def _contar(self, **valores):
+        with self._metricas_lock:
+            for nome, quantidade in valores.items():
+                self._metricas[nome] += quantidade
+
+    def _garantir_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._iniciar_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name='historico', daemon=True)
+                self._thread.start()
+
+    def registrar(self, entrada):
+        """Enfileira uma entrada (ProdutoHistorico não salvo)"""
+        if self._parar.is_set():
+            # Processo encerrando: não há mais thread para esvaziar a fila
+            self._gravar_sincrono([entrada])
+            return
+        self._garantir_thread()
+        try:
+            self.fila.put_nowait(entrada)
+            self._contar(enfileiradas=1)
+        except queue.Full:
+            self._gravar_sincrono([entrada])
+
+    def _gravar_sincrono(self, entradas):
+        self._contar(sincronas=len(entradas))
+        try:
+            ProdutoHistorico.objects.bulk_create(entradas)
+            self._contar(gravadas=len(entradas))
+        except Exception:
+            self._contar(falhas=len(entradas), descartadas=len(entradas))
+            logger.exception('Erro ao gravar %s entrada(s) do histórico', len(entradas))
+
+    def _proximo_lote(self, espera):
+        """
+        Aguarda até `espera` segundos pela primeira entrada e continua juntando
+        até o lote encher ou `espera` segundos após a primeira.
+        """
+        try:
+            lote = [self.fila.get(timeout=espera) if espera else self.fila.get_nowait()]
+        except queue.Empty:
+            return []
+        limite = time.monotonic() + espera
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            try:
+                if restante > 0 and not self._parar.is_set():
+                    lote.append(self.fila.get(timeout=restante))
+                else:
+                    lote.append(self.fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _gravar_lote(self, lote):
+        close_old_connections()
+        try:
+            ProdutoHistorico.objects.bulk_create(lote)
+            self._contar(gravadas=len(lote), lotes=1)
+        except Exception:
+            # Um registro inválido não deve levar o lote inteiro: tenta um a um
+            logger.exception('Erro ao gravar lote de %s entrada(s) do histórico', len(lote))
+            for entrada in lote:
+                try:
+                    ProdutoHistorico.objects.bulk_create([entrada])
+                    self._contar(gravadas=1)
+                except Exception:
+                    self._contar(falhas=1, descartadas=1)
+                    logger.exception('Entrada do histórico descartada (produto %s)', entrada.produto_idproduto)
+        finally:
+            for _ in lote:
+                self.fila.task_done()
+
+    def _executar(self):
+        while not self._parar.is_set():
+            lote = self._proximo_lote(self.intervalo)
+            if lote:
+                self._gravar_lote(lote)
+        close_old_connections()
+
+    def esvaziar(self):
+        """Grava imediatamente tudo o que está na fila (na thread chamadora)"""
+        while True:
+            lote = self._proximo_lote(0)
+            if not lote:
+                return
+            self._gravar_lote(lote)
+
+    def encerrar(self, timeout=5):
+        """Para a thread e grava o que restou na fila"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.esvaziar()
+
+    def estatisticas(self):
+        with self._metricas_lock:
+            metricas = dict(self._metricas)
+        metricas['fila'] = self.fila.qsize()
+        metricas['capacidade'] = self.fila.maxsize
+        return metricas
+
+
+escritor = EscritorHistorico(
+    capacidade=getattr(settings, 'HISTORICO_FILA_MAXIMO', 10000),
+    tamanho_lote=getattr(settings, 'HISTORICO_LOTE', 200),
+    intervalo=getattr(settings, 'HISTORICO_INTERVALO', 1.0),
+)
+atexit.register(escritor.encerrar)
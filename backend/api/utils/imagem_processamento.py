@@ -0,0 +1,90 @@
+"""
+Geração das variações (derivados) das imagens de produtos
+
+Cada imagem enviada gera tamanhos fixos em WebP e JPEG (fallback), além de
+um placeholder minúsculo em data URI para exibir enquanto a imagem carrega.
+"""
+import base64
+import io
+
+from PIL import Image, ImageOps
+
+
+# Largura/altura máxima de cada variação (a proporção é mantida)
+VARIANTES = {
+    'thumb': 150,
+    'card': 300,
+    'full': 1200,
+}
+
+FORMATOS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+TAMANHO_PLACEHOLDER = 16
+
+
+def _codificar(imagem, formato):
+    """Codifica a imagem Pillow no formato pedido e retorna os bytes"""
+    formato_pil, _, opcoes = FORMATOS[formato]
+    if formato == 'jpeg' and imagem.mode != 'RGB':
+        # JPEG não suporta transparência: compor sobre fundo branco
+        fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+        if imagem.mode in ('RGBA', 'LA') or 'transparency' in imagem.info:
+            rgba = imagem.convert('RGBA')
+            fundo.paste(rgba, mask=rgba.getchannel('A'))
+        else:
+            fundo.paste(imagem.convert('RGB'))
+        imagem = fundo
+    buffer = io.BytesIO()
+    imagem.save(buffer, formato_pil, **opcoes)
+    return buffer.getvalue()
+
+
+def gerar_placeholder(imagem):
+    """Gera um placeholder JPEG de poucos bytes em formato data URI"""
+    miniatura = imagem.copy()
+    miniatura.thumbnail((TAMANHO_PLACEHOLDER, TAMANHO_PLACEHOLDER))
+    buffer = io.BytesIO()
+    if miniatura.mode != 'RGB':
+        miniatura = miniatura.convert('RGB')
+    miniatura.save(buffer, 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def gerar_derivados(conteudo):
+    """
+    Processa o conteúdo original de uma imagem.
+
+    Retorna as dimensões do original, o placeholder e a lista de derivados
+    (variante, formato, mime_type, largura, altura, conteudo).
+    """
+    with Image.open(io.BytesIO(conteudo)) as original:
+        original.load()
+        # Respeitar a orientação gravada pela câmera (EXIF)
+        imagem = ImageOps.exif_transpose(original)
+        if imagem.mode not in ('RGB', 'RGBA'):
+            imagem = imagem.convert('RGBA' if 'transparency' in imagem.info or imagem.mode in ('LA', 'PA') else 'RGB')
+
+        derivados = []
+        for variante, limite in VARIANTES.items():
+            redimensionada = imagem.copy()
+            # thumbnail nunca amplia: imagens pequenas mantêm o tamanho original
+            redimensionada.thumbnail((limite, limite), Image.LANCZOS)
+            for formato, (_, mime_type, _) in FORMATOS.items():
+                derivados.append({
+                    'variante': variante,
+                    'formato': formato,
+                    'mime_type': mime_type,
+                    'largura': redimensionada.width,
+                    'altura': redimensionada.height,
+                    'conteudo': _codificar(redimensionada, formato),
+                })
+
+        return {
+            'largura': imagem.width,
+            'altura': imagem.height,
+            'placeholder': gerar_placeholder(imagem),
+            'derivados': derivados,
+        }
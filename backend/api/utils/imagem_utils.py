@@ -0,0 +1,40 @@
+"""
+Utilitários para imagens de produtos
+"""
+import hashlib
+
+
+# Assinaturas (magic bytes) dos formatos aceitos
+_ASSINATURAS = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+def para_bytes(imagem_data):
+    """Garante que o conteúdo seja bytes (pode vir como memoryview ou bytes)"""
+    if imagem_data is None:
+        return None
+    if isinstance(imagem_data, memoryview):
+        return imagem_data.tobytes()
+    if isinstance(imagem_data, bytes):
+        return imagem_data
+    return bytes(imagem_data)
+
+
+def detectar_mime(cabecalho):
+    """Detecta o MIME type real da imagem a partir dos primeiros bytes"""
+    cabecalho = para_bytes(cabecalho) or b''
+    for assinatura, mime in _ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return mime
+    if cabecalho[:4] == b'RIFF' and cabecalho[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def hash_sha256(conteudo):
+    """Retorna o SHA-256 (hex) do conteúdo da imagem"""
+    return hashlib.sha256(para_bytes(conteudo)).hexdigest()
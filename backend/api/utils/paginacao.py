@@ -0,0 +1,109 @@
+"""
+Utilitários de paginação por cursor (keyset)
+
+O cursor é opaco para o cliente: guarda os valores da chave de ordenação do
+último item entregue. A próxima página continua a partir desses valores, de
+modo que páginas profundas custam o mesmo que a primeira e inserções
+concorrentes não deslocam os itens já lidos.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+LIMITE_MAXIMO = 100
+
+
+def codificar_cursor(ordenacao, valores):
+    """Gera o cursor opaco a partir da ordenação e dos valores da chave"""
+    conteudo = json.dumps({'o': ordenacao, 'v': valores}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(conteudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, ordenacao):
+    """Retorna os valores da chave guardados no cursor (ValueError se inválido)"""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        conteudo = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        valores = conteudo['v']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Cursor inválido')
+    if conteudo.get('o') != ordenacao or not isinstance(valores, list):
+        raise ValueError('O cursor não corresponde à ordenação pedida')
+    return valores
+
+
+def parametros_da_requisicao(query_params):
+    """
+    Lê ?limit= e ?cursor= da requisição.
+
+    Retorna (limite, cursor); limite é None quando a paginação não foi pedida.
+    """
+    limite = query_params.get('limit')
+    cursor = query_params.get('cursor') or None
+    if limite is None and cursor is None:
+        return None, None
+    try:
+        limite = int(limite) if limite is not None else LIMITE_MAXIMO
+    except ValueError:
+        raise ValueError('O parâmetro limit deve ser um número inteiro')
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        raise ValueError(f'O parâmetro limit deve estar entre 1 e {LIMITE_MAXIMO}')
+    return limite, cursor
+
+
+def condicao_keyset(colunas, valores):
+    """
+    Monta a condição SQL "depois do cursor" para uma ordenação.
+
+    `colunas` é uma sequência de (expressão, 'ASC'|'DESC'). Quando todas têm a
+    mesma direção usa comparação de tuplas, que aproveita índices compostos.
+    """
+    direcoes = {direcao for _, direcao in colunas}
+    if len(direcoes) == 1:
+        operador = '>' if direcoes == {'ASC'} else '<'
+        expressoes = ', '.join(expressao for expressao, _ in colunas)
+        marcadores = ', '.join(['%s'] * len(colunas))
+        return f'({expressoes}) {operador} ({marcadores})', list(valores)
+
+    alternativas = []
+    parametros = []
+    for indice, (expressao, direcao) in enumerate(colunas):
+        partes = [f'{anterior} = %s' for anterior, _ in colunas[:indice]]
+        partes.append(f"{expressao} {'>' if direcao == 'ASC' else '<'} %s")
+        alternativas.append('(' + ' AND '.join(partes) + ')')
+        parametros += list(valores[:indice + 1])
+    return '(' + ' OR '.join(alternativas) + ')', parametros
+
+
+def paginar_queryset(queryset, campos, limite, cursor=None):
+    """
+    Pagina um queryset por keyset.
+
+    `campos` segue a sintaxe do order_by (ex.: ['-data_acao', '-idproduto_historico'])
+    e deve terminar em um campo único. Retorna (itens, proximo_cursor).
+    """
+    ordenacao = ','.join(campos)
+    queryset = queryset.order_by(*campos)
+
+    if cursor:
+        valores = decodificar_cursor(cursor, ordenacao)
+        if len(valores) != len(campos):
+            raise ValueError('Cursor inválido')
+        filtro = Q()
+        for indice, campo in enumerate(campos):
+            nome = campo.lstrip('-')
+            condicao = Q(**{f"{nome}__{'lt' if campo.startswith('-') else 'gt'}": valores[indice]})
+            for anterior, valor in zip(campos[:indice], valores[:indice]):
+                condicao &= Q(**{anterior.lstrip('-'): valor})
+            filtro |= condicao
+        queryset = queryset.filter(filtro)
+
+    itens = list(queryset[:limite + 1])
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        proximo_cursor = codificar_cursor(ordenacao, [getattr(ultimo, campo.lstrip('-')) for campo in campos])
+    return itens, proximo_cursor
@@ -1,8 +1,18 @@
 """
 Utilitários para registrar histórico de produtos
 """
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from ..models import ProdutoHistorico
+from .historico_escritor import escritor
+from .paginacao import paginar_queryset
+
+# Chave keyset do histórico: mais recentes primeiro, ID desempata
+ORDENACAO_HISTORICO = ['-data_acao', '-idproduto_historico']
+LIMITE_HISTORICO = 20
+# Campos de dados_novos que descrevem a ação, não o estado do produto
+CAMPOS_SO_DO_EVENTO = ('imagens_adicionadas', 'imagens_removidas')
 
 
 def registrar_historico_produto(produto_id, usuario_id, acao, dados_anteriores=None, dados_novos=None, observacao=None):
@@ -16,34 +26,138 @@ def registrar_historico_produto(produto_id, usuario_id, acao, dados_anteriores=N
         dados_anteriores: Dicionário com estado anterior (para edições)
         dados_novos: Dicionário com novo estado
         observacao: Observação opcional sobre a alteração
+
+    A gravação é assíncrona (api/utils/historico_escritor.py). Dentro de
+    transaction.atomic, a entrada só é enfileirada depois do commit: uma
+    alteração desfeita não deixa histórico.
     """
-    try:
-        ProdutoHistorico.objects.create(
+    registrar_historicos_produtos(
+        [(produto_id, dados_anteriores, dados_novos)],
+        usuario_id=usuario_id,
+        acao=acao,
+        observacao=observacao,
+    )
+    return True
+
+
+def registrar_historicos_produtos(registros, usuario_id, acao, observacao=None):
+    """
+    Registra várias ações no histórico.
+
+    `registros` é uma lista de (produto_id, dados_anteriores, dados_novos).
+    Edições guardam só os campos alterados (reconstruir_produto reaplica
+    as diferenças); edições sem alteração não são registradas.
+    """
+    data_acao = timezone.now()
+    entradas = []
+    for produto_id, dados_anteriores, dados_novos in registros:
+        if acao == 'editado':
+            dados_anteriores, dados_novos = diferenca_compacta(dados_anteriores, dados_novos)
+            if not dados_novos:
+                continue
+        entradas.append(ProdutoHistorico(
             produto_idproduto=produto_id,
             usuario_idusuario=usuario_id,
             acao=acao,
             dados_anteriores=dados_anteriores,
             dados_novos=dados_novos,
             observacao=observacao,
-            data_acao=timezone.now()
-        )
-        return True
-    except Exception as e:
-        print(f'Erro ao registrar histórico: {e}')
-        return False
+            data_acao=data_acao,
+        ))
+    if not entradas:
+        return
+
+    def enfileirar():
+        for entrada in entradas:
+            escritor.registrar(entrada)
+
+    transaction.on_commit(enfileirar)
+
+
+def diferenca_compacta(dados_anteriores, dados_novos):
+    """
+    Reduz um par antes/depois aos campos que mudaram.
+
+    Campos só presentes em dados_novos (ex.: imagens_adicionadas) são mantidos.
+    """
+    anteriores = dados_anteriores or {}
+    novos = dados_novos or {}
+    alterados = [campo for campo, valor in novos.items() if campo not in anteriores or anteriores[campo] != valor]
+    return (
+        {campo: anteriores[campo] for campo in alterados if campo in anteriores},
+        {campo: novos[campo] for campo in alterados},
+    )
+
+
+def obter_historico_produto(produto_id, limite=LIMITE_HISTORICO, cursor=None, desde=None):
+    """
+    Retorna (itens, proximo_cursor) do histórico de um produto, mais
+    recentes primeiro, paginado por keyset (índice produto_idproduto, data_acao).
+
+    Com `desde`, só as partições mensais a partir dessa data são lidas.
+    """
+    historico = ProdutoHistorico.objects.filter(produto_idproduto=produto_id)
+    if desde:
+        historico = historico.filter(data_acao__gte=desde)
+    return paginar_queryset(historico, ORDENACAO_HISTORICO, limite, cursor)
 
 
-def obter_historico_produto(produto_id):
-    """Retorna o histórico completo de um produto"""
-    return ProdutoHistorico.objects.filter(
-        produto_idproduto=produto_id
-    ).order_by('-data_acao')
+def obter_historico_por_usuario(usuario_id, limite=LIMITE_HISTORICO, cursor=None, desde=None):
+    """
+    Retorna (itens, proximo_cursor) das ações de um usuário, mais recentes
+    primeiro, paginado por keyset (índice usuario_idusuario, data_acao).
+    """
+    historico = ProdutoHistorico.objects.filter(usuario_idusuario=usuario_id)
+    if desde:
+        historico = historico.filter(data_acao__gte=desde)
+    return paginar_queryset(historico, ORDENACAO_HISTORICO, limite, cursor)
 
 
-def obter_historico_por_usuario(usuario_id):
-    """Retorna o histórico de ações de um usuário"""
-    return ProdutoHistorico.objects.filter(
-        usuario_idusuario=usuario_id
-    ).order_by('-data_acao')
+def reconstruir_produto(produto_id, versao):
+    """
+    Reconstrói o produto como ficou após a entrada `versao` do histórico.
 
+    Parte do registro de criação e reaplica os campos alterados de cada
+    edição, em ordem. Retorna None se a versão não pertence ao produto.
+    `estado` é None quando o produto estava deletado; `completo` é False
+    quando o histórico não tem a criação (produtos anteriores ao histórico).
+    Ações sobre imagens não entram no estado.
+    """
+    try:
+        alvo = ProdutoHistorico.objects.get(idproduto_historico=versao, produto_idproduto=produto_id)
+    except ProdutoHistorico.DoesNotExist:
+        return None
+
+    entradas = (
+        ProdutoHistorico.objects
+        .filter(produto_idproduto=produto_id)
+        .filter(
+            Q(data_acao__lt=alvo.data_acao)
+            | Q(data_acao=alvo.data_acao, idproduto_historico__lte=alvo.idproduto_historico)
+        )
+        .order_by('data_acao', 'idproduto_historico')
+        .values_list('acao', 'dados_novos')
+    )
+    estado = {}
+    completo = False
+    for acao, dados_novos in entradas.iterator():
+        if acao == 'criado':
+            estado = dict(dados_novos or {})
+            completo = True
+        elif acao == 'deletado':
+            estado = None
+        else:
+            if estado is None:
+                estado = {}
+            estado.update({
+                campo: valor for campo, valor in (dados_novos or {}).items()
+                if campo not in CAMPOS_SO_DO_EVENTO
+            })
 
+    return {
+        'versao': alvo.idproduto_historico,
+        'acao': alvo.acao,
+        'data_acao': alvo.data_acao.isoformat() if alvo.data_acao else None,
+        'completo': completo,
+        'estado': estado,
+    }
@@ -0,0 +1,85 @@
+"""
+Serialização rápida para as respostas somente leitura do catálogo
+
+Os serializers do DRF passam cada valor de cada linha pela maquinaria
+genérica de campos. Aqui a ordem das chaves e os conversores são definidos
+uma vez e compilados em uma função que transforma uma tupla de values_list
+em dicionário, com o mesmo formato JSON de ProdutoSerializer/CategoriaSerializer.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.utils import timezone
+
+
+_CENTAVOS = Decimal('0.01')
+
+
+def decimal_para_str(valor, casas=2):
+    """Formata Decimal como o DecimalField do DRF (string com casas fixas)"""
+    if valor is None:
+        return None
+    if not isinstance(valor, Decimal):
+        valor = Decimal(valor)
+    quantum = _CENTAVOS if casas == 2 else Decimal(1).scaleb(-casas)
+    return '{:f}'.format(valor.quantize(quantum, rounding=ROUND_HALF_UP))
+
+
+def data_hora_para_str(valor):
+    """Formata datetime como o DateTimeField do DRF (fuso atual, 'Z' para UTC)"""
+    if valor is None:
+        return None
+    fuso = timezone.get_current_timezone()
+    if timezone.is_naive(valor):
+        valor = timezone.make_aware(valor, fuso)
+    texto = valor.astimezone(fuso).isoformat()
+    if texto.endswith('+00:00'):
+        texto = texto[:-6] + 'Z'
+    return texto
+
+
+def compilar(campos):
+    """
+    Gera a função linha -> dicionário para `campos`.
+
+    `campos` é uma sequência de (nome, conversor ou None), na ordem das
+    colunas da linha. Cada valor passa no máximo por um conversor; as
+    colunas sem conversor são copiadas de uma vez por zip.
+    """
+    nomes = tuple(nome for nome, _ in campos)
+    convertidos = tuple(
+        (nome, indice, conversor)
+        for indice, (nome, conversor) in enumerate(campos)
+        if conversor is not None
+    )
+
+    def serializar(linha):
+        item = dict(zip(nomes, linha))
+        for nome, indice, conversor in convertidos:
+            item[nome] = conversor(linha[indice])
+        return item
+
+    return serializar
+
+
+# Mesmo formato de CategoriaSerializer
+CAMPOS_CATEGORIA = (
+    ('idcategoria', None),
+    ('nome', None),
+    ('descricao', None),
+    ('icone', None),
+    ('data_criacao', data_hora_para_str),
+)
+COLUNAS_CATEGORIA = tuple(nome for nome, _ in CAMPOS_CATEGORIA)
+serializar_categoria = compilar(CAMPOS_CATEGORIA)
+
+# Mesmo formato de ProdutoSerializer
+CAMPOS_PRODUTO = (
+    ('idproduto', None),
+    ('nome', None),
+    ('descricao', None),
+    ('valor', decimal_para_str),
+    ('estoque', None),
+    ('media_avaliacao', decimal_para_str),
+)
+COLUNAS_PRODUTO = tuple(nome for nome, _ in CAMPOS_PRODUTO)
+serializar_produto = compilar(CAMPOS_PRODUTO)
@@ -0,0 +1,94 @@
+"""
+Cache dos usuários autenticados, por ID
+
+A autenticação monta o usuário a partir das claims do token
+(api/jwt_auth.py); a linha de Usuario só é lida quando a view precisa de
+um campo que o token não traz (ex.: admin). Aqui essas linhas ficam em
+memória por poucos segundos, em um LRU de tamanho limitado.
+
+Alterações em usuários (Usuario.save/delete, inclusive pelo set_admin.py)
+removem a entrada local e incrementam uma versão no cache do Django; com
+um backend compartilhado (Redis) os outros processos descartam as entradas
+antigas na próxima leitura. Com o cache local, o TTL limita a defasagem.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ..models import Usuario
+
+
+CHAVE_VERSAO = 'usuarios:versao'
+
+_entradas = OrderedDict()
+_lock = threading.Lock()
+_metricas = {'acertos': 0, 'falhas': 0, 'invalidacoes': 0}
+
+
+def _ttl():
+    return getattr(settings, 'USUARIO_CACHE_TTL', 30)
+
+
+def _maximo():
+    return getattr(settings, 'USUARIO_CACHE_MAXIMO', 1000)
+
+
+def _versao():
+    return cache.get(CHAVE_VERSAO, 0)
+
+
+def obter(usuario_id):
+    """Usuario com o ID informado (None se não existir), do cache ou do banco"""
+    versao = _versao()
+    agora = time.monotonic()
+    with _lock:
+        entrada = _entradas.get(usuario_id)
+        if entrada is not None and entrada[0] > agora and entrada[1] == versao:
+            _entradas.move_to_end(usuario_id)
+            _metricas['acertos'] += 1
+            return entrada[2]
+        _metricas['falhas'] += 1
+
+    # Usuário inexistente também é guardado, para um token de conta removida
+    # não consultar o banco a cada requisição
+    usuario = Usuario.objects.filter(idusuario=usuario_id).first()
+    with _lock:
+        _entradas[usuario_id] = (agora + _ttl(), versao, usuario)
+        _entradas.move_to_end(usuario_id)
+        while len(_entradas) > _maximo():
+            _entradas.popitem(last=False)
+    return usuario
+
+
+def _descartar(usuario_id):
+    with _lock:
+        _entradas.pop(usuario_id, None)
+        _metricas['invalidacoes'] += 1
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.add(CHAVE_VERSAO, time.time_ns(), None)
+
+
+def invalidar(usuario_id):
+    """Descarta o usuário do cache assim que a transação atual confirmar"""
+    transaction.on_commit(lambda: _descartar(usuario_id))
+
+
+def limpar():
+    """Esvazia o cache local"""
+    with _lock:
+        _entradas.clear()
+
+
+def estatisticas():
+    with _lock:
+        metricas = dict(_metricas)
+        metricas['entradas'] = len(_entradas)
+    metricas['maximo'] = _maximo()
+    metricas['ttl'] = _ttl()
+    return metricas
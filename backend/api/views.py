@@ -3,12 +3,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.tokens import UntypedToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from django.contrib.auth.models import AnonymousUser
 from .serializers import RegisterSerializer, LoginSerializer, UsuarioSerializer
-from .services import AuthService
+from .services import AuthService, token_service
 from .models import Usuario
+from .permissions import IsAdminUsuario
+from .utils import historico_escritor, usuario_cache
 
 
 def format_response(status_type, message, data=None, status_code=200):
@@ -100,33 +99,13 @@ def admin_login(request):
 @permission_classes([IsAuthenticated])
 def verify_token(request):
     """Verifica se o token é válido"""
-    # Se chegou aqui, o token é válido (middleware já validou)
-    if hasattr(request.user, 'idusuario') and not isinstance(request.user, AnonymousUser):
-        user_data = {
-            'id': request.user.idusuario,
-            'email': request.user.email,
-            'nome': request.user.nome,
-            'admin': request.user.admin,
-        }
-    else:
-        # Tentar extrair do token diretamente
-        from rest_framework_simplejwt.tokens import UntypedToken
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        if auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            try:
-                decoded = UntypedToken(token)
-                user_data = {
-                    'id': decoded.get('id'),
-                    'email': decoded.get('email'),
-                    'nome': decoded.get('nome'),
-                    'admin': decoded.get('admin', 0),
-                }
-            except Exception:
-                return format_response('error', 'Token inválido', None, status.HTTP_401_UNAUTHORIZED)
-        else:
-            return format_response('error', 'Token não fornecido', None, status.HTTP_401_UNAUTHORIZED)
-    
+    # Se chegou aqui, o token é válido (a autenticação do DRF já validou)
+    user_data = {
+        'id': request.user.idusuario,
+        'email': request.user.email,
+        'nome': request.user.nome,
+        'admin': request.user.admin,
+    }
     return format_response('success', 'Token válido', {'user': user_data, 'valid': True}, status.HTTP_200_OK)
 
 
@@ -135,27 +114,9 @@ def verify_token(request):
 def get_me(request):
     """Retorna dados do usuário autenticado"""
     try:
-        # Buscar usuário pelo ID do token
-        user_id = None
-        if hasattr(request.user, 'idusuario') and not isinstance(request.user, AnonymousUser):
-            user_id = request.user.idusuario
-        else:
-            # Tentar extrair do token
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-                try:
-                    decoded = UntypedToken(token)
-                    user_id = decoded.get('id')
-                except (InvalidToken, TokenError):
-                    pass
-        
-        if user_id:
-            user = Usuario.objects.get(idusuario=user_id)
-            serializer = UsuarioSerializer(user)
-            return format_response('success', 'Dados do usuário', serializer.data, status.HTTP_200_OK)
-        else:
-            return format_response('error', 'Usuário não encontrado', None, status.HTTP_404_NOT_FOUND)
+        user = Usuario.objects.get(idusuario=request.user.idusuario)
+        serializer = UsuarioSerializer(user)
+        return format_response('success', 'Dados do usuário', serializer.data, status.HTTP_200_OK)
     except Usuario.DoesNotExist:
         return format_response('error', 'Usuário não encontrado', None, status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -165,6 +126,17 @@ def get_me(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def health_check(request):
-    """Health check endpoint"""
+    """Health check endpoint (público: sem dados internos)"""
     return format_response('success', 'API está funcionando', {'status': 'healthy'}, status.HTTP_200_OK)
 
+
+@api_view(['GET'])
+@permission_classes([IsAdminUsuario.para('consultar o diagnóstico')])
+def diagnostico(request):
+    """Fila de gravação do histórico e caches de usuários e tokens (apenas admin)"""
+    return format_response('success', 'Diagnóstico da API', {
+        'historico': historico_escritor.escritor.estatisticas(),
+        'usuarios': usuario_cache.estatisticas(),
+        'tokens': token_service.estatisticas(),
+    }, status.HTTP_200_OK)
+
@@ -0,0 +1,133 @@
+"""
+Views para servir imagens de produtos em formato binário
+"""
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotFound, HttpResponseNotModified
+from django.views.decorators.http import require_http_methods
+
+from .services import imagem_service
+from .utils.armazenamento import obter_armazenamento
+
+
+# O conteúdo de uma imagem nunca muda para o mesmo ID (edições inserem novas linhas)
+CACHE_CONTROL_IMAGEM = 'public, max-age=31536000, immutable'
+# Enquanto o derivado não é gerado, o original é servido por pouco tempo
+CACHE_CONTROL_PROVISORIO = 'public, max-age=60'
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _intervalo_solicitado(range_header, tamanho):
+    """
+    Interpreta um cabeçalho Range de intervalo único.
+
+    Retorna (inicio, fim) inclusivo, None se o cabeçalho deve ser ignorado
+    ou False se o intervalo não pode ser atendido.
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+    inicio, fim = match.groups()
+    if not inicio and not fim:
+        return None
+    if not inicio:
+        # Sufixo: últimos N bytes
+        sufixo = int(fim)
+        if sufixo == 0:
+            return False
+        return max(tamanho - sufixo, 0), tamanho - 1
+    inicio = int(inicio)
+    fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        return False
+    return inicio, fim
+
+
+def _etag_confere(if_none_match, etag):
+    """Verifica se o If-None-Match enviado pelo cliente corresponde ao ETag"""
+    valores = [valor.strip() for valor in if_none_match.split(',')]
+    return '*' in valores or etag in valores or f'W/{etag}' in valores
+
+
+@require_http_methods(['GET', 'HEAD'])
+def obter_imagem(request, imagem_id):
+    """
+    Retorna os bytes de uma imagem com ETag, Cache-Control e suporte a Range.
+
+    O parâmetro ?tamanho=thumb|card|full seleciona um derivado, em WebP
+    quando o cliente aceita e em JPEG caso contrário.
+    """
+    tamanho_variante = request.GET.get('tamanho')
+    if tamanho_variante and not imagem_service.variante_valida(tamanho_variante):
+        return HttpResponse('Tamanho inválido', status=400, content_type='text/plain; charset=utf-8')
+
+    aceita_webp = 'image/webp' in request.META.get('HTTP_ACCEPT', '')
+    metadados = imagem_service.obter_metadados(imagem_id, tamanho_variante, aceita_webp)
+    if not metadados:
+        return HttpResponseNotFound()
+
+    etag = f'"{metadados["hash_sha256"]}"'
+    tamanho = metadados['tamanho']
+    cache_control = CACHE_CONTROL_PROVISORIO if metadados['provisorio'] else CACHE_CONTROL_IMAGEM
+
+    if _etag_confere(request.META.get('HTTP_IF_NONE_MATCH', ''), etag):
+        resposta = HttpResponseNotModified()
+        resposta['ETag'] = etag
+        resposta['Cache-Control'] = cache_control
+        if tamanho_variante:
+            resposta['Vary'] = 'Accept'
+        return resposta
+
+    if settings.IMAGENS_X_ACCEL_PREFIXO and not metadados['no_banco']:
+        # O nginx envia o arquivo (inclusive Range) direto do disco
+        resposta = HttpResponse(content_type=metadados['mime_type'])
+        resposta['X-Accel-Redirect'] = settings.IMAGENS_X_ACCEL_PREFIXO + obter_armazenamento().caminho_relativo(metadados['hash_sha256'])
+        return _com_cabecalhos(resposta, etag, cache_control, tamanho_variante)
+
+    intervalo = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        intervalo = _intervalo_solicitado(range_header, tamanho)
+        if intervalo is False:
+            resposta = HttpResponse(status=416)
+            resposta['Content-Range'] = f'bytes */{tamanho}'
+            return resposta
+
+    try:
+        if intervalo:
+            inicio, fim = intervalo
+            conteudo = b'' if request.method == 'HEAD' else imagem_service.ler_conteudo(
+                imagem_id, inicio, fim - inicio + 1, metadados['variante'], metadados['formato'],
+            )
+            resposta = HttpResponse(conteudo, status=206, content_type=metadados['mime_type'])
+            resposta['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+            resposta['Content-Length'] = str(fim - inicio + 1)
+        else:
+            arquivo = None if request.method == 'HEAD' else imagem_service.abrir_arquivo(metadados)
+            if arquivo is not None:
+                # FileResponse usa o wsgi.file_wrapper do servidor (sendfile) quando disponível
+                resposta = FileResponse(arquivo, content_type=metadados['mime_type'])
+            else:
+                conteudo = b'' if request.method == 'HEAD' else imagem_service.ler_conteudo(
+                    imagem_id, variante=metadados['variante'], formato=metadados['formato'],
+                )
+                resposta = HttpResponse(conteudo, content_type=metadados['mime_type'])
+            resposta['Content-Length'] = str(tamanho)
+    except FileNotFoundError:
+        return HttpResponseNotFound()
+
+    resposta['Accept-Ranges'] = 'bytes'
+    return _com_cabecalhos(resposta, etag, cache_control, tamanho_variante)
+
+
+def _com_cabecalhos(resposta, etag, cache_control, tamanho_variante):
+    """Aplica os cabeçalhos de cache comuns às respostas com conteúdo"""
+    resposta['ETag'] = etag
+    resposta['Cache-Control'] = cache_control
+    if tamanho_variante:
+        # O formato (WebP/JPEG) depende do Accept enviado pelo cliente
+        resposta['Vary'] = 'Accept'
+    return resposta
@@ -1,19 +1,30 @@
 """
 Views para produtos, categorias e destaques
 """
+from decimal import Decimal
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from django.db import connection
-from django.utils import timezone
-from rest_framework_simplejwt.tokens import UntypedToken
-from .models import Produto, Categoria, Destaque, ProdutoHasCategoria, Usuario
-from .serializers import ProdutoSerializer, CategoriaSerializer, DestaqueSerializer
-from .utils.produto_historico import registrar_historico_produto
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from .models import Produto, Categoria
+from .permissions import IsAdminUsuario
+from .serializers import ProdutoSerializer, CategoriaSerializer
+from .services import catalogo_service, exportacao_service, importacao_service, imagem_service, produto_service
+from .utils import cache_http, catalogo_cache, paginacao as paginacao_utils, serializacao
+from .utils.produto_historico import (
+    LIMITE_HISTORICO,
+    obter_historico_por_usuario,
+    obter_historico_produto,
+    reconstruir_produto,
+    registrar_historico_produto,
+)
 
 
-def format_response(status_type, message, data=None, status_code=200):
+def format_response(status_type, message, data=None, status_code=200, paginacao=None):
     """Formata resposta no padrão da API"""
     response_data = {
         'status': status_type,
@@ -21,49 +32,49 @@ def format_response(status_type, message, data=None, status_code=200):
     }
     if data is not None:
         response_data['data'] = data
+    if paginacao is not None:
+        response_data['paginacao'] = paginacao
     return Response(response_data, status=status_code)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalogo_cache.snapshot('produtos')
 def listar_produtos(request):
-    """Lista todos os produtos com a primeira imagem"""
+    """
+    Lista os produtos com a primeira imagem (aceita busca, filtros e ordenação).
+
+    ?fields= escolhe os campos (padrão: projeção card, sem descricao);
+    use fields=completo para todos.
+    """
     try:
-        produtos = Produto.objects.all()
-        serializer = ProdutoSerializer(produtos, many=True)
-        produtos_data = serializer.data
-        
-        # Buscar primeira imagem de cada produto (ordem = 1)
-        with connection.cursor() as cursor:
+        # Tamanho da imagem principal (derivado gerado no upload)
+        tamanho = request.query_params.get('tamanho', 'card')
+        if not imagem_service.variante_valida(tamanho):
+            return format_response('error', 'Tamanho de imagem inválido. Use: thumb, card ou full', None, status.HTTP_400_BAD_REQUEST)
+
+        # Busca, filtros, ordenação e paginação (?limit=&cursor=) são aplicados no banco
+        try:
+            filtros = catalogo_service.filtros_da_requisicao(request.query_params)
+            campos = catalogo_service.campos_da_requisicao(request.query_params.get('fields'))
+            limite, cursor = paginacao_utils.parametros_da_requisicao(request.query_params)
+            # Produtos, imagem principal e categorias em uma única consulta
+            produtos_data, proximo_cursor = catalogo_service.listar_produtos(filtros, limite, cursor, campos)
+        except ValueError as e:
+            return format_response('error', str(e), None, status.HTTP_400_BAD_REQUEST)
+
+        if 'imagem_principal' in campos:
             for produto in produtos_data:
-                cursor.execute("""
-                    SELECT imagem 
-                    FROM produto_imagem 
-                    WHERE produto_idproduto = %s AND ordem = 1
-                    LIMIT 1
-                """, [produto['idproduto']])
-                
-                row = cursor.fetchone()
-                if row and row[0]:
-                    # Converter bytes para base64
-                    import base64
-                    imagem_data = row[0]
-                    # Garantir que seja bytes (pode vir como memoryview ou bytes)
-                    if isinstance(imagem_data, memoryview):
-                        imagem_bytes = imagem_data.tobytes()
-                    elif isinstance(imagem_data, bytes):
-                        imagem_bytes = imagem_data
-                    else:
-                        imagem_bytes = bytes(imagem_data)
-                    
-                    imagem_base64 = base64.b64encode(imagem_bytes).decode('utf-8')
-                    # Tentar detectar o tipo de imagem (jpeg, png, etc)
-                    # Por padrão, assumimos JPEG
-                    produto['imagem_principal'] = f"data:image/jpeg;base64,{imagem_base64}"
-                else:
-                    produto['imagem_principal'] = None
-        
-        return format_response('success', 'Produtos listados com sucesso', produtos_data, status.HTTP_200_OK)
+                produto['imagem_principal'] = imagem_service.url_imagem(request, produto['imagem_principal_id'], tamanho)
+
+        paginacao = {'limite': limite, 'proximo_cursor': proximo_cursor} if limite else None
+        response = format_response('success', 'Produtos listados com sucesso', produtos_data, status.HTTP_200_OK, paginacao)
+        # valor_efetivo/em_destaque dependem do período das promoções: o
+        # snapshot não pode sobreviver ao próximo início/fim (em cache)
+        _, proxima_fronteira = catalogo_service.listar_destaques()
+        if proxima_fronteira:
+            response.cache_ate = proxima_fronteira.timestamp()
+        return response
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -72,74 +83,54 @@ def listar_produtos(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+def exportar_produtos(request):
+    """
+    Exporta o catálogo em streaming (NDJSON ou CSV).
+
+    Parâmetros: formato=ndjson|csv e incluir=categorias,destaque.
+    A memória usada é constante: as linhas são lidas em lotes por um
+    cursor do lado do servidor e enviadas conforme são geradas.
+    """
+    formato = request.query_params.get('formato', 'ndjson')
+    if formato not in ('ndjson', 'csv'):
+        return format_response('error', 'Formato inválido. Use: ndjson ou csv', None, status.HTTP_400_BAD_REQUEST)
+    try:
+        inclusoes = exportacao_service.inclusoes_da_requisicao(request.query_params.get('incluir'))
+    except ValueError as e:
+        return format_response('error', str(e), None, status.HTTP_400_BAD_REQUEST)
+
+    produtos = exportacao_service.iterar_produtos(
+        lambda imagem_id: imagem_service.url_imagem(request, imagem_id),
+        inclusoes,
+    )
+    if formato == 'csv':
+        response = StreamingHttpResponse(exportacao_service.linhas_csv(produtos), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="catalogo.csv"'
+    else:
+        response = StreamingHttpResponse(exportacao_service.linhas_ndjson(produtos), content_type='application/x-ndjson')
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@catalogo_cache.snapshot('destaques')
 def listar_destaques(request):
     """Lista produtos em destaque (ativos e dentro do prazo)"""
     try:
-        import base64
-        # Buscar destaques ativos usando SQL direto (já que managed=False)
-        with connection.cursor() as cursor:
-            agora = timezone.now()
-            cursor.execute("""
-                SELECT d.iddestaque, d.produto_idproduto, d.desconto_percentual, 
-                       d.valor_com_desconto, d.ordem,
-                       p.idproduto, p.nome, p.descricao, p.valor, p.estoque, p.media_avaliacao
-                FROM destaque d
-                INNER JOIN produto p ON d.produto_idproduto = p.idproduto
-                WHERE d.ativo = TRUE
-                  AND d.data_inicio <= %s
-                  AND (d.data_fim IS NULL OR d.data_fim >= %s)
-                ORDER BY d.ordem, d.iddestaque
-            """, [agora, agora])
-            
-            rows = cursor.fetchall()
-            
-            resultado = []
-            for row in rows:
-                iddestaque, produto_id, desconto, valor_desconto, ordem, idproduto, nome, descricao, valor, estoque, media = row
-                
-                valor_original = float(valor)
-                desconto_float = float(desconto)
-                valor_com_desconto = valor_original * (1 - desconto_float / 100)
-                
-                # Buscar primeira imagem do produto
-                cursor.execute("""
-                    SELECT imagem 
-                    FROM produto_imagem 
-                    WHERE produto_idproduto = %s AND ordem = 1
-                    LIMIT 1
-                """, [idproduto])
-                
-                imagem_row = cursor.fetchone()
-                imagem_principal = None
-                if imagem_row and imagem_row[0]:
-                    imagem_data = imagem_row[0]
-                    if isinstance(imagem_data, memoryview):
-                        imagem_bytes = imagem_data.tobytes()
-                    elif isinstance(imagem_data, bytes):
-                        imagem_bytes = imagem_data
-                    else:
-                        imagem_bytes = bytes(imagem_data)
-                    imagem_base64 = base64.b64encode(imagem_bytes).decode('utf-8')
-                    imagem_principal = f"data:image/jpeg;base64,{imagem_base64}"
-                
-                resultado.append({
-                    'idproduto': idproduto,
-                    'nome': nome,
-                    'descricao': descricao,
-                    'valor': valor_original,
-                    'estoque': estoque,
-                    'media_avaliacao': float(media),
-                    'imagem_principal': imagem_principal,
-                    'destaque': {
-                        'iddestaque': iddestaque,
-                        'desconto_percentual': desconto_float,
-                        'valor_original': valor_original,
-                        'valor_com_desconto': valor_com_desconto,
-                        'ordem': ordem,
-                    }
-                })
-        
-        return format_response('success', 'Destaques listados com sucesso', resultado, status.HTTP_200_OK)
+        tamanho = request.query_params.get('tamanho', 'full')
+        if not imagem_service.variante_valida(tamanho):
+            return format_response('error', 'Tamanho de imagem inválido. Use: thumb, card ou full', None, status.HTTP_400_BAD_REQUEST)
+
+        # Uma consulta ao modelo de leitura, em cache até a próxima fronteira de promoção
+        resultado, proxima_fronteira = catalogo_service.listar_destaques()
+        for destaque in resultado:
+            destaque['imagem_principal'] = imagem_service.url_imagem(request, destaque['imagem_principal_id'], tamanho)
+
+        response = format_response('success', 'Destaques listados com sucesso', resultado, status.HTTP_200_OK)
+        if proxima_fronteira:
+            # O snapshot não pode sobreviver ao início/fim de uma promoção
+            response.cache_ate = proxima_fronteira.timestamp()
+        return response
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -148,44 +139,43 @@ def listar_destaques(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalogo_cache.snapshot('categorias')
 def listar_categorias(request):
-    """Lista todas as categorias"""
+    """Lista as categorias (paginação opcional por ?limit=&cursor=)"""
     try:
-        categorias = Categoria.objects.all().order_by('nome')
-        serializer = CategoriaSerializer(categorias, many=True)
-        return format_response('success', 'Categorias listadas com sucesso', serializer.data, status.HTTP_200_OK)
+        try:
+            limite, cursor = paginacao_utils.parametros_da_requisicao(request.query_params)
+            colunas = serializacao.COLUNAS_CATEGORIA
+            if limite:
+                categorias, proximo_cursor = paginacao_utils.paginar_queryset(
+                    Categoria.objects.values_list(*colunas, named=True), ['nome', 'idcategoria'], limite, cursor,
+                )
+            else:
+                categorias = Categoria.objects.order_by('nome', 'idcategoria').values_list(*colunas)
+        except ValueError as e:
+            return format_response('error', str(e), None, status.HTTP_400_BAD_REQUEST)
+
+        # Mesmo formato do CategoriaSerializer, sem a maquinaria de campos do DRF
+        categorias_data = [serializacao.serializar_categoria(categoria) for categoria in categorias]
+        paginacao = {'limite': limite, 'proximo_cursor': proximo_cursor} if limite else None
+        return format_response('success', 'Categorias listadas com sucesso', categorias_data, status.HTTP_200_OK, paginacao)
     except Exception as e:
         return format_response('error', str(e), None, status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUsuario.para('consultar o cache do catálogo')])
+def estatisticas_cache_catalogo(request):
+    """Versão do catálogo e acertos/faltas do cache de snapshots por endpoint (apenas admin)"""
+    return format_response('success', 'Estatísticas do cache do catálogo', catalogo_cache.estatisticas(), status.HTTP_200_OK)
+
+
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAdminUsuario.para('cadastrar categorias')])
+@catalogo_cache.invalidar_apos_escrita
 def cadastrar_categoria(request):
     """Cadastra uma nova categoria (apenas admin)"""
     try:
-        # Verificar se o usuário é admin
-        user_id = None
-        if hasattr(request.user, 'idusuario'):
-            user_id = request.user.idusuario
-            user = request.user
-        else:
-            # Tentar extrair do token
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-                try:
-                    decoded = UntypedToken(token)
-                    user_id = decoded.get('id')
-                    user = Usuario.objects.get(idusuario=user_id)
-                except Exception:
-                    return format_response('error', 'Token inválido', None, status.HTTP_401_UNAUTHORIZED)
-            else:
-                return format_response('error', 'Token não fornecido', None, status.HTTP_401_UNAUTHORIZED)
-        
-        # Verificar se é admin
-        if not (user.admin == 1 or user.admin is True):
-            return format_response('error', 'Acesso negado. Apenas administradores podem cadastrar categorias.', None, status.HTTP_403_FORBIDDEN)
-        
         # Validar dados da categoria
         nome = request.data.get('nome', '').strip()
         descricao = request.data.get('descricao', '').strip()
@@ -225,33 +215,11 @@ def cadastrar_categoria(request):
 
 
 @api_view(['DELETE'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAdminUsuario.para('deletar categorias')])
+@catalogo_cache.invalidar_apos_escrita
 def deletar_categoria(request, categoria_id):
     """Deleta uma categoria (apenas admin)"""
     try:
-        # Verificar se o usuário é admin
-        user_id = None
-        if hasattr(request.user, 'idusuario'):
-            user_id = request.user.idusuario
-            user = request.user
-        else:
-            # Tentar extrair do token
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-                try:
-                    decoded = UntypedToken(token)
-                    user_id = decoded.get('id')
-                    user = Usuario.objects.get(idusuario=user_id)
-                except Exception:
-                    return format_response('error', 'Token inválido', None, status.HTTP_401_UNAUTHORIZED)
-            else:
-                return format_response('error', 'Token não fornecido', None, status.HTTP_401_UNAUTHORIZED)
-        
-        # Verificar se é admin
-        if not (user.admin == 1 or user.admin is True):
-            return format_response('error', 'Acesso negado. Apenas administradores podem deletar categorias.', None, status.HTTP_403_FORBIDDEN)
-        
         # Verificar se a categoria existe
         try:
             categoria = Categoria.objects.get(idcategoria=categoria_id)
@@ -283,32 +251,13 @@ def deletar_categoria(request, categoria_id):
 
 
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAdminUsuario.para('cadastrar produtos')])
+@catalogo_cache.invalidar_apos_escrita
 def cadastrar_produto(request):
     """Cadastra um novo produto (apenas admin)"""
     try:
-        # Verificar se o usuário é admin
-        user_id = None
-        if hasattr(request.user, 'idusuario'):
-            user_id = request.user.idusuario
-            user = request.user
-        else:
-            # Tentar extrair do token
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-                try:
-                    decoded = UntypedToken(token)
-                    user_id = decoded.get('id')
-                    user = Usuario.objects.get(idusuario=user_id)
-                except Exception:
-                    return format_response('error', 'Token inválido', None, status.HTTP_401_UNAUTHORIZED)
-            else:
-                return format_response('error', 'Token não fornecido', None, status.HTTP_401_UNAUTHORIZED)
-        
-        # Verificar se é admin
-        if not (user.admin == 1 or user.admin is True):
-            return format_response('error', 'Acesso negado. Apenas administradores podem cadastrar produtos.', None, status.HTTP_403_FORBIDDEN)
+        user = request.user
+        user_id = user.idusuario
         
         # Validar dados do produto
         nome = request.data.get('nome', '').strip()
@@ -365,9 +314,28 @@ def cadastrar_produto(request):
         for img in imagens:
             if img.size > 5 * 1024 * 1024:
                 return format_response('error', f'A imagem {img.name} excede o tamanho máximo de 5MB', None, status.HTTP_400_BAD_REQUEST)
+            if not imagem_service.detectar_mime_arquivo(img).startswith('image/'):
+                return format_response('error', f'O arquivo {img.name} não é uma imagem válida', None, status.HTTP_400_BAD_REQUEST)
         
-        # Inserir produto no banco
-        with connection.cursor() as cursor:
+        # Validar dados do destaque antes de gravar qualquer coisa
+        is_destaque = request.data.get('is_destaque', 'false').lower() == 'true'
+        desconto_float = None
+        valor_com_desconto_float = None
+        if is_destaque:
+            try:
+                desconto_float = float(request.data.get('desconto_percentual', '0'))
+                valor_com_desconto = request.data.get('valor_com_desconto')
+                if valor_com_desconto:
+                    valor_com_desconto_float = float(valor_com_desconto)
+            except (ValueError, TypeError):
+                return format_response('error', 'O desconto e valor com desconto devem ser números válidos', None, status.HTTP_400_BAD_REQUEST)
+            if desconto_float < 0 or desconto_float > 100:
+                return format_response('error', 'O desconto deve estar entre 0 e 100%', None, status.HTTP_400_BAD_REQUEST)
+            if valor_com_desconto_float is not None and (valor_com_desconto_float < 0 or valor_com_desconto_float > valor_decimal):
+                return format_response('error', 'O valor com desconto deve estar entre 0 e o valor original', None, status.HTTP_400_BAD_REQUEST)
+        
+        # Produto, imagens, categorias e destaque na mesma transação (o histórico é enfileirado no commit)
+        with transaction.atomic(), connection.cursor() as cursor:
             cursor.execute("""
                 INSERT INTO produto (nome, descricao, valor, estoque, media_avaliacao)
                 VALUES (%s, %s, %s, %s, %s)
@@ -376,91 +344,37 @@ def cadastrar_produto(request):
             
             produto_id = cursor.fetchone()[0]
             
-            # Inserir imagens
-            for ordem, imagem in enumerate(imagens, start=1):
-                # Ler o conteúdo do arquivo
-                imagem_bytes = imagem.read()
-                cursor.execute("""
-                    INSERT INTO produto_imagem (produto_idproduto, imagem, ordem)
-                    VALUES (%s, %s, %s)
-                """, [produto_id, imagem_bytes, ordem])
-            
-            # Inserir categorias do produto
+            # Inserir imagens e categorias (um INSERT de várias linhas cada)
+            imagem_service.inserir_imagens(cursor, produto_id, imagens)
             if categorias:
-                categoria_ids = [int(cat_id) for cat_id in categorias if cat_id]
-                for categoria_id in categoria_ids:
-                    cursor.execute("""
-                        INSERT INTO produto_has_categoria (produto_idproduto, categoria_idcategoria)
-                        VALUES (%s, %s)
-                        ON CONFLICT DO NOTHING
-                    """, [produto_id, categoria_id])
-        
-        # Criar/atualizar destaque se solicitado
-        is_destaque = request.data.get('is_destaque', 'false').lower() == 'true'
-        if is_destaque:
-            desconto_percentual = request.data.get('desconto_percentual', '0')
-            valor_com_desconto = request.data.get('valor_com_desconto')
-            try:
-                desconto_float = float(desconto_percentual)
-                if desconto_float < 0 or desconto_float > 100:
-                    return format_response('error', 'O desconto deve estar entre 0 e 100%', None, status.HTTP_400_BAD_REQUEST)
-                
-                valor_com_desconto_float = None
-                if valor_com_desconto:
-                    valor_com_desconto_float = float(valor_com_desconto)
-                    if valor_com_desconto_float < 0 or valor_com_desconto_float > valor_decimal:
-                        return format_response('error', 'O valor com desconto deve estar entre 0 e o valor original', None, status.HTTP_400_BAD_REQUEST)
-                
-                with connection.cursor() as cursor:
-                    # Verificar se já existe destaque para este produto
-                    cursor.execute("""
-                        SELECT iddestaque FROM destaque WHERE produto_idproduto = %s
-                    """, [produto_id])
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        # Atualizar destaque existente
-                        if valor_com_desconto_float is not None:
-                            cursor.execute("""
-                                UPDATE destaque 
-                                SET desconto_percentual = %s, valor_com_desconto = %s, ativo = TRUE, data_inicio = CURRENT_TIMESTAMP
-                                WHERE produto_idproduto = %s
-                            """, [desconto_float, valor_com_desconto_float, produto_id])
-                        else:
-                            cursor.execute("""
-                                UPDATE destaque 
-                                SET desconto_percentual = %s, ativo = TRUE, data_inicio = CURRENT_TIMESTAMP
-                                WHERE produto_idproduto = %s
-                            """, [desconto_float, produto_id])
-                    else:
-                        # Criar novo destaque
-                        if valor_com_desconto_float is not None:
-                            cursor.execute("""
-                                INSERT INTO destaque (produto_idproduto, desconto_percentual, valor_com_desconto, ativo, ordem)
-                                VALUES (%s, %s, %s, TRUE, 0)
-                            """, [produto_id, desconto_float, valor_com_desconto_float])
-                        else:
-                            cursor.execute("""
-                                INSERT INTO destaque (produto_idproduto, desconto_percentual, ativo, ordem)
-                                VALUES (%s, %s, TRUE, 0)
-                            """, [produto_id, desconto_float])
-            except (ValueError, TypeError):
-                return format_response('error', 'O desconto e valor com desconto devem ser números válidos', None, status.HTTP_400_BAD_REQUEST)
-        
-        # Registrar no histórico
-        dados_novos = {
-            'nome': nome,
-            'descricao': descricao,
-            'valor': valor_decimal,
-            'estoque': estoque_int,
-        }
-        registrar_historico_produto(
-            produto_id=produto_id,
-            usuario_id=user_id,
-            acao='criado',
-            dados_novos=dados_novos,
-            observacao=f'Produto cadastrado por {user.nome}'
-        )
+                produto_service.inserir_categorias(cursor, produto_id, [int(cat_id) for cat_id in categorias if cat_id])
+            
+            # Criar/atualizar destaque se solicitado
+            if is_destaque:
+                produto_service.salvar_destaque(cursor, produto_id, desconto_float, valor_com_desconto_float)
+            
+            # Atualizar o modelo de leitura das listagens
+            catalogo_service.atualizar_modelo_leitura([produto_id])
+            
+            # Registrar no histórico (estado inicial completo, base da reconstrução)
+            dados_novos = {
+                'nome': nome,
+                'descricao': descricao,
+                'valor': valor_decimal,
+                'estoque': estoque_int,
+                'categorias': sorted({int(cat_id) for cat_id in categorias if cat_id}),
+            }
+            if is_destaque:
+                dados_novos['destaque'] = produto_service.valores_para_historico(
+                    produto_service.destaque_do_produto(cursor, produto_id)
+                )
+            registrar_historico_produto(
+                produto_id=produto_id,
+                usuario_id=user_id,
+                acao='criado',
+                dados_novos=dados_novos,
+                observacao=f'Produto cadastrado por {user.nome}'
+            )
         
         # Buscar produto criado para retornar
         produto = Produto.objects.get(idproduto=produto_id)
@@ -492,33 +406,93 @@ def cadastrar_produto(request):
         return format_response('error', f'Erro ao cadastrar produto: {str(e)}', None, status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUsuario.para('importar produtos')])
+def importar_produtos(request):
+    """
+    Importa produtos em massa (apenas admin).
+
+    Multipart com `arquivo` (CSV ou JSONL), `imagens` (.zip com as imagens
+    referenciadas nas linhas) e `formato` opcional. Linhas com erro são
+    informadas na resposta e não impedem a importação das demais.
+    """
+    try:
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo:
+            return format_response('error', 'O arquivo com os produtos é obrigatório', None, status.HTTP_400_BAD_REQUEST)
+        try:
+            formato = importacao_service.formato_do_arquivo(arquivo.name, request.data.get('formato'))
+            with importacao_service.abrir_imagens(request.FILES.get('imagens')) as raiz_imagens:
+                resultado = importacao_service.importar(
+                    importacao_service.ler_linhas(arquivo, formato),
+                    raiz_imagens,
+                    usuario_id=request.user.idusuario,
+                    observacao=f'Produto importado por {request.user.nome}',
+                )
+        except ValueError as e:
+            return format_response('error', str(e), None, status.HTTP_400_BAD_REQUEST)
+        
+        return format_response(
+            'success',
+            f'{resultado["importados"]} de {resultado["linhas"]} produto(s) importado(s)',
+            resultado,
+            status.HTTP_200_OK,
+        )
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return format_response('error', f'Erro ao importar produtos: {str(e)}', None, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['PATCH'])
+@permission_classes([IsAdminUsuario.para('editar produtos')])
+def atualizar_produtos_lote(request):
+    """
+    Atualiza preço e/ou estoque de vários produtos (apenas admin).
+
+    Corpo: {"produtos": [{"idproduto": 1, "valor": 10.5, "estoque": 3}, ...]}
+    (ou a lista diretamente). Retorna o resultado de cada ID.
+    """
+    try:
+        user = request.user
+        user_id = user.idusuario
+        
+        itens = request.data.get('produtos') if isinstance(request.data, dict) else request.data
+        try:
+            validos, resultados = produto_service.validar_itens_atualizacao(itens)
+        except ValueError as e:
+            return format_response('error', str(e), None, status.HTTP_400_BAD_REQUEST)
+        
+        if validos:
+            resultados += produto_service.atualizar_precos_estoques(
+                validos,
+                usuario_id=user_id,
+                observacao=f'Preço/estoque atualizado em massa por {user.nome}',
+            )
+        atualizados = sum(1 for resultado in resultados if resultado['status'] == 'atualizado')
+        
+        return format_response(
+            'success',
+            f'{atualizados} de {len(resultados)} produto(s) atualizado(s)',
+            {'resultados': resultados},
+            status.HTTP_200_OK,
+        )
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return format_response('error', f'Erro ao atualizar produtos: {str(e)}', None, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['DELETE'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAdminUsuario.para('deletar produtos')])
+@catalogo_cache.invalidar_apos_escrita
 def deletar_produto(request, produto_id):
     """Deleta um produto (apenas admin)"""
     try:
-        # Verificar se o usuário é admin
-        user_id = None
-        if hasattr(request.user, 'idusuario'):
-            user_id = request.user.idusuario
-            user = request.user
-        else:
-            # Tentar extrair do token
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-                try:
-                    decoded = UntypedToken(token)
-                    user_id = decoded.get('id')
-                    user = Usuario.objects.get(idusuario=user_id)
-                except Exception:
-                    return format_response('error', 'Token inválido', None, status.HTTP_401_UNAUTHORIZED)
-            else:
-                return format_response('error', 'Token não fornecido', None, status.HTTP_401_UNAUTHORIZED)
-        
-        # Verificar se é admin
-        if not (user.admin == 1 or user.admin is True):
-            return format_response('error', 'Acesso negado. Apenas administradores podem deletar produtos.', None, status.HTTP_403_FORBIDDEN)
+        user = request.user
+        user_id = user.idusuario
         
         # Verificar se o produto existe e buscar dados antes de deletar
         try:
@@ -546,6 +520,7 @@ def deletar_produto(request, produto_id):
         # Deletar produto (as imagens serão deletadas automaticamente por CASCADE)
         with connection.cursor() as cursor:
             cursor.execute("DELETE FROM produto WHERE idproduto = %s", [produto_id])
+        catalogo_cache.invalidar_produtos([produto_id])
         
         return format_response('success', 'Produto deletado com sucesso', None, status.HTTP_200_OK)
         
@@ -555,85 +530,148 @@ def deletar_produto(request, produto_id):
         return format_response('error', f'Erro ao deletar produto: {str(e)}', None, status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _detalhe_com_urls(request, produto, tamanho):
+    """Copia o documento de detalhe trocando as referências das imagens por URLs"""
+    # Os bytes das imagens são servidos por /api/imagens/<id>
+    produto_data = dict(produto)
+    produto_data['imagens'] = [
+        {
+            'idproduto_imagem': imagem['idproduto_imagem'],
+            'ordem': imagem['ordem'],
+            'data': imagem_service.url_imagem(request, imagem['idproduto_imagem'], tamanho),
+            'placeholder': imagem['placeholder'],
+        }
+        for imagem in produto['imagens']
+    ]
+    return produto_data
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def obter_produtos_lote(request):
+    """
+    Obtém vários produtos de uma vez (carrinho, favoritos, vistos recentemente).
+
+    GET ?ids=1,2,3 ou POST {"ids": [1, 2, 3]} para listas longas. A resposta
+    segue a ordem pedida e informa os IDs não encontrados.
+    """
+    try:
+        tamanho = request.query_params.get('tamanho', 'card')
+        if not imagem_service.variante_valida(tamanho):
+            return format_response('error', 'Tamanho de imagem inválido. Use: thumb, card ou full', None, status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'POST':
+            ids = request.data.get('ids', []) if hasattr(request.data, 'get') else []
+            if not isinstance(ids, list):
+                ids = [ids]
+        else:
+            ids = request.query_params.getlist('ids')
+        try:
+            produto_ids = catalogo_service.ids_da_requisicao(ids)
+        except ValueError as e:
+            return format_response('error', str(e), None, status.HTTP_400_BAD_REQUEST)
+
+        # Cache por produto + uma consulta com ANY(%s) para os que faltarem
+        encontrados = catalogo_service.obter_produtos(produto_ids)
+        produtos_data = [
+            _detalhe_com_urls(request, encontrados[produto_id][0], tamanho)
+            for produto_id in produto_ids if produto_id in encontrados
+        ]
+        nao_encontrados = [produto_id for produto_id in produto_ids if produto_id not in encontrados]
+
+        return format_response('success', 'Produtos obtidos com sucesso', {
+            'produtos': produtos_data,
+            'nao_encontrados': nao_encontrados,
+        }, status.HTTP_200_OK)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return format_response('error', str(e), None, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _pagina_historico(request, consulta, mensagem):
+    """Responde uma página do histórico (?limit=&cursor=&desde=AAAA-MM-DD, padrão de 20 itens)"""
+    try:
+        limite, cursor = paginacao_utils.parametros_da_requisicao(request.query_params)
+        desde = request.query_params.get('desde')
+        if desde:
+            try:
+                desde = parse_date(desde)
+            except ValueError:
+                desde = None
+            if desde is None:
+                raise ValueError('O parâmetro desde deve ser uma data no formato AAAA-MM-DD')
+        itens, proximo_cursor = consulta(limite or LIMITE_HISTORICO, cursor, desde)
+    except ValueError as e:
+        return format_response('error', str(e), None, status.HTTP_400_BAD_REQUEST)
+    return format_response(
+        'success', mensagem, [item.to_dict() for item in itens], status.HTTP_200_OK,
+        {'limite': limite or LIMITE_HISTORICO, 'proximo_cursor': proximo_cursor},
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUsuario.para('consultar o histórico')])
+def historico_produto(request, produto_id):
+    """Histórico de um produto, mais recentes primeiro (apenas admin)"""
+    return _pagina_historico(
+        request,
+        lambda limite, cursor, desde: obter_historico_produto(produto_id, limite, cursor, desde),
+        'Histórico do produto obtido com sucesso',
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUsuario.para('consultar o histórico')])
+def historico_usuario(request, usuario_id):
+    """Ações de um usuário sobre produtos, mais recentes primeiro (apenas admin)"""
+    return _pagina_historico(
+        request,
+        lambda limite, cursor, desde: obter_historico_por_usuario(usuario_id, limite, cursor, desde),
+        'Histórico do usuário obtido com sucesso',
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUsuario.para('consultar o histórico')])
+def versao_produto(request, produto_id, historico_id):
+    """Estado do produto reconstruído a partir do histórico até a versão informada (apenas admin)"""
+    versao = reconstruir_produto(produto_id, historico_id)
+    if versao is None:
+        return format_response('error', 'Versão não encontrada no histórico do produto', None, status.HTTP_404_NOT_FOUND)
+    return format_response('success', 'Versão do produto reconstruída com sucesso', versao, status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def obter_produto(request, produto_id):
-    """Obtém um produto específico com suas imagens"""
+    """Obtém um produto específico com suas imagens (aceita GET condicional)"""
     try:
-        produto = Produto.objects.get(idproduto=produto_id)
-        serializer = ProdutoSerializer(produto)
-        produto_data = serializer.data
-        
-        # Buscar todas as imagens do produto
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT imagem, ordem 
-                FROM produto_imagem 
-                WHERE produto_idproduto = %s
-                ORDER BY ordem
-            """, [produto_id])
-            
-            rows = cursor.fetchall()
-            imagens_base64 = []
-            
-            for row in rows:
-                if row[0]:
-                    import base64
-                    imagem_data = row[0]
-                    ordem = row[1]
-                    
-                    # Garantir que seja bytes
-                    if isinstance(imagem_data, memoryview):
-                        imagem_bytes = imagem_data.tobytes()
-                    elif isinstance(imagem_data, bytes):
-                        imagem_bytes = imagem_data
-                    else:
-                        imagem_bytes = bytes(imagem_data)
-                    
-                    imagem_base64 = base64.b64encode(imagem_bytes).decode('utf-8')
-            imagens_base64.append({
-                'ordem': ordem,
-                'data': f"data:image/jpeg;base64,{imagem_base64}"
-            })
-            
-            produto_data['imagens'] = imagens_base64
-        
-        # Buscar categorias do produto
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT c.idcategoria, c.nome, c.descricao
-                FROM categoria c
-                INNER JOIN produto_has_categoria phc ON c.idcategoria = phc.categoria_idcategoria
-                WHERE phc.produto_idproduto = %s
-            """, [produto_id])
-            categorias_produto = []
-            for row in cursor.fetchall():
-                categorias_produto.append({
-                    'idcategoria': row[0],
-                    'nome': row[1],
-                    'descricao': row[2],
-                })
-            produto_data['categorias'] = categorias_produto
-        
-        # Buscar dados de destaque se existir
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT desconto_percentual, valor_com_desconto, ativo 
-                FROM destaque 
-                WHERE produto_idproduto = %s AND ativo = TRUE
-            """, [produto_id])
-            
-            destaque_row = cursor.fetchone()
-            if destaque_row:
-                produto_data['destaque'] = {
-                    'desconto_percentual': float(destaque_row[0]),
-                    'valor_com_desconto': float(destaque_row[1]) if destaque_row[1] else None,
-                    'ativo': destaque_row[2],
-                }
-        
-        return format_response('success', 'Produto obtido com sucesso', produto_data, status.HTTP_200_OK)
-    except Produto.DoesNotExist:
-        return format_response('error', 'Produto não encontrado', None, status.HTTP_404_NOT_FOUND)
+        tamanho = request.query_params.get('tamanho', 'full')
+        if not imagem_service.variante_valida(tamanho):
+            return format_response('error', 'Tamanho de imagem inválido. Use: thumb, card ou full', None, status.HTTP_400_BAD_REQUEST)
+
+        # Documento completo em uma consulta (ou do cache por produto)
+        entrada = catalogo_service.obter_produto(produto_id)
+        if entrada is None:
+            return format_response('error', 'Produto não encontrado', None, status.HTTP_404_NOT_FOUND)
+        produto, data_atualizacao = entrada
+
+        # Validadores a partir da data de atualização: se o cliente já tem
+        # a versão atual, responde 304 sem montar o corpo. O início/fim de uma
+        # promoção não muda data_atualizacao, então o destaque entra no ETag
+        destaque = '-d' if produto.get('destaque') else ''
+        etag = f'"{produto_id}-{int(data_atualizacao.timestamp() * 1000000)}{destaque}"'
+        ultima_modificacao = int(data_atualizacao.timestamp())
+        nao_modificado = cache_http.resposta_nao_modificada(request, etag, ultima_modificacao)
+        if nao_modificado:
+            return nao_modificado
+
+        produto_data = _detalhe_com_urls(request, produto, tamanho)
+        return cache_http.aplicar_validadores(
+            format_response('success', 'Produto obtido com sucesso', produto_data, status.HTTP_200_OK),
+            etag, ultima_modificacao,
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -641,45 +679,15 @@ def obter_produto(request, produto_id):
 
 
 @api_view(['PUT'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAdminUsuario.para('editar produtos')])
 def editar_produto(request, produto_id):
     """Edita um produto existente (apenas admin)"""
     try:
-        # Verificar se o usuário é admin
-        user_id = None
-        if hasattr(request.user, 'idusuario'):
-            user_id = request.user.idusuario
-            user = request.user
-        else:
-            # Tentar extrair do token
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-                try:
-                    decoded = UntypedToken(token)
-                    user_id = decoded.get('id')
-                    user = Usuario.objects.get(idusuario=user_id)
-                except Exception:
-                    return format_response('error', 'Token inválido', None, status.HTTP_401_UNAUTHORIZED)
-            else:
-                return format_response('error', 'Token não fornecido', None, status.HTTP_401_UNAUTHORIZED)
-        
-        # Verificar se é admin
-        if not (user.admin == 1 or user.admin is True):
-            return format_response('error', 'Acesso negado. Apenas administradores podem editar produtos.', None, status.HTTP_403_FORBIDDEN)
+        user = request.user
+        user_id = user.idusuario
         
-        # Verificar se o produto existe e buscar dados anteriores
-        try:
-            produto = Produto.objects.get(idproduto=produto_id)
-            dados_anteriores = {
-                'idproduto': produto.idproduto,
-                'nome': produto.nome,
-                'descricao': produto.descricao,
-                'valor': float(produto.valor),
-                'estoque': produto.estoque,
-                'media_avaliacao': float(produto.media_avaliacao),
-            }
-        except Produto.DoesNotExist:
+        # Verificar se o produto existe
+        if not Produto.objects.filter(idproduto=produto_id).exists():
             return format_response('error', 'Produto não encontrado', None, status.HTTP_404_NOT_FOUND)
         
         # Validar dados do produto
@@ -735,22 +743,48 @@ def editar_produto(request, produto_id):
         for img in imagens_novas:
             if img.size > 5 * 1024 * 1024:
                 return format_response('error', f'A imagem {img.name} excede o tamanho máximo de 5MB', None, status.HTTP_400_BAD_REQUEST)
+            if not imagem_service.detectar_mime_arquivo(img).startswith('image/'):
+                return format_response('error', f'O arquivo {img.name} não é uma imagem válida', None, status.HTTP_400_BAD_REQUEST)
         
-        # Atualizar produto no banco
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                UPDATE produto 
-                SET nome = %s, descricao = %s, valor = %s, estoque = %s
-                WHERE idproduto = %s
-            """, [nome, descricao, valor_decimal, estoque_int, produto_id])
+        # Validar dados do destaque antes de gravar qualquer coisa
+        is_destaque = request.data.get('is_destaque', 'false').lower() == 'true'
+        desconto_float = None
+        valor_com_desconto_float = None
+        if is_destaque:
+            try:
+                desconto_float = float(request.data.get('desconto_percentual', '0'))
+                valor_com_desconto = request.data.get('valor_com_desconto')
+                if valor_com_desconto:
+                    valor_com_desconto_float = float(valor_com_desconto)
+            except (ValueError, TypeError):
+                return format_response('error', 'O desconto e valor com desconto devem ser números válidos', None, status.HTTP_400_BAD_REQUEST)
+            if desconto_float < 0 or desconto_float > 100:
+                return format_response('error', 'O desconto deve estar entre 0 e 100%', None, status.HTTP_400_BAD_REQUEST)
+            if valor_com_desconto_float is not None and (valor_com_desconto_float < 0 or valor_com_desconto_float > valor_decimal):
+                return format_response('error', 'O valor com desconto deve estar entre 0 e o valor original', None, status.HTTP_400_BAD_REQUEST)
+        
+        imagem_ids_remover = []
+        for img_id in imagens_remover:
+            try:
+                imagem_ids_remover.append(int(img_id))
+            except (ValueError, TypeError):
+                pass
+        
+        # Só as diferenças em relação ao estado atual são gravadas
+        with transaction.atomic(), connection.cursor() as cursor:
+            produto = Produto.objects.select_for_update().get(idproduto=produto_id)
+            dados_anteriores, dados_novos = produto_service.campos_alterados(produto, {
+                'nome': nome,
+                'descricao': descricao,
+                'valor': Decimal(str(valor_decimal)).quantize(Decimal('0.01')),
+                'estoque': estoque_int,
+            })
+            produto_service.atualizar_campos(cursor, produto_id, dados_novos)
             
             # Remover imagens solicitadas
-            if imagens_remover:
-                for img_id in imagens_remover:
-                    try:
-                        cursor.execute("DELETE FROM produto_imagem WHERE idproduto_imagem = %s", [int(img_id)])
-                    except (ValueError, TypeError):
-                        pass
+            imagens_removidas = produto_service.remover_imagens(cursor, produto_id, imagem_ids_remover)
+            if imagens_removidas:
+                dados_novos['imagens_removidas'] = imagens_removidas
             
             # Adicionar novas imagens
             if imagens_novas:
@@ -762,99 +796,54 @@ def editar_produto(request, produto_id):
                 """, [produto_id])
                 max_ordem = cursor.fetchone()[0] or 0
                 
-                for ordem, imagem in enumerate(imagens_novas, start=max_ordem + 1):
-                    imagem_bytes = imagem.read()
-                    cursor.execute("""
-                        INSERT INTO produto_imagem (produto_idproduto, imagem, ordem)
-                        VALUES (%s, %s, %s)
-                    """, [produto_id, imagem_bytes, ordem])
+                dados_novos['imagens_adicionadas'] = imagem_service.inserir_imagens(
+                    cursor, produto_id, imagens_novas, ordem_inicial=max_ordem + 1,
+                )
             
-            # Atualizar categorias do produto
+            # Categorias: adicionar/remover apenas a diferença
             if categorias:
-                categoria_ids = [int(cat_id) for cat_id in categorias if cat_id]
-                # Remover todas as categorias existentes
-                cursor.execute("""
-                    DELETE FROM produto_has_categoria WHERE produto_idproduto = %s
-                """, [produto_id])
-                # Inserir novas categorias
-                for categoria_id in categoria_ids:
-                    cursor.execute("""
-                        INSERT INTO produto_has_categoria (produto_idproduto, categoria_idcategoria)
-                        VALUES (%s, %s)
-                        ON CONFLICT DO NOTHING
-                    """, [produto_id, categoria_id])
+                categorias_atuais = produto_service.categorias_do_produto(cursor, produto_id)
+                categorias_novas = {int(cat_id) for cat_id in categorias if cat_id}
+                if categorias_novas != categorias_atuais:
+                    produto_service.inserir_categorias(cursor, produto_id, sorted(categorias_novas - categorias_atuais))
+                    produto_service.remover_categorias(cursor, produto_id, sorted(categorias_atuais - categorias_novas))
+                    dados_anteriores['categorias'] = sorted(categorias_atuais)
+                    dados_novos['categorias'] = sorted(categorias_novas)
             
-            # Gerenciar destaque
-            is_destaque = request.data.get('is_destaque', 'false').lower() == 'true'
+            # Gerenciar destaque (só grava se o estado mudar)
+            destaque = produto_service.destaque_do_produto(cursor, produto_id)
             if is_destaque:
-                desconto_percentual = request.data.get('desconto_percentual', '0')
-                valor_com_desconto = request.data.get('valor_com_desconto')
-                try:
-                    desconto_float = float(desconto_percentual)
-                    if desconto_float < 0 or desconto_float > 100:
-                        return format_response('error', 'O desconto deve estar entre 0 e 100%', None, status.HTTP_400_BAD_REQUEST)
-                    
-                    valor_com_desconto_float = None
-                    if valor_com_desconto:
-                        valor_com_desconto_float = float(valor_com_desconto)
-                        if valor_com_desconto_float < 0 or valor_com_desconto_float > valor_decimal:
-                            return format_response('error', 'O valor com desconto deve estar entre 0 e o valor original', None, status.HTTP_400_BAD_REQUEST)
-                    
-                    # Verificar se já existe destaque para este produto
-                    cursor.execute("""
-                        SELECT iddestaque FROM destaque WHERE produto_idproduto = %s
-                    """, [produto_id])
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        # Atualizar destaque existente
-                        if valor_com_desconto_float is not None:
-                            cursor.execute("""
-                                UPDATE destaque 
-                                SET desconto_percentual = %s, valor_com_desconto = %s, ativo = TRUE, data_inicio = CURRENT_TIMESTAMP
-                                WHERE produto_idproduto = %s
-                            """, [desconto_float, valor_com_desconto_float, produto_id])
-                        else:
-                            cursor.execute("""
-                                UPDATE destaque 
-                                SET desconto_percentual = %s, ativo = TRUE, data_inicio = CURRENT_TIMESTAMP
-                                WHERE produto_idproduto = %s
-                            """, [desconto_float, produto_id])
-                    else:
-                        # Criar novo destaque
-                        if valor_com_desconto_float is not None:
-                            cursor.execute("""
-                                INSERT INTO destaque (produto_idproduto, desconto_percentual, valor_com_desconto, ativo, ordem)
-                                VALUES (%s, %s, %s, TRUE, 0)
-                            """, [produto_id, desconto_float, valor_com_desconto_float])
-                        else:
-                            cursor.execute("""
-                                INSERT INTO destaque (produto_idproduto, desconto_percentual, ativo, ordem)
-                                VALUES (%s, %s, TRUE, 0)
-                            """, [produto_id, desconto_float])
-                except (ValueError, TypeError):
-                    return format_response('error', 'O desconto e valor com desconto devem ser números válidos', None, status.HTTP_400_BAD_REQUEST)
-            else:
-                # Desativar destaque se existir
-                cursor.execute("""
-                    UPDATE destaque SET ativo = FALSE WHERE produto_idproduto = %s
-                """, [produto_id])
-        
-        # Registrar no histórico
-        dados_novos = {
-            'nome': nome,
-            'descricao': descricao,
-            'valor': valor_decimal,
-            'estoque': estoque_int,
-        }
-        registrar_historico_produto(
-            produto_id=produto_id,
-            usuario_id=user_id,
-            acao='editado',
-            dados_anteriores=dados_anteriores,
-            dados_novos=dados_novos,
-            observacao=f'Produto editado por {user.nome}'
-        )
+                if (
+                    not destaque
+                    or not destaque['ativo']
+                    or destaque['desconto_percentual'] != Decimal(str(desconto_float))
+                    or (valor_com_desconto_float is not None
+                        and destaque['valor_com_desconto'] != Decimal(str(valor_com_desconto_float)))
+                ):
+                    produto_service.salvar_destaque(cursor, produto_id, desconto_float, valor_com_desconto_float)
+                    dados_anteriores['destaque'] = destaque
+                    dados_novos['destaque'] = produto_service.destaque_do_produto(cursor, produto_id)
+            elif destaque and destaque['ativo']:
+                produto_service.desativar_destaque(cursor, produto_id)
+                dados_anteriores['destaque'] = destaque
+                dados_novos['destaque'] = dict(destaque, ativo=False)
+            
+            alterado = bool(dados_novos)
+            if alterado:
+                # Atualizar o modelo de leitura das listagens e descartar os caches
+                catalogo_service.atualizar_modelo_leitura([produto_id])
+                catalogo_cache.invalidar_produtos([produto_id])
+                catalogo_cache.invalidar()
+                
+                # Registrar no histórico apenas os campos alterados
+                registrar_historico_produto(
+                    produto_id=produto_id,
+                    usuario_id=user_id,
+                    acao='editado',
+                    dados_anteriores=produto_service.valores_para_historico(dados_anteriores),
+                    dados_novos=produto_service.valores_para_historico(dados_novos),
+                    observacao=f'Produto editado por {user.nome}'
+                )
         
         # Buscar produto atualizado para retornar
         produto = Produto.objects.get(idproduto=produto_id)
@@ -878,7 +867,8 @@ def editar_produto(request, produto_id):
                 })
             produto_data['categorias'] = categorias_produto
         
-        return format_response('success', 'Produto editado com sucesso', produto_data, status.HTTP_200_OK)
+        mensagem = 'Produto editado com sucesso' if alterado else 'Nenhuma alteração a salvar'
+        return format_response('success', mensagem, produto_data, status.HTTP_200_OK)
         
     except Exception as e:
         import traceback
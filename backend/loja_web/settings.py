@@ -133,6 +133,61 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'id',
 }
 
+# Tokens (api/services/token_service.py)
+# Chaves de assinatura por kid, ex.: JWT_CHAVES="2025-01:segredo-antigo,2025-06:segredo-novo"
+# e JWT_CHAVE_ATUAL=2025-06 (padrão: a última da lista). Sem JWT_CHAVES, usa
+# JWT_SECRET com o kid 'principal'.
+JWT_CHAVES = dict(
+    item.split(':', 1) for item in os.getenv('JWT_CHAVES', '').split(',') if ':' in item
+) or {'principal': SIMPLE_JWT['SIGNING_KEY']}
+JWT_CHAVE_ATUAL = os.getenv('JWT_CHAVE_ATUAL', list(JWT_CHAVES)[-1])
+JWT_VALIDADE = SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
+# Tokens já verificados mantidos em memória (até o exp de cada um)
+JWT_CACHE_MAXIMO = int(os.getenv('JWT_CACHE_MAXIMO', '10000'))
+
+# Usuários autenticados (api/utils/usuario_cache.py)
+# A autenticação usa as claims do token; a linha de Usuario (ex.: admin) fica
+# em cache por até USUARIO_CACHE_TTL segundos, para até USUARIO_CACHE_MAXIMO usuários
+USUARIO_CACHE_TTL = int(os.getenv('USUARIO_CACHE_TTL', '30'))
+USUARIO_CACHE_MAXIMO = int(os.getenv('USUARIO_CACHE_MAXIMO', '1000'))
+
+# Imagens de produtos
+# Quantidade de workers que geram os derivados (thumb/card/full) após o upload
+IMAGENS_WORKERS = int(os.getenv('IMAGENS_WORKERS', '2'))
+# Onde ficam os arquivos das imagens (api/utils/armazenamento.py)
+IMAGENS_ARMAZENAMENTO = os.getenv('IMAGENS_ARMAZENAMENTO', 'api.utils.armazenamento.ArmazenamentoLocal')
+IMAGENS_DIR = os.getenv('IMAGENS_DIR', str(BASE_DIR / 'media' / 'imagens'))
+# Atrás do nginx, ex. '/imagens-internas/': o envio do arquivo fica com o
+# servidor web (X-Accel-Redirect) em vez do processo Django
+IMAGENS_X_ACCEL_PREFIXO = os.getenv('IMAGENS_X_ACCEL_PREFIXO', '')
+
+# Importação em massa (api/services/importacao_service.py): limites do .zip
+# de imagens, verificados antes da extração (soma dos tamanhos descompactados
+# em bytes e quantidade de arquivos)
+IMPORTACAO_ZIP_TAMANHO_MAXIMO = int(os.getenv('IMPORTACAO_ZIP_TAMANHO_MAXIMO', str(1024 * 1024 * 1024)))
+IMPORTACAO_ZIP_ARQUIVOS_MAXIMO = int(os.getenv('IMPORTACAO_ZIP_ARQUIVOS_MAXIMO', '20000'))
+
+# Histórico de produtos (api/utils/historico_escritor.py)
+# Gravado em lotes por uma thread: tamanho máximo da fila, entradas por INSERT
+# e segundos máximos que uma entrada espera na fila
+HISTORICO_FILA_MAXIMO = int(os.getenv('HISTORICO_FILA_MAXIMO', '10000'))
+HISTORICO_LOTE = int(os.getenv('HISTORICO_LOTE', '200'))
+HISTORICO_INTERVALO = float(os.getenv('HISTORICO_INTERVALO', '1.0'))
+
+# Cache
+# Snapshots das listagens do catálogo (api/utils/catalogo_cache.py). Com mais
+# de um processo, use um backend compartilhado, ex.:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache e CACHE_LOCATION=redis://localhost:6379
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'loja-web'),
+    }
+}
+
+# Tempo máximo (segundos) de um snapshot do catálogo; escritas invalidam antes disso
+CATALOGO_CACHE_TTL = int(os.getenv('CATALOGO_CACHE_TTL', '300'))
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -17,8 +17,9 @@ def root_view(request):
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('api.urls')),
-    path('health/', include('api.urls')),
+    # Namespaces distintos: reverse('api:...') sempre gera URLs em /api/
+    path('api/', include(('api.urls', 'api'), namespace='api')),
+    path('health/', include(('api.urls', 'api'), namespace='health')),
     path('', root_view),
 ]
 
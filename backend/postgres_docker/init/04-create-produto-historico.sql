@@ -0,0 +1,63 @@
+-- =========================================
+-- HISTÓRICO DE PRODUTOS
+-- Quem criou/editou/deletou cada produto e quando (api/utils/produto_historico.py).
+-- Sem chave estrangeira para produto: o histórico permanece após a exclusão.
+-- Particionada por mês em data_acao, para que as consultas recentes leiam
+-- só as partições novas e os meses antigos possam ser arquivados e
+-- removidos (python manage.py arquivar_historico).
+-- Partições futuras: python manage.py criar_particoes_historico
+-- =========================================
+
+-- Cria a partição do mês de `mes`, movendo para ela as linhas que tenham
+-- caído na partição padrão
+CREATE OR REPLACE FUNCTION criar_particao_historico(mes DATE) RETURNS void AS $$
+DECLARE
+    inicio DATE := date_trunc('month', mes);
+    fim DATE := (date_trunc('month', mes) + INTERVAL '1 month')::date;
+    nome TEXT := 'produto_historico_' || to_char(date_trunc('month', mes), 'YYYY_MM');
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    CREATE TEMP TABLE historico_pendente AS
+        SELECT * FROM produto_historico_padrao WHERE data_acao >= inicio AND data_acao < fim;
+    DELETE FROM produto_historico_padrao WHERE data_acao >= inicio AND data_acao < fim;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF produto_historico FOR VALUES FROM (%L) TO (%L)',
+        nome, inicio, fim
+    );
+
+    INSERT INTO produto_historico SELECT * FROM historico_pendente;
+    DROP TABLE historico_pendente;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF to_regclass('produto_historico') IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    -- A chave primária de uma tabela particionada precisa incluir a coluna de partição
+    CREATE TABLE produto_historico (
+        idproduto_historico SERIAL,
+        produto_idproduto INTEGER NOT NULL,
+        usuario_idusuario INTEGER NOT NULL,
+        acao VARCHAR(20) NOT NULL,
+        data_acao TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        dados_anteriores JSONB,
+        dados_novos JSONB,
+        observacao TEXT,
+        PRIMARY KEY (idproduto_historico, data_acao)
+    ) PARTITION BY RANGE (data_acao);
+
+    -- Linhas fora de qualquer mês criado (nunca devem ficar aqui por muito tempo)
+    CREATE TABLE produto_historico_padrao PARTITION OF produto_historico DEFAULT;
+
+    PERFORM criar_particao_historico(mes::date)
+    FROM generate_series(date_trunc('month', CURRENT_DATE), date_trunc('month', CURRENT_DATE) + INTERVAL '3 months', INTERVAL '1 month') AS mes;
+
+    RAISE NOTICE 'Tabela produto_historico criada (particionada por mês)!';
+END $$;
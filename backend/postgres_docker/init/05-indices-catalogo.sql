@@ -0,0 +1,12 @@
+-- =========================================
+-- ÍNDICES DO CATÁLOGO
+-- Suportam a listagem de produtos em uma única consulta
+-- (imagem principal e categorias via LEFT JOIN LATERAL)
+-- =========================================
+CREATE INDEX IF NOT EXISTS idx_produto_imagem_produto_ordem
+    ON produto_imagem (produto_idproduto, ordem);
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Índices do catálogo criados!';
+END $$;
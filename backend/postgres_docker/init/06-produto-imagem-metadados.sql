@@ -0,0 +1,31 @@
+-- =========================================
+-- METADADOS DAS IMAGENS DE PRODUTO
+-- Permitem servir /api/imagens/<id> com Content-Type e ETag corretos
+-- sem ler o BYTEA inteiro a cada requisição
+-- =========================================
+ALTER TABLE produto_imagem ADD COLUMN IF NOT EXISTS mime_type VARCHAR(50);
+ALTER TABLE produto_imagem ADD COLUMN IF NOT EXISTS hash_sha256 CHAR(64);
+ALTER TABLE produto_imagem ADD COLUMN IF NOT EXISTS tamanho INTEGER;
+
+-- Imagens já são comprimidas: armazenar fora de linha sem compressão
+-- permite ler apenas o trecho pedido em requisições com Range
+ALTER TABLE produto_imagem ALTER COLUMN imagem SET STORAGE EXTERNAL;
+
+-- Preencher metadados das imagens existentes
+UPDATE produto_imagem
+SET hash_sha256 = encode(sha256(imagem), 'hex'),
+    tamanho = octet_length(imagem),
+    mime_type = CASE
+        WHEN substring(imagem FROM 1 FOR 3) = '\xffd8ff'::bytea THEN 'image/jpeg'
+        WHEN substring(imagem FROM 1 FOR 8) = '\x89504e470d0a1a0a'::bytea THEN 'image/png'
+        WHEN substring(imagem FROM 1 FOR 4) = '\x47494638'::bytea THEN 'image/gif'
+        WHEN substring(imagem FROM 1 FOR 4) = '\x52494646'::bytea
+             AND substring(imagem FROM 9 FOR 4) = '\x57454250'::bytea THEN 'image/webp'
+        ELSE 'application/octet-stream'
+    END
+WHERE hash_sha256 IS NULL;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Metadados de produto_imagem criados!';
+END $$;
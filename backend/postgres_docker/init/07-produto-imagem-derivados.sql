@@ -0,0 +1,32 @@
+-- =========================================
+-- DERIVADOS DAS IMAGENS DE PRODUTO
+-- Variações de tamanho fixo (thumb/card/full) em WebP e JPEG,
+-- geradas no upload, e placeholder minúsculo da imagem original
+-- =========================================
+CREATE TABLE IF NOT EXISTS produto_imagem_derivado (
+    produto_imagem_idproduto_imagem INTEGER NOT NULL,
+    variante VARCHAR(10) NOT NULL,
+    formato VARCHAR(10) NOT NULL,
+    mime_type VARCHAR(50) NOT NULL,
+    largura INTEGER NOT NULL,
+    altura INTEGER NOT NULL,
+    hash_sha256 CHAR(64) NOT NULL,
+    tamanho INTEGER NOT NULL,
+    imagem BYTEA NOT NULL,
+    PRIMARY KEY (produto_imagem_idproduto_imagem, variante, formato),
+    CONSTRAINT fk_produto_imagem_derivado_imagem
+        FOREIGN KEY (produto_imagem_idproduto_imagem)
+        REFERENCES produto_imagem (idproduto_imagem)
+        ON DELETE CASCADE
+);
+
+ALTER TABLE produto_imagem_derivado ALTER COLUMN imagem SET STORAGE EXTERNAL;
+
+ALTER TABLE produto_imagem ADD COLUMN IF NOT EXISTS largura INTEGER;
+ALTER TABLE produto_imagem ADD COLUMN IF NOT EXISTS altura INTEGER;
+ALTER TABLE produto_imagem ADD COLUMN IF NOT EXISTS placeholder VARCHAR(2000);
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Tabela produto_imagem_derivado criada!';
+END $$;
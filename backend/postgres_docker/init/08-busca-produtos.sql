@@ -0,0 +1,26 @@
+-- =========================================
+-- BUSCA, FILTROS E ORDENAÇÃO DE PRODUTOS
+-- Full-text (tsvector + GIN) em nome/descricao, trigramas para
+-- tolerar erros de digitação e índices dos filtros/ordenações
+-- =========================================
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- A expressão deve ser idêntica à usada em api/services/catalogo_service.py
+CREATE INDEX IF NOT EXISTS idx_produto_busca_tsv
+    ON produto USING GIN (to_tsvector('portuguese', nome || ' ' || descricao));
+
+CREATE INDEX IF NOT EXISTS idx_produto_nome_trgm
+    ON produto USING GIN (nome gin_trgm_ops);
+
+-- Filtro por categoria (a PK cobre apenas produto -> categoria)
+CREATE INDEX IF NOT EXISTS idx_produto_has_categoria_categoria
+    ON produto_has_categoria (categoria_idcategoria, produto_idproduto);
+
+-- Filtros de preço e ordenações
+CREATE INDEX IF NOT EXISTS idx_produto_valor ON produto (valor);
+CREATE INDEX IF NOT EXISTS idx_produto_media_avaliacao ON produto (media_avaliacao);
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Índices de busca de produtos criados!';
+END $$;
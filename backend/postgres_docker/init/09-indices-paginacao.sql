@@ -0,0 +1,26 @@
+-- =========================================
+-- ÍNDICES DA PAGINAÇÃO POR CURSOR (KEYSET)
+-- Cada ordenação termina no ID, de modo que a continuação
+-- "(chave, id) > (cursor)" é uma varredura de índice
+-- =========================================
+
+-- Ordenações de produtos (substituem os índices simples de 08-busca-produtos.sql)
+DROP INDEX IF EXISTS idx_produto_valor;
+DROP INDEX IF EXISTS idx_produto_media_avaliacao;
+CREATE INDEX IF NOT EXISTS idx_produto_valor_id ON produto (valor, idproduto);
+CREATE INDEX IF NOT EXISTS idx_produto_media_avaliacao_id ON produto (media_avaliacao, idproduto);
+
+-- Categorias por nome
+CREATE INDEX IF NOT EXISTS idx_categoria_nome_id ON categoria (nome, idcategoria);
+
+-- Histórico por produto e por usuário, mais recentes primeiro (criados em
+-- cada partição de produto_historico)
+CREATE INDEX IF NOT EXISTS idx_produto_historico_produto_data
+    ON produto_historico (produto_idproduto, data_acao DESC, idproduto_historico DESC);
+CREATE INDEX IF NOT EXISTS idx_produto_historico_usuario_data
+    ON produto_historico (usuario_idusuario, data_acao DESC, idproduto_historico DESC);
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Índices de paginação criados!';
+END $$;
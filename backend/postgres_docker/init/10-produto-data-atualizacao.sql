@@ -0,0 +1,100 @@
+-- =========================================
+-- DATA DE ATUALIZAÇÃO DO PRODUTO
+-- Validador do GET condicional de /api/produtos/<id> (ETag / Last-Modified):
+-- muda quando o produto, suas imagens, categorias ou destaque mudam
+-- =========================================
+ALTER TABLE produto ADD COLUMN IF NOT EXISTS data_atualizacao TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE OR REPLACE FUNCTION produto_atualizar_data() RETURNS trigger AS $$
+BEGIN
+    NEW.data_atualizacao := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_produto_data_atualizacao ON produto;
+CREATE TRIGGER trg_produto_data_atualizacao
+    BEFORE UPDATE ON produto
+    FOR EACH ROW EXECUTE FUNCTION produto_atualizar_data();
+
+-- Alterações nas tabelas dependentes também atualizam o produto. Os gatilhos
+-- são por comando (FOR EACH STATEMENT) e leem as linhas alteradas das tabelas
+-- de transição: um INSERT de várias imagens/categorias (importação em lote)
+-- atualiza cada produto uma vez, e não uma vez por linha. O PostgreSQL só
+-- aceita tabelas de transição em gatilhos de um único evento, daí um gatilho
+-- por evento.
+CREATE OR REPLACE FUNCTION produto_dependente_atualizar_data() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE produto SET data_atualizacao = clock_timestamp()
+        WHERE idproduto IN (SELECT produto_idproduto FROM novas);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE produto SET data_atualizacao = clock_timestamp()
+        WHERE idproduto IN (SELECT produto_idproduto FROM antigas);
+    ELSE
+        UPDATE produto SET data_atualizacao = clock_timestamp()
+        WHERE idproduto IN (
+            SELECT produto_idproduto FROM novas
+            UNION
+            SELECT produto_idproduto FROM antigas
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_produto_imagem_data_atualizacao ON produto_imagem;
+DROP TRIGGER IF EXISTS trg_produto_imagem_data_atualizacao_insert ON produto_imagem;
+CREATE TRIGGER trg_produto_imagem_data_atualizacao_insert
+    AFTER INSERT ON produto_imagem
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+DROP TRIGGER IF EXISTS trg_produto_imagem_data_atualizacao_update ON produto_imagem;
+CREATE TRIGGER trg_produto_imagem_data_atualizacao_update
+    AFTER UPDATE ON produto_imagem
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+DROP TRIGGER IF EXISTS trg_produto_imagem_data_atualizacao_delete ON produto_imagem;
+CREATE TRIGGER trg_produto_imagem_data_atualizacao_delete
+    AFTER DELETE ON produto_imagem
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+
+DROP TRIGGER IF EXISTS trg_produto_has_categoria_data_atualizacao ON produto_has_categoria;
+DROP TRIGGER IF EXISTS trg_produto_has_categoria_data_atualizacao_insert ON produto_has_categoria;
+CREATE TRIGGER trg_produto_has_categoria_data_atualizacao_insert
+    AFTER INSERT ON produto_has_categoria
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+DROP TRIGGER IF EXISTS trg_produto_has_categoria_data_atualizacao_update ON produto_has_categoria;
+CREATE TRIGGER trg_produto_has_categoria_data_atualizacao_update
+    AFTER UPDATE ON produto_has_categoria
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+DROP TRIGGER IF EXISTS trg_produto_has_categoria_data_atualizacao_delete ON produto_has_categoria;
+CREATE TRIGGER trg_produto_has_categoria_data_atualizacao_delete
+    AFTER DELETE ON produto_has_categoria
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+
+DROP TRIGGER IF EXISTS trg_destaque_data_atualizacao ON destaque;
+DROP TRIGGER IF EXISTS trg_destaque_data_atualizacao_insert ON destaque;
+CREATE TRIGGER trg_destaque_data_atualizacao_insert
+    AFTER INSERT ON destaque
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+DROP TRIGGER IF EXISTS trg_destaque_data_atualizacao_update ON destaque;
+CREATE TRIGGER trg_destaque_data_atualizacao_update
+    AFTER UPDATE ON destaque
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+DROP TRIGGER IF EXISTS trg_destaque_data_atualizacao_delete ON destaque;
+CREATE TRIGGER trg_destaque_data_atualizacao_delete
+    AFTER DELETE ON destaque
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION produto_dependente_atualizar_data();
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Data de atualização de produto criada!';
+END $$;
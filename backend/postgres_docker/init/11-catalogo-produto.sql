@@ -0,0 +1,99 @@
+-- =========================================
+-- MODELO DE LEITURA DO CATÁLOGO
+-- Uma linha desnormalizada por produto (imagem principal, IDs das
+-- categorias e destaque), para que as listagens públicas sejam uma
+-- única varredura indexada, sem JOINs no momento da requisição.
+-- Atualizada pelas escritas da aplicação com atualizar_catalogo_produto()
+-- =========================================
+CREATE TABLE IF NOT EXISTS catalogo_produto (
+    idproduto INTEGER PRIMARY KEY,
+    nome VARCHAR(100) NOT NULL,
+    descricao VARCHAR(5000) NOT NULL,
+    valor DECIMAL(10,2) NOT NULL,
+    estoque INTEGER NOT NULL,
+    media_avaliacao DECIMAL(2,1),
+    imagem_principal_id INTEGER,
+    imagem_placeholder VARCHAR(2000),
+    categorias_ids INTEGER[] NOT NULL DEFAULT '{}',
+    -- Destaque (o período é conferido na consulta, já que depende de NOW())
+    destaque_id INTEGER,
+    destaque_ativo BOOLEAN NOT NULL DEFAULT FALSE,
+    destaque_desconto DECIMAL(5,2),
+    destaque_valor DECIMAL(10,2),
+    destaque_inicio TIMESTAMP,
+    destaque_fim TIMESTAMP,
+    destaque_ordem INTEGER,
+    CONSTRAINT fk_catalogo_produto_produto
+        FOREIGN KEY (idproduto)
+        REFERENCES produto (idproduto)
+        ON DELETE CASCADE
+);
+
+-- Mesmos índices de busca/ordenação de produto (08 e 09), agora no modelo de leitura
+CREATE INDEX IF NOT EXISTS idx_catalogo_produto_busca_tsv
+    ON catalogo_produto USING GIN (to_tsvector('portuguese', nome || ' ' || descricao));
+CREATE INDEX IF NOT EXISTS idx_catalogo_produto_nome_trgm
+    ON catalogo_produto USING GIN (nome gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_catalogo_produto_categorias
+    ON catalogo_produto USING GIN (categorias_ids);
+CREATE INDEX IF NOT EXISTS idx_catalogo_produto_valor_id ON catalogo_produto (valor, idproduto);
+CREATE INDEX IF NOT EXISTS idx_catalogo_produto_media_avaliacao_id ON catalogo_produto (media_avaliacao, idproduto);
+CREATE INDEX IF NOT EXISTS idx_catalogo_produto_destaque
+    ON catalogo_produto (destaque_ordem, destaque_id) WHERE destaque_ativo;
+
+-- Recalcula as linhas dos produtos informados (produtos removidos saem do modelo)
+CREATE OR REPLACE FUNCTION atualizar_catalogo_produto(ids INTEGER[]) RETURNS void AS $$
+    DELETE FROM catalogo_produto c
+    WHERE c.idproduto = ANY(ids)
+      AND NOT EXISTS (SELECT 1 FROM produto p WHERE p.idproduto = c.idproduto);
+
+    INSERT INTO catalogo_produto (
+        idproduto, nome, descricao, valor, estoque, media_avaliacao,
+        imagem_principal_id, imagem_placeholder, categorias_ids,
+        destaque_id, destaque_ativo, destaque_desconto, destaque_valor,
+        destaque_inicio, destaque_fim, destaque_ordem
+    )
+    SELECT p.idproduto, p.nome, p.descricao, p.valor, p.estoque, p.media_avaliacao,
+           img.idproduto_imagem, img.placeholder, COALESCE(cat.categorias_ids, '{}'),
+           d.iddestaque, COALESCE(d.ativo, FALSE), d.desconto_percentual,
+           COALESCE(d.valor_com_desconto, round(p.valor * (1 - d.desconto_percentual / 100), 2)),
+           d.data_inicio, d.data_fim, d.ordem
+    FROM produto p
+    LEFT JOIN LATERAL (
+        SELECT pi.idproduto_imagem, pi.placeholder
+        FROM produto_imagem pi
+        WHERE pi.produto_idproduto = p.idproduto AND pi.ordem = 1
+        LIMIT 1
+    ) img ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT array_agg(phc.categoria_idcategoria ORDER BY phc.categoria_idcategoria) AS categorias_ids
+        FROM produto_has_categoria phc
+        WHERE phc.produto_idproduto = p.idproduto
+    ) cat ON TRUE
+    LEFT JOIN destaque d ON d.produto_idproduto = p.idproduto
+    WHERE p.idproduto = ANY(ids)
+    ON CONFLICT (idproduto) DO UPDATE SET
+        nome = EXCLUDED.nome,
+        descricao = EXCLUDED.descricao,
+        valor = EXCLUDED.valor,
+        estoque = EXCLUDED.estoque,
+        media_avaliacao = EXCLUDED.media_avaliacao,
+        imagem_principal_id = EXCLUDED.imagem_principal_id,
+        imagem_placeholder = EXCLUDED.imagem_placeholder,
+        categorias_ids = EXCLUDED.categorias_ids,
+        destaque_id = EXCLUDED.destaque_id,
+        destaque_ativo = EXCLUDED.destaque_ativo,
+        destaque_desconto = EXCLUDED.destaque_desconto,
+        destaque_valor = EXCLUDED.destaque_valor,
+        destaque_inicio = EXCLUDED.destaque_inicio,
+        destaque_fim = EXCLUDED.destaque_fim,
+        destaque_ordem = EXCLUDED.destaque_ordem;
+$$ LANGUAGE sql;
+
+-- Carga inicial
+SELECT atualizar_catalogo_produto(ARRAY(SELECT idproduto FROM produto));
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Modelo de leitura catalogo_produto criado!';
+END $$;
@@ -0,0 +1,18 @@
+-- =========================================
+-- IMAGENS FORA DO BANCO
+-- Os arquivos passam para o armazenamento de imagens (IMAGENS_DIR),
+-- endereçados pelo SHA-256; as tabelas guardam só os metadados.
+-- Linhas com imagem preenchida são legadas e continuam sendo servidas
+-- até rodar: python manage.py migrar_imagens_armazenamento
+-- =========================================
+ALTER TABLE produto_imagem ALTER COLUMN imagem DROP NOT NULL;
+ALTER TABLE produto_imagem_derivado ALTER COLUMN imagem DROP NOT NULL;
+
+-- Localizar rapidamente o que ainda falta migrar
+CREATE INDEX IF NOT EXISTS idx_produto_imagem_no_banco
+    ON produto_imagem (idproduto_imagem) WHERE imagem IS NOT NULL;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'produto_imagem preparado para o armazenamento externo!';
+END $$;
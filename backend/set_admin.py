@@ -16,6 +16,8 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'loja_web.settings')
 django.setup()
 
+from django.conf import settings
+
 from api.models import Usuario
 
 
@@ -33,11 +35,14 @@ def set_admin(email, is_admin=True):
             action = "não é mais"
             status_icon = "ℹ️"
         
+        # save() também descarta o usuário do cache da autenticação
         user.save()
         
         print(f'{status_icon} Usuário {user.nome} ({user.email}) {action} administrador!')
         print(f'   ID: {user.idusuario}')
         print(f'   Admin: {user.admin}')
+        print(f'   A API aplica a mudança em até {settings.USUARIO_CACHE_TTL}s '
+              '(imediatamente com CACHE_BACKEND compartilhado)')
         return True
         
     except Usuario.DoesNotExist:
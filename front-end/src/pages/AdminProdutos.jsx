@@ -236,7 +236,8 @@ const AdminProdutos = () => {
   const fetchProdutos = async () => {
     setLoadingProdutos(true)
     try {
-      const response = await api.get('/produtos')
+      // O painel mostra descrição, estoque e avaliação: pedir todos os campos
+      const response = await api.get('/produtos', { params: { fields: 'completo' } })
       if (response.status === 'success' && response.data) {
         setProdutos(response.data)
       } else {
@@ -218,21 +218,28 @@ const Loja = () => {
     }
   }
 
-  // Filtrar produtos baseado no termo de pesquisa
+  // Filtrar produtos baseado no termo de pesquisa (busca feita no servidor)
   useEffect(() => {
     if (!termoPesquisa.trim()) {
       setProdutosFiltrados(produtos)
       setMostrarSugestoes(false)
-    } else {
-      const termo = termoPesquisa.toLowerCase().trim()
-      const filtrados = produtos.filter((produto) => {
-        const nome = produto.nome?.toLowerCase() || ''
-        const descricao = produto.descricao?.toLowerCase() || ''
-        return nome.includes(termo) || descricao.includes(termo)
-      })
-      setProdutosFiltrados(filtrados)
-      setMostrarSugestoes(filtrados.length > 0)
+      return
     }
+
+    const timer = setTimeout(async () => {
+      try {
+        const response = await api.get('/produtos', { params: { busca: termoPesquisa.trim() } })
+        const filtrados = response && response.status === 'success' && Array.isArray(response.data)
+          ? response.data
+          : []
+        setProdutosFiltrados(filtrados)
+        setMostrarSugestoes(filtrados.length > 0)
+      } catch (err) {
+        console.error('Erro ao buscar produtos:', err)
+      }
+    }, 300)
+
+    return () => clearTimeout(timer)
   }, [termoPesquisa, produtos])
 
   // Produtos para sugestões (limitado a 5)